@@ -6,17 +6,25 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from telegram import Update
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
     MessageHandler,
     filters,
     ContextTypes,
     CallbackQueryHandler,
+    InlineQueryHandler,
+    TypeHandler,
 )
 from app.core.config import settings, logger, logfire
+from app.core.concurrency import ChatOrderedUpdateProcessor
+from app.core.metrics import start_metrics_server, stop_metrics_server
+from app.core.ratelimit import create_rate_limiter
+from app.core.state import WRITE_THROUGH_GROUP, create_persistence, write_through
 from app.core.models import (
     UserState,
 )
+from app.core.presets import PRESETS
 from app.functions.text_qr import text_qr_handle_text_state
 from app.functions.url_qr import url_qr_handle_url_state, svg_url_qr_handle_url_state
 from app.functions.wifi_qr import (
@@ -32,7 +40,15 @@ from app.functions.vcard_qr import (
     vcard_qr_handle_title_state,
     vcard_qr_handle_website_state,
 )
-from app.functions.shared import command_options, handle_invalid_state
+from app.functions.batch_qr import BATCH_HELP, batch_qr_handle_input_state
+from app.functions.inline_qr import inline_query_handler
+from app.functions.shared import (
+    PRESET_MARKUP,
+    command_options,
+    handle_invalid_state,
+)
+from app.prewarm import prewarm
+from app.render.executor import render_executor
 
 
 # Start command
@@ -61,6 +77,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         UserState.VCARD_AWAITING_COMPANY: vcard_qr_handle_company_state,
         UserState.VCARD_AWAITING_TITLE: vcard_qr_handle_title_state,
         UserState.VCARD_AWAITING_WEBSITE: vcard_qr_handle_website_state,
+        UserState.BATCH_AWAITING_INPUT: batch_qr_handle_input_state,
     }
 
     # Call the appropriate handler or fallback
@@ -69,6 +86,16 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await handler(update, context)
 
 
+async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Only the batch flow accepts uploaded files
+    if context.user_data.get("state") == UserState.BATCH_AWAITING_INPUT:
+        handler = batch_qr_handle_input_state
+    else:
+        handler = handle_invalid_state
+    with logfire.span(str(handler.__name__)):
+        await handler(update, context)
+
+
 # Handle Button Callbacks
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
@@ -96,22 +123,88 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     elif query.data == "text_qr":
         await query.message.reply_text("Please send the text:")
         context.user_data["state"] = UserState.TEXT_AWAITING_TEXT
+    elif query.data == "batch_qr":
+        await query.message.reply_text(BATCH_HELP)
+        context.user_data["state"] = UserState.BATCH_AWAITING_INPUT
+    elif query.data == "presets":
+        await query.message.reply_text(
+            "Choose the size of your QR codes:", reply_markup=PRESET_MARKUP
+        )
+    elif query.data.startswith("preset:") and query.data[7:] in PRESETS:
+        context.user_data["preset"] = query.data[7:]
+        await query.message.reply_text(
+            f"✅ QR codes will now be rendered as {PRESETS[query.data[7:]].label}"
+        )
+        await command_options(update, context)
 
 
-if __name__ == "__main__":  # pragma: no cover
-    application = ApplicationBuilder().token(settings.TELEGRAM_TOKEN).build()
+async def post_init(application: Application) -> None:
+    # Runs before polling starts or the webhook is registered
+    if settings.PREWARM:
+        await prewarm(settings.PREWARM_PAYLOADS)
+    # Never on the public webhook listener, which the load balancer exposes
+    if settings.METRICS_PORT is not None:
+        start_metrics_server(settings.METRICS_LISTEN, settings.METRICS_PORT)
+
+
+async def post_shutdown(application: Application) -> None:
+    render_executor.shutdown()
+    stop_metrics_server()
+
+
+def build_application() -> Application:
+    builder = (
+        ApplicationBuilder()
+        .token(settings.TELEGRAM_TOKEN)
+        .base_url(settings.TELEGRAM_BASE_URL)
+        .concurrent_updates(ChatOrderedUpdateProcessor(settings.CONCURRENT_UPDATES))
+        .persistence(create_persistence())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if settings.RATE_LIMIT_ENABLED:
+        builder = builder.rate_limiter(create_rate_limiter())
+    application = builder.build()
 
     start_handler = CommandHandler(command="start", callback=start)
     command_options_handler = CommandHandler(command="more", callback=command_options)
     msg_handler = MessageHandler(
         filters=filters.TEXT & ~filters.COMMAND, callback=handle_message
     )
+    document_handler = MessageHandler(
+        filters=filters.Document.ALL, callback=handle_document
+    )
     button_query_handler = CallbackQueryHandler(button_callback)
 
     application.add_handler(start_handler)
     application.add_handler(msg_handler)
+    application.add_handler(document_handler)
     application.add_handler(command_options_handler)
     application.add_handler(button_query_handler)
+    if settings.STATE_SHARED:
+        application.add_handler(
+            TypeHandler(Update, write_through), group=WRITE_THROUGH_GROUP
+        )
+    # Inline results need a chat to upload QR codes to before sharing them
+    if settings.INLINE_CACHE_CHAT_ID is not None:
+        application.add_handler(InlineQueryHandler(inline_query_handler))
+    return application
+
+
+if __name__ == "__main__":  # pragma: no cover
+    if settings.WORKERS > 1:
+        from app.supervisor import Supervisor, build_supervisor_application
+
+        application = build_supervisor_application(Supervisor(settings.WORKERS))
+    else:
+        application = build_application()
+
+    if settings.BOT_MODE == "webhook":
+        import asyncio
+        from app.webhook import run_webhook
 
-    logger.info("🤖 Bot is running... Press Ctrl+C to stop.")
-    application.run_polling()
+        logger.info("🤖 Bot is running in webhook mode... Press Ctrl+C to stop.")
+        asyncio.run(run_webhook(application))
+    else:
+        logger.info("🤖 Bot is running... Press Ctrl+C to stop.")
+        application.run_polling()
@@ -0,0 +1,142 @@
+import asyncio
+import csv
+import zipfile
+from collections import Counter
+from io import BytesIO
+from typing import AsyncIterator, Awaitable, Callable, Iterable, NamedTuple
+
+from pydantic import ValidationError
+
+from app.core.models import URLQR, ContactQR, WifiQR
+from app.core.presets import DEFAULT_PRESET, PRESETS, Preset
+from app.render.matrix import fits
+from app.qrcodegen import (
+    RenderKey,
+    contact_qr_key,
+    key_digest,
+    render_cached,
+    text_qr_key,
+    url_qr_key,
+    wifi_qr_key,
+)
+
+CONTACT_FIELDS = ("name", "surname", "phone_number", "email", "company", "title", "url")
+
+
+class BatchItem(NamedTuple):
+    line: int
+    name: str  # file name without extension
+    key: RenderKey
+
+
+class BatchError(NamedTuple):
+    line: int
+    message: str
+
+
+def _contact_key(values: list[str], preset: Preset) -> RenderKey:
+    # Optional trailing fields are left out so the model defaults apply
+    fields = {
+        field: value for field, value in zip(CONTACT_FIELDS, values) if value.strip()
+    }
+    return contact_qr_key(ContactQR(**fields), preset=preset)
+
+
+def parse_row(
+    raw: str, row: list[str], preset: Preset = PRESETS[DEFAULT_PRESET]
+) -> tuple[str, RenderKey]:
+    """Build the render key for one batch row.
+
+    Rows start with a kind (``url``, ``text``, ``wifi`` or ``contact``)
+    followed by its fields. Any other line is a URL when it validates as one,
+    otherwise its text is encoded as is.
+    """
+    kind = row[0].strip().lower() if row else ""
+    values = [value.strip() for value in row[1:]]
+    if kind == "url" and len(values) == 1:
+        return kind, url_qr_key(URLQR(url=values[0]), preset=preset)
+    if kind == "text" and values:
+        return kind, text_qr_key(raw.split(",", 1)[1].strip(), preset=preset)
+    if kind == "wifi" and len(values) == 2:
+        wifi = WifiQR(ssid=values[0], password=values[1])
+        return kind, wifi_qr_key(wifi, preset=preset)
+    if kind == "contact" and 4 <= len(values) <= len(CONTACT_FIELDS):
+        return kind, _contact_key(values, preset)
+    if kind in ("url", "text", "wifi", "contact"):
+        raise ValueError(f"wrong number of fields for {kind}")
+    try:
+        return "url", url_qr_key(URLQR(url=raw.strip()), preset=preset)
+    except ValidationError:
+        return "text", text_qr_key(raw.strip(), preset=preset)
+
+
+def check_capacity(key: RenderKey) -> None:
+    # Rejected while parsing, so an oversized row is listed with the invalid
+    # ones instead of failing its render halfway through the batch
+    if not fits(key.payload, key.error_correction):
+        raise ValueError("too long for a QR code")
+
+
+def content_name(kind: str, key: RenderKey, seen: Counter[str]) -> str:
+    # Derived from the payload, so adding or removing rows keeps the names of
+    # the others; repeated payloads get a numbered suffix
+    name = f"{kind}_{key_digest([kind, key.payload])[:8]}"
+    seen[name] += 1
+    return name if seen[name] == 1 else f"{name}_{seen[name]}"
+
+
+def describe_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        error = exc.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        return f"{location}: {error['msg']}" if location else error["msg"]
+    return str(exc)
+
+
+def parse_batch(
+    lines: Iterable[str], preset: Preset = PRESETS[DEFAULT_PRESET]
+) -> tuple[list[BatchItem], list[BatchError]]:
+    items: list[BatchItem] = []
+    errors: list[BatchError] = []
+    names: Counter[str] = Counter()
+    for number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            kind, key = parse_row(raw, next(csv.reader([raw])), preset)
+            check_capacity(key)
+        except (ValidationError, ValueError) as exc:
+            errors.append(BatchError(number, describe_error(exc)))
+            continue
+        items.append(BatchItem(number, content_name(kind, key, names), key))
+    return items, errors
+
+
+async def render_batch(
+    items: list[BatchItem],
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> AsyncIterator[tuple[BatchItem, bytes]]:
+    # Yields renders as they complete; the render executor bounds parallelism
+    async def render(item: BatchItem) -> tuple[BatchItem, bytes]:
+        return item, await render_cached(item.key)
+
+    for done, task in enumerate(
+        asyncio.as_completed([render(item) for item in items]), start=1
+    ):
+        yield await task
+        if on_progress is not None:
+            await on_progress(done, len(items))
+
+
+async def zip_batch(
+    items: list[BatchItem],
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> BytesIO:
+    buffer = BytesIO()
+    # Images are already compressed, storing them keeps zipping nearly free
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for item, data in render_batch(items, on_progress):
+            archive.writestr(f"{item.name}.{item.key.fmt}", data)
+    buffer.seek(0)
+    buffer.name = "qr_codes.zip"
+    return buffer
@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable
+
+from telegram import InlineQuery, Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates of different chats concurrently, one chat at a time.
+
+    Updates for the same chat wait on a FIFO lock in arrival order, so the
+    ``UserState`` machine in ``context.user_data`` never sees reordered
+    messages, while at most ``max_concurrency`` updates run at once across
+    chats. Waiting updates of a busy chat do not take a concurrency slot.
+    """
+
+    def __init__(self, max_concurrency: int, max_pending_updates: int = 10_000):
+        # PTB's own semaphore only bounds pending updates here; the real limit
+        # is applied after the per-chat lock so busy chats can't starve others
+        super().__init__(max_concurrent_updates=max_pending_updates)
+        if max_concurrency < 1:
+            raise ValueError("`max_concurrency` must be a positive integer!")
+        self.max_concurrency = max_concurrency
+        self._active = asyncio.Semaphore(max_concurrency)
+        self._chat_locks: dict[int, list] = {}
+
+    @staticmethod
+    def ordering_key(update: object) -> int | None:
+        if not isinstance(update, Update):
+            return None
+        if isinstance(update.inline_query, InlineQuery):
+            # Stateless, and a newer query must be able to cancel a stale one
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    @asynccontextmanager
+    async def _chat_lock(self, key: int | None) -> AsyncIterator[None]:
+        if key is None:
+            yield
+            return
+        # [lock, number of updates holding or waiting for it]
+        entry = self._chat_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[key]
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        async with self._chat_lock(self.ordering_key(update)):
+            async with self._active:
+                await coroutine
+
+    async def initialize(self) -> None:
+        self._active = asyncio.Semaphore(self.max_concurrency)
+        self._chat_locks.clear()
+
+    async def shutdown(self) -> None:
+        pass
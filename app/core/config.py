@@ -1,11 +1,88 @@
+import os
+from typing import Literal
+
+# Values pydantic parses as True for a bool setting
+TRUTHY = ("1", "on", "t", "true", "y", "yes")
+
+# Pydantic discovers plugins by scanning every installed distribution, and
+# Logfire's plugin pulls in the whole OpenTelemetry SDK even when Logfire is
+# disabled. Without Logfire the bot uses no Pydantic plugin, so skip discovery
+# at startup. Read before the settings exist, hence the raw environment.
+if os.environ.get("LOGFIRE_ENABLED", "").strip().lower() not in TRUTHY:
+    os.environ.setdefault("PYDANTIC_DISABLE_PLUGINS", "__all__")
+
+from pydantic import Field
 from pydantic_settings import BaseSettings
 import logging
 
 
 class AppSettings(BaseSettings):
     TELEGRAM_TOKEN: str = ""
+    # Bot API endpoint, the token is appended; e.g. a local Bot API server
+    TELEGRAM_BASE_URL: str = "https://api.telegram.org/bot"
     LOGFIRE_ENABLED: bool = False
     LOGFIRE_TOKEN: str = ""
+    # Prometheus-style /metrics endpoint on its own listener, in both modes;
+    # None disables it
+    METRICS_PORT: int | None = None
+    METRICS_LISTEN: str = "127.0.0.1"
+    # Render engine: "inline" (event loop thread), "thread" or "process" pool
+    RENDER_EXECUTOR: Literal["inline", "thread", "process"] = "thread"
+    RENDER_MAX_WORKERS: int | None = None  # defaults to the CPU count
+    RENDER_MAX_QUEUE: int = 64  # jobs waiting for a worker before backpressure
+    RENDER_TIMEOUT: float = 10.0  # seconds per render job
+    RENDER_RASTER_BACKEND: Literal["pil", "numpy", "stream"] = "numpy"  # PNG encoder
+    SVG_GZIP: bool = False  # send SVG QR codes gzipped as .svgz
+    RENDER_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # 0 disables the render cache
+    RENDER_CACHE_MAX_ENTRIES: int = 1024
+    RENDER_CACHE_TTL: float | None = None  # seconds, None keeps entries until evicted
+    QR_FAST_MASK: int | None = Field(None, ge=0, le=7)  # fixed mask 0-7, skips scoring
+    # Split payloads into the numeric, alphanumeric and byte runs taking fewest bits
+    QR_OPTIMAL_SEGMENTS: bool = True
+    QR_MICRO: bool = False  # Micro QR for short payloads, needs segno
+    # Encoded module matrices, reused across formats and sizes
+    MATRIX_CACHE_MAX_BYTES: int = 4 * 1024 * 1024  # 0 disables the matrix cache
+    MATRIX_CACHE_MAX_ENTRIES: int = 4096
+    # Telegram file_id reuse, backed by SQLite when a path is given
+    FILE_ID_INDEX_PATH: str | None = None
+    FILE_ID_INDEX_MAX_ENTRIES: int = 10_000
+    MENU_WITH_RESULT: bool = False  # attach the menu to the QR instead of a new message
+    # Inline mode (@bot <url>), enabled when a chat to upload QR codes to is set
+    INLINE_CACHE_CHAT_ID: int | None = None
+    INLINE_DEBOUNCE: float = 0.4  # seconds without a newer query before rendering
+    INLINE_CACHE_TIME: int = 300  # seconds Telegram may cache inline answers
+    BATCH_MAX_ITEMS: int = 100  # QR codes per batch message or file
+    BATCH_MAX_FILE_BYTES: int = 256 * 1024  # largest accepted batch file
+    # Conversation state persistence: "memory", "sqlite" or "redis"
+    STATE_BACKEND: Literal["memory", "sqlite", "redis"] = "memory"
+    STATE_SQLITE_PATH: str = "state.sqlite3"
+    STATE_REDIS_URL: str = "redis://localhost:6379/0"
+    STATE_TTL: float | None = 24 * 60 * 60  # seconds before idle conversations reset
+    STATE_FLUSH_INTERVAL: float = 1.0  # seconds between batched writes
+    STATE_SHARED: bool = False  # re-read and write through state shared by replicas
+    # Outgoing Bot API requests, in requests per second
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_GLOBAL: float = 30.0
+    RATE_LIMIT_CHAT: float = 1.0  # per private chat
+    RATE_LIMIT_GROUP: float = 20 / 60  # per group or channel
+    RATE_LIMIT_BURST: int = 3  # requests a chat can send at once
+    RATE_LIMIT_MAX_RETRIES: int = 3  # retries after a RetryAfter flood error
+    # Update delivery: long "polling" or a "webhook" HTTP server for replicas
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    CONCURRENT_UPDATES: int = 16  # chats processed in parallel, in order per chat
+    # Bot processes; more than 1 runs a supervisor sharding chats between them
+    WORKERS: int = 1
+    WEBHOOK_URL: str = ""  # public base URL Telegram delivers updates to
+    WEBHOOK_PATH: str = "/telegram"
+    WEBHOOK_SECRET_TOKEN: str = ""
+    WEBHOOK_LISTEN: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_DRAIN_DELAY: float = 5.0  # seconds failing readiness before exiting
+    SHUTDOWN_GRACE_PERIOD: float = 30.0  # seconds to finish in-flight requests
+    # Load lazy modules, build common templates and render PREWARM_PAYLOADS
+    # into the render cache before accepting updates
+    PREWARM: bool = False
+    PREWARM_PAYLOADS: list[str] = []
 
 
 logging.basicConfig(
@@ -37,6 +114,14 @@ def logfire_init():  # pragma: no cover
     return logfire
 
 
+def __getattr__(name: str):
+    # Logfire is configured on first use, so processes that never trace
+    # (render workers, command line tools) don't import or configure it
+    if name == "logfire":
+        globals()["logfire"] = value = logfire_init()
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 logger = logging.getLogger(__name__)
 settings = AppSettings()
-logfire = logfire_init()
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from app.core.config import settings
+
+
+class FileIdIndex:
+    """Maps a payload digest to the Telegram ``file_id`` of an uploaded QR.
+
+    Lookups hit an in-memory LRU first and fall back to an optional SQLite
+    database, so the index survives restarts. Only keyed digests are stored,
+    never the payloads themselves (Wi-Fi passwords, vCards).
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS file_ids "
+                "(digest TEXT PRIMARY KEY, file_id TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, digest: str) -> str | None:
+        with self._lock:
+            file_id = self._entries.get(digest)
+            if file_id is not None:
+                self._entries.move_to_end(digest)
+                return file_id
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT file_id FROM file_ids WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(digest, row[0])
+            return row[0]
+
+    def put(self, digest: str, file_id: str) -> None:
+        with self._lock:
+            self._remember(digest, file_id)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO file_ids (digest, file_id) VALUES (?, ?)",
+                    (digest, file_id),
+                )
+                self._db.commit()
+
+    def forget(self, digest: str) -> None:
+        with self._lock:
+            self._entries.pop(digest, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM file_ids WHERE digest = ?", (digest,))
+                self._db.commit()
+
+    def _remember(self, digest: str, file_id: str) -> None:
+        self._entries[digest] = file_id
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+file_id_index = FileIdIndex(
+    path=settings.FILE_ID_INDEX_PATH,
+    max_entries=settings.FILE_ID_INDEX_MAX_ENTRIES,
+)
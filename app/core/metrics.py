@@ -0,0 +1,184 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, Iterator
+
+from app.core.config import logger
+
+# Seconds, from sub-millisecond cache hits up to slow uploads
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus exposition format."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def state(self) -> tuple[list[int], float, int]:
+        # Picklable copy, for merging histograms of other processes
+        return list(self.counts), self.sum, self.count
+
+    def merge(self, state: tuple[list[int], float, int]) -> None:
+        counts, total, count = state
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """In-process per-stage timings of the QR hot path.
+
+    Stages are ``validate`` (pydantic models), ``matrix`` (``qr.make``),
+    ``encode`` (image ``save``), ``upload`` (sending the QR to Telegram) and
+    ``menu`` (the follow-up ``command_options`` message). Independent of
+    Logfire, so it works whether or not Logfire is enabled.
+    """
+
+    name = "qrcodegen_stage_seconds"
+
+    def __init__(self):
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        # Extra "name -> value" samples (counters, gauges) added at render time
+        self._collectors: list[Callable[[], dict[str, float]]] = []
+        # Snapshots of other processes, merged into this one at render time
+        self._sources: list[Callable[[], Iterable[dict[str, Any]]]] = []
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def histogram(self, stage: str) -> Histogram | None:
+        return self._histograms.get(stage)
+
+    def add_collector(self, collector: Callable[[], dict[str, float]]) -> None:
+        self._collectors.append(collector)
+
+    def add_source(self, source: Callable[[], Iterable[dict[str, Any]]]) -> None:
+        self._sources.append(source)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Picklable state of this process: histograms and collector samples."""
+        with self._lock:
+            histograms = {
+                stage: histogram.state()
+                for stage, histogram in self._histograms.items()
+            }
+        samples: dict[str, float] = {}
+        for collector in self._collectors:
+            samples |= collector()
+        return {"histograms": histograms, "samples": samples}
+
+    def render(self) -> str:
+        # Histograms are merged and samples summed across this process and
+        # the snapshots of every source
+        histograms: dict[str, Histogram] = {}
+        samples: dict[str, float] = {}
+        snapshots = [self.snapshot()]
+        for source in self._sources:
+            snapshots += source()
+        for snapshot in snapshots:
+            for stage, state in snapshot["histograms"].items():
+                histograms.setdefault(stage, Histogram()).merge(state)
+            for name, value in snapshot["samples"].items():
+                samples[name] = samples.get(name, 0) + value
+        lines = [
+            f"# HELP {self.name} Time spent per stage of the QR hot path.",
+            f"# TYPE {self.name} histogram",
+        ]
+        for stage, histogram in sorted(histograms.items()):
+            lines += histogram.render(self.name, f'stage="{stage}"')
+        for name, value in samples.items():
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass  # scrapes would flood the bot logs
+
+
+_server: ThreadingHTTPServer | None = None
+
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    # Own listener in both modes, so /metrics never shares the webhook port
+    global _server
+    _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    logger.info(f"📈 Metrics available on http://{host}:{_server.server_port}/metrics")
+    return _server
+
+
+def stop_metrics_server() -> None:
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+
+metrics = Metrics()
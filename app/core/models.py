@@ -1,5 +1,17 @@
 from enum import StrEnum, unique
-from pydantic import BaseModel, AnyUrl, Field, EmailStr
+from typing import Annotated
+from pydantic import AfterValidator, BaseModel, AnyUrl, Field
+
+
+def validate_email(value: str) -> str:
+    # Same check and normalization as EmailStr, but email_validator is only
+    # imported by the first contact QR code instead of at startup
+    from pydantic.networks import validate_email
+
+    return validate_email(value)[1]
+
+
+Email = Annotated[str, AfterValidator(validate_email)]
 
 
 class URLQR(BaseModel):
@@ -15,7 +27,7 @@ class WifiQR(WiFiSSIDModel):
 
 
 class EmailModel(BaseModel):
-    email: EmailStr
+    email: Email
 
 
 class ContactQR(EmailModel):
@@ -42,3 +54,4 @@ class UserState(StrEnum):
     VCARD_AWAITING_TITLE = "VCARD_AWAITING_TITLE"
     VCARD_AWAITING_WEBSITE = "VCARD_AWAITING_WEBSITE"
     TEXT_AWAITING_TEXT = "TEXT_AWAITING_TEXT"
+    BATCH_AWAITING_INPUT = "BATCH_AWAITING_INPUT"
@@ -0,0 +1,39 @@
+from typing import Any, NamedTuple
+
+import qrcode
+
+
+class Preset(NamedTuple):
+    label: str
+    box_size: int
+    border: int
+    # None keeps the flow's own level (L for text and URLs, M for Wi-Fi and contacts)
+    error_correction: int | None = None
+
+
+# Sizes only change box_size: QR codes need a 4-module quiet zone to scan
+# reliably, and Telegram shows them on arbitrary chat backgrounds
+PRESETS = {
+    "tiny": Preset("🔹 Tiny", box_size=2, border=4),
+    "chat-thumbnail": Preset("💬 Chat thumbnail", box_size=4, border=4),
+    "standard": Preset("🖼️ Standard", box_size=10, border=4),
+    "print": Preset(
+        "🖨️ Print",
+        box_size=24,
+        border=4,
+        error_correction=qrcode.constants.ERROR_CORRECT_Q,
+    ),
+}
+DEFAULT_PRESET = "standard"
+
+
+def preset_for(user_data: dict[str, Any]) -> Preset:
+    return PRESETS.get(user_data.get("preset"), PRESETS[DEFAULT_PRESET])
+
+
+def reset_state(user_data: dict[str, Any]) -> None:
+    # Ends the current conversation but keeps the user's preferences
+    preset = user_data.get("preset")
+    user_data.clear()
+    if preset is not None:
+        user_data["preset"] = preset
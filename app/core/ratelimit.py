@@ -0,0 +1,216 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Callable, Coroutine
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from app.core.config import settings, logger
+from app.core.metrics import metrics
+
+# Lower runs first: callback answers, then QR images, then texts and menus
+PRIORITIES = {
+    "answerCallbackQuery": 0,
+    "answerInlineQuery": 0,
+    "sendPhoto": 1,
+    "sendDocument": 1,
+    "sendMediaGroup": 1,
+}
+DEFAULT_PRIORITY = 2
+# Idle chat buckets are dropped once this many are tracked
+MAX_CHAT_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        # Seconds until a token is available, 0 when one is
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class TokenBucketRateLimiter(BaseRateLimiter[int]):
+    """Schedules outgoing Bot API requests under Telegram's flood limits.
+
+    Every request takes a token from a global bucket and, when it targets a
+    chat, from that chat's bucket (groups and channels refill slower). A
+    single dispatcher grants tokens to waiting requests by priority, so QR
+    images go out before menus when the bot is saturated. A ``RetryAfter``
+    pauses all requests for the time Telegram asks, then the request is
+    retried up to ``max_retries`` times. ``rate_limit_args`` overrides the
+    priority of a single request.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        group_rate: float = 20 / 60,
+        burst: int = 3,
+        max_retries: int = 3,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: dict[int | str, TokenBucket] = {}
+        # [priority, arrival, chat, future], granted lowest first
+        self._waiting: list[list] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._dispatcher: asyncio.Task | None = None
+
+    async def initialize(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for entry in self._waiting:
+            entry[3].cancel()
+        self._waiting.clear()
+
+    def _chat_bucket(self, chat: int | str | None, now: float) -> TokenBucket | None:
+        if chat is None:
+            return None
+        bucket = self._chats.get(chat)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                for key in [key for key, old in self._chats.items() if old.idle(now)]:
+                    del self._chats[key]
+            # Negative ids and @usernames are groups and channels
+            group = isinstance(chat, str) or chat < 0
+            rate = self.group_rate if group else self.chat_rate
+            bucket = self._chats[chat] = TokenBucket(rate, self.burst)
+        return bucket
+
+    def _grant(self) -> float | None:
+        # Releases every request that can go now; returns the seconds until
+        # the next one may, or None when nothing is waiting
+        while self._waiting:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            delay = self._global.delay(now)
+            if delay:
+                return delay
+            granted = None
+            soonest = None
+            for entry in sorted(self._waiting):
+                if entry[3].done():  # cancelled while waiting
+                    self._waiting.remove(entry)
+                    continue
+                bucket = self._chat_bucket(entry[2], now)
+                delay = bucket.delay(now) if bucket is not None else 0.0
+                if not delay:
+                    granted = entry
+                    break
+                soonest = delay if soonest is None else min(soonest, delay)
+            if granted is None:
+                return soonest
+            self._global.take(now)
+            if granted[2] is not None:
+                self._chats[granted[2]].take(now)
+            self._waiting.remove(granted)
+            granted[3].set_result(None)
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            timeout = self._grant()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _acquire(self, chat: int | str | None, priority: int) -> None:
+        if self._dispatcher is None:
+            await self.initialize()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append([priority, next(self._sequence), chat, future])
+        self._wakeup.set()
+        await future
+
+    @staticmethod
+    def chat_key(data: dict[str, Any]) -> int | str | None:
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return None
+        try:
+            return int(chat_id)
+        except (TypeError, ValueError):
+            return str(chat_id)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, bool | dict | list[dict]]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> bool | dict | list[dict]:
+        chat = self.chat_key(data)
+        if rate_limit_args is not None:
+            priority = rate_limit_args
+        else:
+            priority = PRIORITIES.get(endpoint, DEFAULT_PRIORITY)
+        attempt = 0
+        while True:
+            with metrics.time("throttle"):
+                await self._acquire(chat, priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                if attempt == self.max_retries:
+                    raise
+                attempt += 1
+                retry_after = exc.retry_after
+                if not isinstance(retry_after, (int, float)):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(
+                    f"🐌 Flood limit hit, pausing requests for {retry_after}s"
+                )
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + retry_after
+                )
+
+
+def create_rate_limiter() -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(
+        global_rate=settings.RATE_LIMIT_GLOBAL,
+        chat_rate=settings.RATE_LIMIT_CHAT,
+        group_rate=settings.RATE_LIMIT_GROUP,
+        burst=settings.RATE_LIMIT_BURST,
+        max_retries=settings.RATE_LIMIT_MAX_RETRIES,
+    )
@@ -0,0 +1,338 @@
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Protocol
+
+from telegram import Update
+from telegram.ext import BasePersistence, ContextTypes, PersistenceInput
+
+from app.core.config import settings, logger
+from app.core.models import UserState
+from app.core.presets import reset_state
+
+# A stored conversation: (user_data, last update as a UNIX timestamp)
+Record = tuple[dict[str, Any], float]
+# Handler group of write_through, after the group of the bot's handlers
+WRITE_THROUGH_GROUP = 1
+
+
+def dump_user_data(user_data: dict[str, Any]) -> str:
+    return json.dumps(user_data, ensure_ascii=False)
+
+
+def load_user_data(raw: str | bytes) -> dict[str, Any]:
+    user_data = json.loads(raw)
+    if "state" in user_data:
+        user_data["state"] = UserState(user_data["state"])
+    return user_data
+
+
+class StateStore(ABC):
+    """Storage backend for the conversation state of each user."""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+
+    def expired(self, updated_at: float) -> bool:
+        return self.ttl is not None and time.time() - updated_at > self.ttl
+
+    async def open(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, user_id: int) -> Record | None: ...
+
+    @abstractmethod
+    async def set(self, user_id: int, user_data: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    async def delete(self, user_id: int) -> None: ...
+
+    @abstractmethod
+    async def load_all(self) -> dict[int, Record]: ...
+
+    async def purge_expired(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryStateStore(StateStore):
+    def __init__(self, ttl: float | None = None):
+        super().__init__(ttl)
+        self._records: dict[int, tuple[str, float]] = {}
+
+    async def get(self, user_id: int) -> Record | None:
+        record = self._records.get(user_id)
+        if record is None or self.expired(record[1]):
+            return None
+        return load_user_data(record[0]), record[1]
+
+    async def set(self, user_id: int, user_data: dict[str, Any]) -> None:
+        self._records[user_id] = dump_user_data(user_data), time.time()
+
+    async def delete(self, user_id: int) -> None:
+        self._records.pop(user_id, None)
+
+    async def load_all(self) -> dict[int, Record]:
+        records = {}
+        for user_id in list(self._records):
+            record = await self.get(user_id)
+            if record is not None:
+                records[user_id] = record
+        return records
+
+    async def purge_expired(self) -> None:
+        for user_id, (_, updated_at) in list(self._records.items()):
+            if self.expired(updated_at):
+                del self._records[user_id]
+
+
+class SQLiteStateStore(StateStore):
+    def __init__(self, path: str, ttl: float | None = None):
+        super().__init__(ttl)
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+
+    async def open(self) -> None:
+        self._db = sqlite3.connect(self.path)
+        # WAL keeps readers and the periodic writer from blocking each other
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS user_state "
+            "(user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    async def get(self, user_id: int) -> Record | None:
+        row = self._db.execute(
+            "SELECT data, updated_at FROM user_state WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None or self.expired(row[1]):
+            return None
+        return load_user_data(row[0]), row[1]
+
+    async def set(self, user_id: int, user_data: dict[str, Any]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO user_state (user_id, data, updated_at) "
+            "VALUES (?, ?, ?)",
+            (user_id, dump_user_data(user_data), time.time()),
+        )
+        self._db.commit()
+
+    async def delete(self, user_id: int) -> None:
+        self._db.execute("DELETE FROM user_state WHERE user_id = ?", (user_id,))
+        self._db.commit()
+
+    async def load_all(self) -> dict[int, Record]:
+        rows = self._db.execute("SELECT user_id, data, updated_at FROM user_state")
+        return {
+            user_id: (load_user_data(data), updated_at)
+            for user_id, data, updated_at in rows
+            if not self.expired(updated_at)
+        }
+
+    async def purge_expired(self) -> None:
+        if self.ttl is not None:
+            self._db.execute(
+                "DELETE FROM user_state WHERE updated_at < ?", (time.time() - self.ttl,)
+            )
+            self._db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class RedisLike(Protocol):
+    """The subset of the ``redis.asyncio.Redis`` API the state store needs."""
+
+    async def get(self, name: str) -> bytes | None: ...
+
+    async def set(self, name: str, value: str, ex: int | None = None) -> Any: ...
+
+    async def delete(self, *names: str) -> Any: ...
+
+    def scan_iter(self, match: str | None = None) -> AsyncIterator[bytes]: ...
+
+
+class RedisStateStore(StateStore):
+    """Shares state between replicas; expiry is delegated to Redis key TTLs."""
+
+    def __init__(
+        self, client: RedisLike, ttl: float | None = None, prefix: str = "qrcodegen:"
+    ):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float | None = None) -> "RedisStateStore":
+        import redis.asyncio  # optional dependency, only needed for this backend
+
+        return cls(redis.asyncio.Redis.from_url(url), ttl=ttl)
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    async def get(self, user_id: int) -> Record | None:
+        raw = await self.client.get(self._key(user_id))
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        return load_user_data(record["data"]), record["updated_at"]
+
+    async def set(self, user_id: int, user_data: dict[str, Any]) -> None:
+        record = {"data": dump_user_data(user_data), "updated_at": time.time()}
+        ttl = None if self.ttl is None else max(int(self.ttl), 1)
+        await self.client.set(self._key(user_id), json.dumps(record), ex=ttl)
+
+    async def delete(self, user_id: int) -> None:
+        await self.client.delete(self._key(user_id))
+
+    async def load_all(self) -> dict[int, Record]:
+        records = {}
+        async for key in self.client.scan_iter(match=f"{self.prefix}user:*"):
+            if isinstance(key, bytes):
+                key = key.decode()
+            user_id = int(key.rsplit(":", 1)[1])
+            record = await self.get(user_id)
+            if record is not None:
+                records[user_id] = record
+        return records
+
+    async def close(self) -> None:
+        close = getattr(self.client, "aclose", None)
+        if close is not None:
+            await close()
+
+
+class StatePersistence(BasePersistence):
+    """Persists ``context.user_data`` (the ``UserState`` and collected fields).
+
+    Writes are batched by PTB every ``update_interval`` seconds. With
+    ``shared`` enabled, a user's data is re-read from the store before each
+    update when another replica wrote it more recently, and
+    :func:`write_through` stores it as soon as the update is handled, since
+    the user's next message may reach another replica before the batched
+    write. Conversations idle for longer than the store TTL are reset.
+    """
+
+    def __init__(
+        self, store: StateStore, update_interval: float = 1.0, shared: bool = False
+    ):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=False, user_data=True, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self.store = store
+        self.shared = shared
+        # Last time each user's data was seen locally (loaded, written or used)
+        self._seen: dict[int, float] = {}
+
+    async def get_user_data(self) -> dict[int, dict[str, Any]]:
+        await self.store.open()
+        await self.store.purge_expired()
+        records = await self.store.load_all()
+        self._seen = {
+            user_id: updated_at for user_id, (_, updated_at) in records.items()
+        }
+        return {user_id: user_data for user_id, (user_data, _) in records.items()}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict[str, Any]) -> None:
+        now = time.time()
+        seen = self._seen.get(user_id)
+        record = None
+        if self.shared:
+            # Another replica may have moved the conversation on since this
+            # one saw it; the store drops records older than the TTL itself
+            record = await self.store.get(user_id)
+        if record is not None:
+            if seen is None or record[1] > seen:
+                user_data.clear()
+                user_data.update(record[0])
+        elif seen is not None and user_data and self.store.expired(seen):
+            logger.debug(f"⌛ Conversation of user {user_id} expired")
+            reset_state(user_data)
+        self._seen[user_id] = now
+
+    async def update_user_data(self, user_id: int, data: dict[str, Any]) -> None:
+        if data:
+            await self.store.set(user_id, data)
+        else:
+            await self.store.delete(user_id)
+        self._seen[user_id] = time.time()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        await self.store.delete(user_id)
+        self._seen.pop(user_id, None)
+
+    async def flush(self) -> None:
+        await self.store.purge_expired()
+        await self.store.close()
+
+    # Only user data is persisted
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+
+async def write_through(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Registered in WRITE_THROUGH_GROUP when replicas share state
+    persistence = context.application.persistence
+    if update.effective_user is None or persistence is None:
+        return
+    await persistence.update_user_data(update.effective_user.id, context.user_data)
+
+
+def create_state_store() -> StateStore:
+    if settings.STATE_BACKEND == "redis":
+        return RedisStateStore.from_url(
+            settings.STATE_REDIS_URL, ttl=settings.STATE_TTL
+        )
+    if settings.STATE_BACKEND == "sqlite":
+        return SQLiteStateStore(settings.STATE_SQLITE_PATH, ttl=settings.STATE_TTL)
+    return MemoryStateStore(ttl=settings.STATE_TTL)
+
+
+def create_persistence() -> StatePersistence:
+    return StatePersistence(
+        create_state_store(),
+        update_interval=settings.STATE_FLUSH_INTERVAL,
+        shared=settings.STATE_SHARED,
+    )
@@ -0,0 +1,303 @@
+"""Render a manifest of QR codes into a directory or a ZIP file.
+
+Run from the repository root:
+
+    python -m app.export codes.csv --output assets/ [--preset print]
+    python -m app.export codes.yaml --output assets.zip [--format svg]
+
+CSV and text manifests use the batch format, one QR code per row. YAML
+manifests (``pip install pyyaml``) are a list of entries with a ``type``
+(``url``, ``text``, ``wifi`` or ``contact``), the fields of its model and an
+optional ``file`` name, ``preset`` and ``format``. Unnamed entries are named
+after their type and a digest of their payload. Only entries whose payload or
+render settings changed since the last export are rendered again.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, get_args
+
+from pydantic import BaseModel, ValidationError
+
+from app.batch import (
+    BatchError,
+    BatchItem,
+    check_capacity,
+    content_name,
+    describe_error,
+    parse_batch,
+    render_batch,
+)
+from app.core.config import settings
+from app.core.models import URLQR, ContactQR, WifiQR
+from app.core.presets import DEFAULT_PRESET, PRESETS, Preset
+from app.qrcodegen import (
+    RenderKey,
+    contact_qr_key,
+    key_digest,
+    symbol_settings,
+    text_qr_key,
+    url_qr_key,
+    wifi_qr_key,
+)
+from app.render.executor import render_executor
+
+FORMATS = get_args(RenderKey.__annotations__["fmt"])
+# Content hashes of the last export, inside the output directory
+MANIFEST_NAME = ".qrcodegen-export.json"
+ENTRY_OPTIONS = ("type", "file", "preset", "format")
+MODELS: dict[str, type[BaseModel]] = {
+    "url": URLQR,
+    "wifi": WifiQR,
+    "contact": ContactQR,
+}
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class ExportReport(NamedTuple):
+    rendered: int
+    unchanged: int
+    removed: int
+
+
+def _model_fields(kind: str, entry: dict[str, Any]) -> dict[str, str]:
+    fields = {
+        field: value
+        for field, value in entry.items()
+        if field not in ENTRY_OPTIONS and value is not None
+    }
+    allowed = MODELS[kind].model_fields if kind in MODELS else ("text",)
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown:
+        raise ValueError(f"unknown fields for {kind}: {', '.join(unknown)}")
+    return fields
+
+
+def parse_entry(
+    entry: dict[str, Any], preset: Preset = PRESETS[DEFAULT_PRESET]
+) -> tuple[str, RenderKey]:
+    """Build the render key for one YAML manifest entry."""
+    kind = str(entry.get("type", "")).lower()
+    if kind not in ("url", "text", "wifi", "contact"):
+        raise ValueError("type must be url, text, wifi or contact")
+    if "preset" in entry:
+        if entry["preset"] not in PRESETS:
+            raise ValueError(f"unknown preset {entry['preset']!r}")
+        preset = PRESETS[entry["preset"]]
+    fields = _model_fields(kind, entry)
+    if kind == "text":
+        if not fields.get("text", "").strip():
+            raise ValueError("text is required")
+        key = text_qr_key(fields["text"], preset=preset)
+    elif kind == "url":
+        key = url_qr_key(URLQR(**fields), preset=preset)
+    elif kind == "wifi":
+        key = wifi_qr_key(WifiQR(**fields), preset=preset)
+    else:
+        key = contact_qr_key(ContactQR(**fields), preset=preset)
+    if "format" in entry:
+        if entry["format"] not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        key = key._replace(fmt=entry["format"])
+    return kind, key
+
+
+def _load_yaml(text: str) -> list:
+    try:
+        import yaml  # optional dependency, only needed for YAML manifests
+    except ImportError:
+        raise ManifestError(
+            "YAML manifests need PyYAML: pip install pyyaml, or use CSV"
+        ) from None
+    try:
+        # Every scalar stays a string, so "+34600312511" keeps its plus sign
+        entries = yaml.load(text, Loader=yaml.BaseLoader)
+    except yaml.YAMLError as exc:
+        raise ManifestError(f"invalid YAML: {exc}") from None
+    if not isinstance(entries, list):
+        raise ManifestError("a YAML manifest must be a list of entries")
+    return entries
+
+
+def parse_yaml(
+    entries: list, preset: Preset = PRESETS[DEFAULT_PRESET], fmt: str = "png"
+) -> tuple[list[BatchItem], list[BatchError]]:
+    items: list[BatchItem] = []
+    errors: list[BatchError] = []
+    names: Counter[str] = Counter()
+    for number, entry in enumerate(entries, start=1):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("entry must be a mapping")
+            if "format" not in entry:
+                entry = entry | {"format": fmt}
+            kind, key = parse_entry(entry, preset)
+            check_capacity(key)
+        except (ValidationError, ValueError) as exc:
+            errors.append(BatchError(number, describe_error(exc)))
+            continue
+        name = str(entry.get("file") or content_name(kind, key, names))
+        items.append(BatchItem(number, name, key))
+    return items, errors
+
+
+def parse_manifest(
+    path: Path, preset: Preset = PRESETS[DEFAULT_PRESET], fmt: str = "png"
+) -> tuple[list[BatchItem], list[BatchError]]:
+    """Read a YAML, CSV or text manifest into render items."""
+    text = path.read_text(encoding="utf-8-sig")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        items, errors = parse_yaml(_load_yaml(text), preset, fmt)
+    else:
+        items, errors = parse_batch(text.splitlines(), preset)
+        items = [item._replace(key=item.key._replace(fmt=fmt)) for item in items]
+    # Names become file names, so they must be unique and stay in the output
+    seen: set[str] = set()
+    valid = []
+    for item in items:
+        if item.name in seen:
+            errors.append(BatchError(item.line, f"duplicate name {item.name!r}"))
+        elif not _is_plain_name(item.name):
+            errors.append(BatchError(item.line, f"invalid name {item.name!r}"))
+        else:
+            seen.add(item.name)
+            valid.append(item)
+    return valid, sorted(errors)
+
+
+def _is_plain_name(name: str) -> bool:
+    return bool(name) and Path(name).name == name and not name.startswith(".")
+
+
+def file_name(item: BatchItem) -> str:
+    return f"{item.name}.{item.key.fmt}"
+
+
+def entry_digest(key: RenderKey) -> str:
+    # PNG bytes also depend on the rasterizer, and every format on the symbol
+    backend = settings.RENDER_RASTER_BACKEND if key.fmt == "png" else ""
+    return key_digest([*key, backend, *symbol_settings()])
+
+
+def read_manifest(path: Path) -> dict[str, str]:
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temporary = path.with_name(f"{path.name}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+async def export_directory(items: list[BatchItem], output: Path) -> ExportReport:
+    output.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(output / MANIFEST_NAME)
+    digests = {file_name(item): entry_digest(item.key) for item in items}
+    stale = [
+        item
+        for item in items
+        if previous.get(file_name(item)) != digests[file_name(item)]
+        or not (output / file_name(item)).is_file()
+    ]
+    async for item, data in render_batch(stale):
+        _write_atomic(output / file_name(item), data)
+    # Outputs of entries that left the manifest
+    removed = [
+        name for name in previous if name not in digests and _is_plain_name(name)
+    ]
+    for name in removed:
+        (output / name).unlink(missing_ok=True)
+    _write_atomic(output / MANIFEST_NAME, json.dumps(digests, indent=1).encode())
+    return ExportReport(len(stale), len(items) - len(stale), len(removed))
+
+
+def zip_manifest_path(output: Path) -> Path:
+    # Kept next to the archive so the asset pack only holds the QR codes
+    return output.with_name(f"{output.name}.manifest.json")
+
+
+async def export_zip(items: list[BatchItem], output: Path) -> ExportReport:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(zip_manifest_path(output))
+    digests = {file_name(item): entry_digest(item.key) for item in items}
+    reused: dict[str, bytes] = {}
+    if output.is_file():
+        with zipfile.ZipFile(output) as archive:
+            members = set(archive.namelist())
+            for name, digest in digests.items():
+                if name in members and previous.get(name) == digest:
+                    reused[name] = archive.read(name)
+    stale = [item for item in items if file_name(item) not in reused]
+    rendered = {file_name(item): data async for item, data in render_batch(stale)}
+
+    temporary = output.with_name(f"{output.name}.tmp")
+    # Images are already compressed, storing them keeps zipping nearly free
+    with zipfile.ZipFile(temporary, "w", compression=zipfile.ZIP_STORED) as archive:
+        for item in items:
+            name = file_name(item)
+            archive.writestr(name, reused.get(name) or rendered[name])
+    os.replace(temporary, output)
+    _write_atomic(zip_manifest_path(output), json.dumps(digests, indent=1).encode())
+    removed = [name for name in previous if name not in digests]
+    return ExportReport(len(stale), len(reused), len(removed))
+
+
+async def export(items: list[BatchItem], output: Path) -> ExportReport:
+    """Render ``items`` into ``output``, a directory or a ``.zip`` file."""
+    if output.suffix.lower() == ".zip":
+        return await export_zip(items, output)
+    return await export_directory(items, output)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", type=Path, help="YAML, CSV or text manifest")
+    parser.add_argument(
+        "--output", type=Path, required=True, help="directory or .zip file"
+    )
+    parser.add_argument("--preset", choices=PRESETS, default=DEFAULT_PRESET)
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument(
+        "--executor",
+        choices=("inline", "thread", "process"),
+        default="process",
+        help="render pool, process uses every core",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        items, errors = parse_manifest(args.manifest, PRESETS[args.preset], args.format)
+    except (OSError, ManifestError) as exc:
+        parser.error(str(exc))
+    for error in errors:
+        print(f"{args.manifest}:{error.line}: {error.message}", file=sys.stderr)
+
+    render_executor.kind = args.executor
+    # An offline export waits for a free render slot instead of timing out
+    render_executor.timeout = None
+    try:
+        report = asyncio.run(export(items, args.output))
+    finally:
+        render_executor.shutdown()
+    print(
+        f"{args.output}: {report.rendered} rendered, {report.unchanged} unchanged, "
+        f"{report.removed} removed, {len(errors)} errors"
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
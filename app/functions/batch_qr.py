@@ -0,0 +1,109 @@
+from telegram import InputMediaPhoto, Update
+from telegram.ext import ContextTypes
+
+from app.batch import BatchItem, parse_batch, render_batch, zip_batch
+from app.core.config import settings, logger
+from app.core.metrics import metrics
+from app.core.presets import preset_for, reset_state
+from app.functions.shared import BUSY_TEXT, command_options
+from app.render.executor import RENDER_BUSY_ERRORS
+
+# Telegram accepts between 2 and 10 photos per media group
+MEDIA_GROUP_LIMIT = 10
+# Larger batches get a progress message
+PROGRESS_THRESHOLD = 20
+
+BATCH_HELP = (
+    "Please send one QR code per line, or upload a CSV or text file:\n"
+    "• a URL or any text\n"
+    "• url,<url>\n"
+    "• text,<text>\n"
+    "• wifi,<ssid>,<password>\n"
+    "• contact,<name>,<surname>,<phone>,<email>,<company>,<title>,<website>"
+)
+
+
+async def _read_batch_input(update: Update) -> str | None:
+    document = update.message.document
+    if document is None:
+        return update.message.text
+    if document.file_size and document.file_size > settings.BATCH_MAX_FILE_BYTES:
+        return None
+    file = await document.get_file()
+    return (await file.download_as_bytearray()).decode("utf-8-sig", errors="replace")
+
+
+async def _send_media_group(update: Update, items: list[BatchItem]) -> None:
+    rendered = {item: data async for item, data in render_batch(items)}
+    with metrics.time("upload"):
+        if len(items) == 1:
+            await update.message.reply_photo(
+                photo=rendered[items[0]], caption="Here is your QR code!"
+            )
+            return
+        await update.message.reply_media_group(
+            media=[
+                InputMediaPhoto(media=rendered[item], filename=f"{item.name}.png")
+                for item in items
+            ],
+            caption=f"Here are your {len(items)} QR codes!",
+        )
+
+
+async def _send_batch(update: Update, items: list[BatchItem]) -> None:
+    if len(items) <= MEDIA_GROUP_LIMIT:
+        await _send_media_group(update, items)
+        return None
+
+    progress = None
+    if len(items) > PROGRESS_THRESHOLD:
+        status = await update.message.reply_text(
+            f"⏳ Rendering {len(items)} QR codes..."
+        )
+        step = max(len(items) // 10, 1)
+
+        async def progress(done: int, total: int) -> None:
+            if done % step == 0 and done < total:
+                await status.edit_text(f"⏳ Rendered {done}/{total} QR codes...")
+
+    archive = await zip_batch(items, progress)
+    with metrics.time("upload"):
+        await update.message.reply_document(
+            document=archive, caption=f"📦 Here are your {len(items)} QR codes!"
+        )
+
+
+async def batch_qr_handle_input_state(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    text = await _read_batch_input(update)
+    if text is None:
+        await update.message.reply_text(
+            f"❌ File too large. Please send at most {settings.BATCH_MAX_FILE_BYTES // 1024} KiB."
+        )
+        return None
+
+    items, errors = parse_batch(text.splitlines(), preset_for(context.user_data))
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        await update.message.reply_text(
+            f"❌ Too many rows. Please send at most {settings.BATCH_MAX_ITEMS} QR codes at once."
+        )
+        return None
+    if errors:
+        await update.message.reply_text(
+            "⚠️ Skipped invalid rows:\n"
+            + "\n".join(f"Line {error.line}: {error.message}" for error in errors[:10])
+        )
+    if not items:
+        await update.message.reply_text(BATCH_HELP)
+        return None
+
+    try:
+        await _send_batch(update, items)
+    except RENDER_BUSY_ERRORS as error:
+        # The state is kept so the same input can simply be sent again
+        logger.warning(f"🚦 Batch render rejected: {error!r}")
+        await update.message.reply_text(BUSY_TEXT)
+        return None
+    reset_state(context.user_data)
+    await command_options(update, context)
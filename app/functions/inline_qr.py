@@ -0,0 +1,92 @@
+import asyncio
+
+from pydantic import ValidationError
+from telegram import Bot, InlineQuery, InlineQueryResultCachedPhoto, Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from app.core.config import settings, logger
+from app.core.file_ids import file_id_index
+from app.core.metrics import metrics
+from app.core.models import URLQR
+from app.functions.shared import sent_file_id
+from app.qrcodegen import RenderKey, file_id_digest, generate_qr, url_qr_key
+
+# Latest inline query being answered per user
+_pending: dict[int, asyncio.Task] = {}
+
+
+async def upload_qr(bot: Bot, key: RenderKey, digest: str) -> str | None:
+    # Inline results can only show photos Telegram already has, so new QR
+    # codes are uploaded to the cache chat once and then served by file_id
+    with metrics.time("upload"):
+        message = await bot.send_photo(
+            chat_id=settings.INLINE_CACHE_CHAT_ID,
+            photo=await generate_qr(key),
+            caption=key.payload,
+            disable_notification=True,
+        )
+    file_id = sent_file_id(message, document=False)
+    if file_id is not None:
+        file_id_index.put(digest, file_id)
+    return file_id
+
+
+async def _answer_with_photo(
+    query: InlineQuery, url: str, digest: str, file_id: str | None
+) -> None:
+    results = []
+    if file_id is not None:
+        results.append(
+            InlineQueryResultCachedPhoto(
+                id=digest, photo_file_id=file_id, title=url, description=url
+            )
+        )
+    await query.answer(results, cache_time=settings.INLINE_CACHE_TIME)
+
+
+async def _answer(query: InlineQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Every keystroke sends a new query; only render once the user pauses
+    await asyncio.sleep(settings.INLINE_DEBOUNCE)
+    try:
+        with metrics.time("validate"):
+            url = URLQR(url=query.query.strip())
+    except ValidationError:
+        await query.answer([], cache_time=settings.INLINE_CACHE_TIME)
+        return None
+
+    key = url_qr_key(url)
+    digest = file_id_digest(key)
+    file_id = file_id_index.get(digest)
+    if file_id is not None:
+        try:
+            await _answer_with_photo(query, str(url.url), digest, file_id)
+            return None
+        except BadRequest:
+            logger.debug("♻️ Stale file_id, uploading the QR code again")
+            file_id_index.forget(digest)
+
+    file_id = await upload_qr(context.bot, key, digest)
+    await _answer_with_photo(query, str(url.url), digest, file_id)
+
+
+async def inline_query_handler(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    # Answered in the background: the handler returns right away, so a query
+    # that is still debouncing holds no concurrency slot and a newer keystroke
+    # always gets to run and cancel it
+    user_id = update.inline_query.from_user.id
+    previous = _pending.get(user_id)
+    if previous is not None:
+        previous.cancel()
+    task = context.application.create_task(
+        _answer(update.inline_query, context), update=update
+    )
+    _pending[user_id] = task
+
+    def forget(done: asyncio.Task) -> None:
+        if _pending.get(user_id) is done:
+            del _pending[user_id]
+
+    task.add_done_callback(forget)
@@ -1,29 +1,48 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Message, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     ContextTypes,
 )
-from app.core.config import logger
+from app.core.config import settings, logger
+from app.core.file_ids import file_id_index
+from app.core.metrics import metrics
+from app.core.presets import PRESETS, reset_state
+from app.qrcodegen import RenderKey, file_id_digest, generate_qr
+from app.render.executor import RENDER_BUSY_ERRORS
 
+BUSY_TEXT = "⏳ The bot is busy right now. Please send that again in a moment."
 
-async def command_options(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    keyboard = [
+# Built once, Telegram objects are immutable
+MENU_MARKUP = InlineKeyboardMarkup(
+    [
         [InlineKeyboardButton("📝 Text QR Code", callback_data="text_qr")],
         [InlineKeyboardButton("🔗 URL QR Code", callback_data="url_qr")],
         [InlineKeyboardButton("🔗 SVG URL QR Code", callback_data="svg_url_qr")],
         [InlineKeyboardButton("📞 Contact Info", callback_data="contact_info")],
         [InlineKeyboardButton("📶 Wi-Fi QR Code", callback_data="wifi_qr")],
+        [InlineKeyboardButton("📦 Batch QR Codes", callback_data="batch_qr")],
+        [InlineKeyboardButton("🎚️ Image Size", callback_data="presets")],
         [InlineKeyboardButton("ℹ️ About", callback_data="about")],
         [InlineKeyboardButton("🔄 Reset Command", callback_data="back")],
     ]
+)
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+PRESET_MARKUP = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton(preset.label, callback_data=f"preset:{name}")]
+        for name, preset in PRESETS.items()
+    ]
+)
 
-    await context.bot.send_message(
-        chat_id=update.effective_chat.id,
-        text="Choose an option below:",
-        reply_markup=reply_markup,
-    )
-    context.user_data.clear()
+
+async def command_options(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    with metrics.time("menu"):
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text="Choose an option below:",
+            reply_markup=MENU_MARKUP,
+        )
+    reset_state(context.user_data)
 
 
 async def handle_invalid_state(
@@ -31,3 +50,71 @@ async def handle_invalid_state(
 ) -> None:
     logger.debug("❌ Invalid state. Please try again.")
     await command_options(update, context)
+
+
+def sent_file_id(message: Message, document: bool) -> str | None:
+    if document:
+        attachment = message.document
+    else:
+        # Telegram returns several sizes, the last one is the original
+        attachment = message.photo[-1] if message.photo else None
+    file_id = getattr(attachment, "file_id", None)
+    return file_id if isinstance(file_id, str) else None
+
+
+async def _send_qr(
+    update: Update, qr_code, caption: str, document: bool, **kwargs
+) -> Message:
+    with metrics.time("upload"):
+        if document:
+            return await update.message.reply_document(
+                document=qr_code, caption=caption, **kwargs
+            )
+        return await update.message.reply_photo(
+            photo=qr_code, caption=caption, **kwargs
+        )
+
+
+async def reply_qr(update: Update, key: RenderKey, caption: str, **kwargs) -> bool:
+    # Reuse the file_id of an identical QR already uploaded to Telegram, which
+    # skips both the render and the upload. Returns False when the renderer
+    # is overloaded and the user was asked to try again.
+    document = key.fmt != "png"
+    digest = file_id_digest(key)
+    file_id = file_id_index.get(digest)
+    if file_id is not None:
+        try:
+            await _send_qr(update, file_id, caption, document, **kwargs)
+            return True
+        except BadRequest:
+            logger.debug("♻️ Stale file_id, uploading the QR code again")
+            file_id_index.forget(digest)
+
+    try:
+        qr_code = await generate_qr(key)
+    except RENDER_BUSY_ERRORS as error:
+        logger.warning(f"🚦 Render rejected: {error!r}")
+        await update.message.reply_text(BUSY_TEXT)
+        return False
+    message = await _send_qr(update, qr_code, caption, document, **kwargs)
+    file_id = sent_file_id(message, document)
+    if file_id is not None:
+        file_id_index.put(digest, file_id)
+    return True
+
+
+async def finish_with_qr(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, key: RenderKey, caption: str
+) -> None:
+    # Sends the QR code, resets the conversation and shows the menu again,
+    # on the QR message itself when MENU_WITH_RESULT saves the extra request.
+    # When the renderer is busy the state is kept so the user can resend.
+    if settings.MENU_WITH_RESULT:
+        if await reply_qr(update, key, caption=caption, reply_markup=MENU_MARKUP):
+            reset_state(context.user_data)
+        return
+    if not await reply_qr(update, key, caption=caption):
+        return
+    # Clear user data to prevent unwanted behavior
+    reset_state(context.user_data)
+    await command_options(update, context)
@@ -1,15 +1,17 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.functions.shared import command_options
-from app.qrcodegen import generate_text_qr
+from app.core.presets import preset_for
+from app.functions.shared import finish_with_qr
+from app.qrcodegen import text_qr_key
 
 
 async def text_qr_handle_text_state(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
-    qr_code = await generate_text_qr(text=update.message.text)
     # Send QR code image
-    await update.message.reply_photo(photo=qr_code, caption="Here is your QR code!")
-    # Clear user data to prevent unwanted behavior
-    context.user_data.clear()
-    await command_options(update, context)
+    await finish_with_qr(
+        update,
+        context,
+        text_qr_key(update.message.text, preset=preset_for(context.user_data)),
+        caption="Here is your QR code!",
+    )
@@ -1,21 +1,22 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from pydantic import ValidationError
+from app.core.metrics import metrics
 from app.core.models import URLQR
-from app.functions.shared import command_options
-from app.qrcodegen import generate_url_qr
+from app.core.presets import preset_for
+from app.functions.shared import finish_with_qr
+from app.qrcodegen import url_qr_key
 
 
 async def url_qr_handle_url_state(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     try:
-        qr_code = await generate_url_qr(URLQR(url=update.message.text.strip()))
+        with metrics.time("validate"):
+            url = URLQR(url=update.message.text.strip())
+        key = url_qr_key(url, preset=preset_for(context.user_data))
         # Send QR code image
-        await update.message.reply_photo(photo=qr_code, caption="Here is your QR code!")
-        # Clear user data to prevent unwanted behavior
-        context.user_data.clear()
-        await command_options(update, context)
+        await finish_with_qr(update, context, key, caption="Here is your QR code!")
     except ValidationError:
         await update.message.reply_text(
             "❌ Invalid URL. Please send a valid URL starting with 'http://' or 'https://'."
@@ -26,16 +27,11 @@ async def svg_url_qr_handle_url_state(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     try:
-        qr_code = await generate_url_qr(
-            URLQR(url=update.message.text.strip()), svg=True
-        )
+        with metrics.time("validate"):
+            url = URLQR(url=update.message.text.strip())
+        key = url_qr_key(url, svg=True, preset=preset_for(context.user_data))
         # Send QR code image
-        await update.message.reply_document(
-            document=qr_code, caption="Here is your QR code!"
-        )
-        # Clear user data to prevent unwanted behavior
-        context.user_data.clear()
-        await command_options(update, context)
+        await finish_with_qr(update, context, key, caption="Here is your QR code!")
     except ValidationError:
         await update.message.reply_text(
             "❌ Invalid URL. Please send a valid URL starting with 'http://' or 'https://'."
@@ -2,8 +2,10 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from pydantic import ValidationError
 
-from app.functions.shared import command_options
-from app.qrcodegen import generate_contact_qr
+from app.core.metrics import metrics
+from app.core.presets import preset_for
+from app.functions.shared import finish_with_qr
+from app.qrcodegen import contact_qr_key
 from app.core.models import (
     UserState,
     EmailModel,
@@ -39,7 +41,8 @@ async def vcard_qr_handle_email_state(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     try:
-        email = EmailModel(email=update.message.text)  # Validation using Pydantic
+        with metrics.time("validate"):
+            email = EmailModel(email=update.message.text)  # Validation using Pydantic
         context.user_data["email"] = email.email
         context.user_data["state"] = UserState.VCARD_AWAITING_COMPANY
         await update.message.reply_text("Please send the company name:")
@@ -69,8 +72,8 @@ async def vcard_qr_handle_website_state(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     try:
-        qr_code = await generate_contact_qr(
-            ContactQR(
+        with metrics.time("validate"):
+            contact = ContactQR(
                 name=context.user_data["name"],
                 surname=context.user_data["surname"],
                 phone_number=context.user_data["phone_number"],
@@ -79,15 +82,11 @@ async def vcard_qr_handle_website_state(
                 title=context.user_data["title"],
                 url=update.message.text.strip(),
             )
-        )
+        key = contact_qr_key(contact, preset=preset_for(context.user_data))
     except ValidationError:
         await update.message.reply_text(
             "❌ Invalid URL. Please send a valid URL starting with 'http://' or 'https://'."
         )
         return None
 
-    await update.message.reply_photo(
-        photo=qr_code, caption="📇 Scan to read de vcard 📞"
-    )
-    context.user_data.clear()
-    await command_options(update, context)
+    await finish_with_qr(update, context, key, caption="📇 Scan to read de vcard 📞")
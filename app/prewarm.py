@@ -0,0 +1,32 @@
+import time
+from typing import Iterable
+
+from app.batch import parse_batch, render_batch
+from app.core import config
+from app.core.config import logger
+from app.core.models import validate_email
+from app.render.templates import version_template
+
+# Versions up to 10 cover URLs, Wi-Fi networks and typical vCards
+PREWARM_VERSIONS = range(1, 11)
+
+
+async def prewarm(payloads: Iterable[str] = ()) -> None:
+    """Pay one-off startup costs before the first update arrives.
+
+    Configures Logfire, imports the modules loaded on first use, builds the
+    templates of common versions and renders ``payloads`` (rows in the batch
+    format) into the render cache, which also starts the render workers.
+    """
+    start = time.perf_counter()
+    config.logfire
+    validate_email("prewarm@example.com")
+    for version in PREWARM_VERSIONS:
+        version_template(version)
+    items, errors = parse_batch(payloads)
+    for error in errors:
+        logger.warning(f"⚠️ Skipping prewarm payload {error.line}: {error.message}")
+    async for _ in render_batch(items):
+        pass
+    elapsed = time.perf_counter() - start
+    logger.info(f"🔥 Prewarmed {len(items)} QR codes in {elapsed:.2f}s")
@@ -1,66 +1,203 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
 from io import BytesIO
+from typing import Iterable, Literal, NamedTuple
 import qrcode
-import qrcode.image.svg
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.core.models import ContactQR, WifiQR, URLQR
+from app.core.presets import DEFAULT_PRESET, PRESETS, Preset
+from app.render.cache import render_cache
+from app.render.encoders import encode_png, encode_svg
+from app.render.executor import render_executor
+from app.render.matrix import MICRO_QUIET_ZONE, QRMatrix, cached_matrix, matrix_cache
 
 
-async def generate_text_qr(text: str) -> BytesIO:
-    # Create a QR code instance
-    qr = qrcode.QRCode(
-        version=1,  # controls the size of the QR Code
-        error_correction=qrcode.constants.ERROR_CORRECT_L,  # level of error correction
-        box_size=10,  # size of each box in pixels
-        border=4,  # thickness of the border
-    )
-    # Add the URL data
-    qr.add_data(text)
-    qr.make(fit=True)
-    qr = qr.make_image(fill="black", back_color="white")
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    buffer.seek(0)
+class RenderKey(NamedTuple):
+    # Everything that determines the encoded image, used as the cache key
+    payload: str
+    error_correction: int
+    box_size: int = 10
+    border: int = 4
+    fmt: Literal["png", "svg", "svgz"] = "png"
 
-    return buffer
 
+def key_digest(values: Iterable) -> str:
+    """Stable, opaque digest of a render key or other JSON-able values."""
+    return hashlib.sha256(
+        json.dumps(list(values), ensure_ascii=False).encode()
+    ).hexdigest()
 
-async def generate_url_qr(url: URLQR, svg: bool = False) -> BytesIO:
-    # Create a QR code instance
-    qr = qrcode.QRCode(
-        version=1,  # controls the size of the QR Code
-        error_correction=qrcode.constants.ERROR_CORRECT_L,  # level of error correction
-        box_size=10,  # size of each box in pixels
-        border=4,  # thickness of the border
+
+def symbol_settings() -> list:
+    # Settings that change the symbol drawn for the same render key
+    return [settings.QR_MICRO, settings.QR_FAST_MASK, settings.QR_OPTIMAL_SEGMENTS]
+
+
+def file_id_digest(key: RenderKey) -> str:
+    """Digest naming the uploaded image of ``key`` in the file_id index.
+
+    An HMAC keyed on the bot token, so a leaked index can't be checked
+    against guessed payloads (Wi-Fi passwords) without the token as well.
+    """
+    secret = hashlib.sha256(f"file-ids:{settings.TELEGRAM_TOKEN}".encode()).digest()
+    values = json.dumps([*key, *symbol_settings()], ensure_ascii=False)
+    return hmac.new(secret, values.encode(), hashlib.sha256).hexdigest()
+
+
+# Renders currently running, so concurrent requests for the same key share one
+_inflight: dict[RenderKey, asyncio.Future] = {}
+
+
+def encode(matrix: QRMatrix, key: RenderKey) -> bytes:
+    border = min(key.border, MICRO_QUIET_ZONE) if matrix.micro else key.border
+    if key.fmt in ("svg", "svgz"):
+        return encode_svg(matrix, key.box_size, border, compress=key.fmt == "svgz")
+    return encode_png(
+        matrix, key.box_size, border, backend=settings.RENDER_RASTER_BACKEND
     )
-    # Add the URL data
-    qr.add_data(url.url)
-    qr.make(fit=True)
-    buffer = BytesIO()
-    if svg:
-        qr = qr.make_image(image_factory=qrcode.image.svg.SvgImage)
-        qr.save(buffer)
-        buffer.name = "url_qr.svg"
+
+
+def render_timed(key: RenderKey) -> tuple[bytes, dict[str, float]]:
+    # Runs inside the render executor, so it must stay a picklable
+    # module-level function returning plain data. Stage timings travel back
+    # with the image since process workers can't reach the parent's metrics.
+    start = time.perf_counter()
+    # The matrix only depends on the payload and error correction, so every
+    # format and size of the same payload shares it
+    matrix = cached_matrix(key.payload, key.error_correction)
+    built = time.perf_counter()
+    data = encode(matrix, key)
+    timings = {"matrix": built - start, "encode": time.perf_counter() - built}
+    return data, timings
+
+
+def render_qr(key: RenderKey) -> bytes:
+    return render_timed(key)[0]
+
+
+async def render_cached(key: RenderKey) -> bytes:
+    data = render_cache.get(key)
+    if data is not None:
+        return data
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # The caller that started the render was cancelled, not this one
+            if inflight.cancelled() and not asyncio.current_task().cancelling():
+                return await render_cached(key)
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        data, timings = await render_executor.submit(render_timed, key)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()  # mark as retrieved when nobody else is waiting
+        raise
     else:
-        qr = qr.make_image(fill="black", back_color="white")
-        qr.save(buffer, format="PNG")
-    buffer.seek(0)
+        for stage, seconds in timings.items():
+            metrics.observe(stage, seconds)
+        render_cache.put(key, data)
+        future.set_result(data)
+        return data
+    finally:
+        del _inflight[key]
+
 
+async def generate_qr(key: RenderKey) -> BytesIO:
+    # A fresh buffer per caller over the shared, immutable cached bytes
+    buffer = BytesIO(await render_cached(key))
+    if key.fmt != "png":
+        buffer.name = f"url_qr.{key.fmt}"
     return buffer
 
 
+def wifi_payload(wifi: WifiQR) -> str:
+    return f"WIFI:T:WPA;S:{wifi.ssid};P:{wifi.password};;"
+
+
+def vcard_payload(contact: ContactQR) -> str:
+    return f"BEGIN:VCARD\nVERSION:3.0\nN:{contact.surname};{contact.name};;;\nTEL;CELL:{contact.phone_number}\nEMAIL:{contact.email}\nORG:{contact.company}\nTITLE:{contact.title}\nURL:{contact.url}\nEND:VCARD"
+
+
+def _cache_samples() -> dict[str, float]:
+    samples = {}
+    for name, cache in (("render", render_cache), ("matrix", matrix_cache)):
+        stats = cache.stats()
+        samples |= {
+            f"qrcodegen_{name}_cache_hits_total": stats["hits"],
+            f"qrcodegen_{name}_cache_misses_total": stats["misses"],
+            f"qrcodegen_{name}_cache_evictions_total": stats["evictions"],
+            f"qrcodegen_{name}_cache_entries": stats["entries"],
+            f"qrcodegen_{name}_cache_bytes": stats["bytes"],
+        }
+    return samples
+
+
+metrics.add_collector(_cache_samples)
+
+
+def preset_key(
+    payload: str, error_correction: int, preset: Preset, fmt: str = "png"
+) -> RenderKey:
+    # Presets only change render parameters, so every variant of a payload
+    # lives in the same cache key space and shares its matrix
+    return RenderKey(
+        payload,
+        (
+            preset.error_correction
+            if preset.error_correction is not None
+            else error_correction
+        ),
+        box_size=preset.box_size,
+        border=preset.border,
+        fmt=fmt,
+    )
+
+
+def text_qr_key(text: str, preset: Preset = PRESETS[DEFAULT_PRESET]) -> RenderKey:
+    return preset_key(text, qrcode.constants.ERROR_CORRECT_L, preset)
+
+
+def url_qr_key(
+    url: URLQR, svg: bool = False, preset: Preset = PRESETS[DEFAULT_PRESET]
+) -> RenderKey:
+    fmt = ("svgz" if settings.SVG_GZIP else "svg") if svg else "png"
+    return preset_key(str(url.url), qrcode.constants.ERROR_CORRECT_L, preset, fmt=fmt)
+
+
+def wifi_qr_key(wifi: WifiQR, preset: Preset = PRESETS[DEFAULT_PRESET]) -> RenderKey:
+    return preset_key(wifi_payload(wifi), qrcode.constants.ERROR_CORRECT_M, preset)
+
+
+def contact_qr_key(
+    contact: ContactQR, preset: Preset = PRESETS[DEFAULT_PRESET]
+) -> RenderKey:
+    return preset_key(vcard_payload(contact), qrcode.constants.ERROR_CORRECT_M, preset)
+
+
+async def generate_text_qr(text: str) -> BytesIO:
+    return await generate_qr(text_qr_key(text))
+
+
+async def generate_url_qr(url: URLQR, svg: bool = False) -> BytesIO:
+    return await generate_qr(url_qr_key(url, svg=svg))
+
+
 # Wi-Fi QR Code Generator
 async def generate_wifi_qr(wifi: WifiQR) -> BytesIO:
-    wifi_data = f"WIFI:T:WPA;S:{wifi.ssid};P:{wifi.password};;"
-    qr = qrcode.make(wifi_data)
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer
+    return await generate_qr(wifi_qr_key(wifi))
 
 
 async def generate_contact_qr(contact: ContactQR) -> BytesIO:
-    vcard = f"BEGIN:VCARD\nVERSION:3.0\nN:{contact.surname};{contact.name};;;\nTEL;CELL:{contact.phone_number}\nEMAIL:{contact.email}\nORG:{contact.company}\nTITLE:{contact.title}\nURL:{contact.url}\nEND:VCARD"
-    qr = qrcode.make(vcard)
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer
+    return await generate_qr(contact_qr_key(contact))
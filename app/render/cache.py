@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from app.core.config import settings
+
+
+class RenderCache:
+    """Content-addressed LRU cache of encoded QR images.
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` is exceeded, and expire after ``ttl`` seconds when set.
+    A ``max_bytes`` of ``0`` disables caching.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_entries: int = 1024,
+        ttl: float | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[bytes, float]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            data, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def weigh(self, data: bytes) -> int:
+        return len(data)
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        if self.weigh(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (data, time.monotonic())
+            self._size += self.weigh(data)
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        data, _ = self._entries.pop(key)
+        self._size -= self.weigh(data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+
+render_cache = RenderCache(
+    max_bytes=settings.RENDER_CACHE_MAX_BYTES,
+    max_entries=settings.RENDER_CACHE_MAX_ENTRIES,
+    ttl=settings.RENDER_CACHE_TTL,
+)
@@ -0,0 +1,80 @@
+from io import BytesIO
+from typing import Literal
+
+import numpy as np
+from qrcode.image.base import BaseImage
+from qrcode.image.pil import PilImage
+
+from app.render.matrix import QRMatrix
+from app.render.png import write_png
+from app.render.raster import rasterize
+from app.render.svg import write_svg
+
+# Terminal cells by (top, bottom) half, lit when True
+HALF_BLOCKS = (" ", "▄", "▀", "█")
+
+
+def make_image(
+    matrix: QRMatrix,
+    image_factory: type[BaseImage],
+    box_size: int,
+    border: int,
+    **kwargs
+) -> BaseImage:
+    # Same steps as QRCode.make_image, from an already built matrix
+    modules = matrix.to_modules()
+    image = image_factory(
+        border, matrix.size, box_size, qrcode_modules=modules, **kwargs
+    )
+    if image.needs_drawrect:
+        for row, line in enumerate(modules):
+            for col, dark in enumerate(line):
+                if dark:
+                    image.drawrect(row, col)
+    if image.needs_processing:
+        image.process()
+    return image
+
+
+def encode_png(
+    matrix: QRMatrix,
+    box_size: int = 10,
+    border: int = 4,
+    backend: Literal["pil", "numpy", "stream"] = "numpy",
+) -> bytes:
+    buffer = BytesIO()
+    if backend == "stream":
+        # Never holds the whole image, only the compressed output
+        write_png(matrix.to_array(border), box_size, buffer)
+    elif backend == "numpy":
+        # Straight from the packed matrix, no nested module lists
+        rasterize(matrix.to_array(border), box_size).save(buffer, format="PNG")
+    else:
+        image = make_image(
+            matrix, PilImage, box_size, border, fill_color="black", back_color="white"
+        )
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def encode_svg(
+    matrix: QRMatrix, box_size: int = 10, border: int = 4, compress: bool = False
+) -> bytes:
+    buffer = BytesIO()
+    write_svg(matrix.to_array(border), box_size, buffer, compress=compress)
+    return buffer.getvalue()
+
+
+def encode_terminal(matrix: QRMatrix, border: int = 2, invert: bool = False) -> str:
+    # Two module rows per line with half blocks. Light modules are drawn by
+    # default, which reads correctly on dark terminal backgrounds.
+    lit = matrix.to_array(border) ^ (not invert)
+    if lit.shape[0] % 2:
+        lit = np.vstack([lit, np.full((1, lit.shape[1]), not invert)])
+    cells = lit[0::2] * 2 + lit[1::2]
+    return "\n".join("".join(HALF_BLOCKS[cell] for cell in row) for row in cells)
+
+
+def encode_bits(matrix: QRMatrix) -> bytes:
+    # Raw bit-packed modules, row-major and MSB first, without quiet zone
+    return matrix.bits
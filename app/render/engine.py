@@ -0,0 +1,207 @@
+from bisect import bisect_left
+
+import numpy as np
+import qrcode
+from qrcode import exceptions, util
+
+from app.render.templates import version_template
+
+# Versions sharing the same character count field sizes
+VERSION_CLASSES = ((1, 9), (10, 26), (27, 40))
+# Finder-like 1:1:3:1:1 patterns with 4 light modules on either side
+FINDER_PATTERNS = (0b10111010000, 0b00001011101)
+MODES = (util.MODE_NUMBER, util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE)
+# Bits per character in sixths, so digits (10 bits per 3) and alphanumeric
+# characters (11 bits per 2) cost whole numbers
+CHAR_COSTS = {util.MODE_NUMBER: 20, util.MODE_ALPHA_NUM: 33, util.MODE_8BIT_BYTE: 48}
+CHARSETS = {
+    util.MODE_NUMBER: frozenset(b"0123456789"),
+    util.MODE_ALPHA_NUM: frozenset(util.ALPHA_NUM),
+    util.MODE_8BIT_BYTE: frozenset(range(256)),
+}
+
+
+def data_bits(mode: int, length: int) -> int | None:
+    # Encoded size of one segment, without the mode and length headers
+    if mode == util.MODE_NUMBER:
+        return 10 * (length // 3) + (0, 4, 7)[length % 3]
+    if mode == util.MODE_ALPHA_NUM:
+        return 11 * (length // 2) + 6 * (length % 2)
+    if mode == util.MODE_8BIT_BYTE:
+        return 8 * length
+    return None
+
+
+def minimal_version(
+    data_list: list[util.QRData], error_correction: int, start: int = 1
+) -> int:
+    """Smallest version from ``start`` whose capacity fits ``data_list``.
+
+    The bit length is computed arithmetically per segment instead of writing
+    the data into a bit buffer, then looked up in the capacity table once per
+    class of versions sharing the same length field sizes.
+    """
+    limits = util.BIT_LIMIT_TABLE[error_correction]
+    for first, last in VERSION_CLASSES:
+        if last < start:
+            continue
+        sizes = util.mode_sizes_for_version(first)
+        needed = 0
+        for data in data_list:
+            bits = data_bits(data.mode, len(data))
+            if bits is None:
+                raise ValueError(f"Unsupported mode ({data.mode})")
+            needed += 4 + sizes[data.mode] + bits
+        version = bisect_left(limits, needed, max(start, first), last + 1)
+        if version <= last:
+            return version
+    raise exceptions.DataOverflowError()
+
+
+def optimal_segments(data: bytes, version: int = 1) -> list[util.QRData]:
+    """Split ``data`` into the numeric, alphanumeric and byte segments that
+    take the fewest bits at ``version``.
+
+    ``cost[mode]`` is the cheapest encoding, in sixths of a bit, of the data
+    so far whose last character is in a ``mode`` segment. A character either
+    extends that segment or starts a new one after the cheapest segment of
+    another mode, rounded up to whole bits. The count field never overflows:
+    every version holds fewer characters than its count field can express.
+    """
+    if not data:
+        return []
+    sizes = util.mode_sizes_for_version(version)
+    headers = {mode: 6 * (4 + sizes[mode]) for mode in MODES}
+    cost: dict[int, int] = {}  # only modes that can hold the last character
+    # previous[i][mode]: mode of character i - 1 on the cheapest path
+    previous: list[dict[int, int | None]] = []
+    for char in data:
+        rounded = {mode: -(-bits // 6) * 6 for mode, bits in cost.items()}
+        step: dict[int, int] = {}
+        links: dict[int, int | None] = {}
+        for mode in MODES:
+            if char not in CHARSETS[mode]:
+                continue
+            options = [
+                (bits + headers[mode], other)
+                for other, bits in rounded.items()
+                if other != mode
+            ]
+            if mode in cost:
+                options.append((cost[mode], mode))
+            best, links[mode] = min(options, default=(headers[mode], None))
+            step[mode] = best + CHAR_COSTS[mode]
+        cost = step
+        previous.append(links)
+
+    mode = min(cost, key=lambda mode: -(-cost[mode] // 6))
+    segments: list[util.QRData] = []
+    end = len(data)
+    for index in range(len(data) - 1, -1, -1):
+        link = previous[index][mode]
+        if link != mode:
+            segments.append(util.QRData(data[index:end], mode, check_data=False))
+            end = index
+            mode = link
+    return segments[::-1]
+
+
+def _run_penalty(modules: np.ndarray) -> int:
+    # Rule 1: runs of five or more same-colored modules in a row
+    rows, width = modules.shape
+    changes = np.ones((rows, width + 1), dtype=bool)
+    changes[:, 1:-1] = modules[:, 1:] != modules[:, :-1]
+    # Row ends and the next row starts are adjacent, yielding harmless 1s
+    lengths = np.diff(np.flatnonzero(changes))
+    lengths = lengths[lengths >= 5]
+    return int((lengths - 2).sum())
+
+
+def _finder_penalty(modules: np.ndarray) -> int:
+    # Rule 3: each 11 module window as an integer, MSB first
+    width = modules.shape[1]
+    if width < 11:
+        return 0
+    codes = np.zeros((modules.shape[0], width - 10), dtype=np.int32)
+    for offset in range(11):
+        codes = (codes << 1) | modules[:, offset : width - 10 + offset]
+    return 40 * int(sum((codes == pattern).sum() for pattern in FINDER_PATTERNS))
+
+
+def lost_point(modules: np.ndarray) -> int:
+    """Mask penalty score, equal to :func:`qrcode.util.lost_point`."""
+    size = modules.shape[0]
+    penalty = _run_penalty(modules) + _run_penalty(modules.T)
+    # Rule 2: 2x2 blocks of the same color
+    top, bottom = modules[:-1], modules[1:]
+    blocks = (
+        (top[:, :-1] == top[:, 1:])
+        & (top[:, 1:] == bottom[:, :-1])
+        & (bottom[:, :-1] == bottom[:, 1:])
+    )
+    penalty += 3 * int(blocks.sum())
+    penalty += _finder_penalty(modules) + _finder_penalty(modules.T)
+    # Rule 4: every 5% the dark ratio departs from 50%
+    percent = float(modules.sum()) / (size**2)
+    return penalty + int(abs(percent * 100 - 50) / 5) * 10
+
+
+class FastQRCode(qrcode.QRCode):
+    """``QRCode`` with arithmetic version fitting and NumPy mask scoring.
+
+    Produces the same symbols as ``QRCode``. Symbols are laid out over the
+    shared :func:`version_template` of their version, so a render only
+    writes the data codewords, the mask and the format information. The
+    last symbol made is also kept as a boolean array in ``array``. A fixed
+    ``mask_pattern`` skips mask scoring altogether for latency-critical
+    paths. With ``optimal_segments`` the data is re-split into the
+    segments that take the fewest bits for each class of versions, which
+    can fit a smaller version than ``QRCode``'s run-length heuristic.
+    """
+
+    array: np.ndarray | None = None
+
+    def __init__(self, *args, optimal_segments: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.optimal_segments = optimal_segments
+
+    def best_fit(self, start=None):
+        start = start or 1
+        data = b"".join(segment.data for segment in self.data_list)
+        if not (self.optimal_segments and data):
+            self.version = minimal_version(self.data_list, self.error_correction, start)
+            return self.version
+        for first, last in VERSION_CLASSES:
+            if last < start:
+                continue
+            segments = optimal_segments(data, first)
+            try:
+                version = minimal_version(
+                    segments, self.error_correction, max(start, first)
+                )
+            except exceptions.DataOverflowError:
+                continue
+            if version <= last:
+                self.data_list = segments
+                self.data_cache = None
+                self.version = version
+                return version
+        raise exceptions.DataOverflowError()
+
+    def symbol(self, mask_pattern: int, test: bool = False) -> np.ndarray:
+        if self.data_cache is None:
+            self.data_cache = util.create_data(
+                self.version, self.error_correction, self.data_list
+            )
+        return version_template(self.version).place(
+            self.data_cache, self.error_correction, mask_pattern, test
+        )
+
+    def makeImpl(self, test, mask_pattern):
+        self.modules_count = self.version * 4 + 17
+        self.array = self.symbol(mask_pattern, test)
+        self.modules = self.array.tolist()
+
+    def best_mask_pattern(self):
+        scores = [lost_point(self.symbol(pattern, True)) for pattern in range(8)]
+        return scores.index(min(scores))  # first lowest, as qrcode does
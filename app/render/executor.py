@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Literal
+
+from app.core.config import settings, logger
+
+ExecutorKind = Literal["inline", "thread", "process"]
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when no render slot frees up before the job timeout."""
+
+
+class RenderTimeout(TimeoutError):
+    """Raised when a render job does not finish before its timeout."""
+
+
+# Errors the user can recover from by sending the same request again
+RENDER_BUSY_ERRORS = (RenderQueueFull, RenderTimeout, BrokenProcessPool)
+
+
+class RenderExecutor:
+    """Dispatches blocking render jobs off the event loop.
+
+    ``inline`` runs jobs on the calling thread (useful for tests and
+    debugging), ``thread`` uses a thread pool and ``process`` a process pool,
+    so renders scale across cores. At most ``max_workers + max_queue`` jobs
+    are in flight; further submitters wait for a free slot (backpressure).
+    """
+
+    def __init__(
+        self,
+        kind: ExecutorKind = "thread",
+        max_workers: int | None = None,
+        max_queue: int = 64,
+        timeout: float | None = 10.0,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="render"
+                )
+        return self._pool
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they first wait on, keep one per loop
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.capacity)
+            self._slots_loop = loop
+        return self._slots
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.kind == "inline":
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.timeout)
+        except TimeoutError:
+            raise RenderQueueFull(
+                f"No render slot available within {self.timeout}s"
+            ) from None
+
+        pool = self._get_pool()
+        try:
+            future: Future = pool.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        # The slot is held until the job really finishes, even after a timeout,
+        # so the bound on in-flight work stays honest.
+        def release_slot(_: Future) -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(slots.release)
+
+        future.add_done_callback(release_slot)
+
+        remaining = None if deadline is None else max(deadline - loop.time(), 0)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=remaining
+            )
+        except TimeoutError:
+            future.cancel()
+            raise RenderTimeout(f"Render job exceeded {self.timeout}s") from None
+        except BrokenProcessPool:
+            # Concurrent jobs of the same pool all fail, recreate it only once
+            if self._pool is pool:
+                logger.warning("♻️ Render process pool broke, recreating it")
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+render_executor = RenderExecutor(
+    kind=settings.RENDER_EXECUTOR,
+    max_workers=settings.RENDER_MAX_WORKERS,
+    max_queue=settings.RENDER_MAX_QUEUE,
+    timeout=settings.RENDER_TIMEOUT,
+)
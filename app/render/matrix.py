@@ -0,0 +1,138 @@
+import functools
+from types import ModuleType
+from typing import NamedTuple
+
+import numpy as np
+import qrcode
+
+from app.core.config import settings, logger
+from app.render.cache import RenderCache
+from app.render.engine import FastQRCode
+
+
+class QRMatrix(NamedTuple):
+    """Bit-packed QR module matrix, without the quiet zone.
+
+    Modules are stored row-major, dark as ``1``, eight per byte (MSB first),
+    so a version 40 symbol takes under 4 KiB. It is immutable, hashable and
+    picklable, and independent of the output format and size.
+    """
+
+    size: int  # modules per side
+    bits: bytes
+
+    @classmethod
+    def from_modules(cls, modules: list[list[bool | None]] | np.ndarray) -> "QRMatrix":
+        array = np.asarray(modules, dtype=bool)
+        return cls(array.shape[0], np.packbits(array).tobytes())
+
+    @property
+    def version(self) -> int:
+        return (self.size - 17) // 4
+
+    @property
+    def micro(self) -> bool:
+        # Micro QR symbols are 11 to 17 modules, regular ones 21 or more
+        return self.size < 21
+
+    def to_array(self, border: int = 0) -> np.ndarray:
+        # Boolean matrix (True = dark), padded with ``border`` light modules
+        array = np.unpackbits(
+            np.frombuffer(self.bits, dtype=np.uint8), count=self.size * self.size
+        )
+        return np.pad(array.reshape(self.size, self.size).astype(bool), border)
+
+    def to_modules(self) -> list[list[bool]]:
+        # The nested lists qrcode image factories expect
+        return self.to_array().tolist()
+
+
+# Longest payload a Micro QR holds (M4-L, digits only)
+MICRO_MAX_LENGTH = 35
+# Quiet zone the Micro QR spec requires, half of a regular symbol's
+MICRO_QUIET_ZONE = 2
+# Micro QR has no H level, and Q only on M4
+MICRO_ERROR_LEVELS = {
+    qrcode.constants.ERROR_CORRECT_L: "L",
+    qrcode.constants.ERROR_CORRECT_M: "M",
+    qrcode.constants.ERROR_CORRECT_Q: "Q",
+}
+
+
+@functools.cache
+def _segno() -> ModuleType | None:
+    try:
+        import segno  # optional dependency, only needed for Micro QR
+    except ImportError:
+        logger.warning(
+            "⚠️ QR_MICRO needs segno (pip install segno), using regular QR codes"
+        )
+        return None
+    return segno
+
+
+def build_micro_matrix(payload: str, error_correction: int) -> QRMatrix | None:
+    """Smallest Micro QR (M1 to M4) holding ``payload``, or None."""
+    level = MICRO_ERROR_LEVELS.get(error_correction)
+    if level is None or len(payload) > MICRO_MAX_LENGTH:
+        return None
+    segno = _segno()
+    if segno is None:
+        return None
+    try:
+        qr = segno.make_micro(payload, error=level)
+    except ValueError:  # segno.DataOverflowError, the payload does not fit
+        return None
+    return QRMatrix.from_modules([list(row) for row in qr.matrix])
+
+
+def build_matrix(payload: str, error_correction: int) -> QRMatrix:
+    # Data encoding, Reed-Solomon and mask selection: the expensive part
+    if settings.QR_MICRO:
+        matrix = build_micro_matrix(payload, error_correction)
+        if matrix is not None:
+            return matrix
+    qr = FastQRCode(
+        error_correction=error_correction,
+        mask_pattern=settings.QR_FAST_MASK,
+        optimal_segments=settings.QR_OPTIMAL_SEGMENTS,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)  # smallest version that fits the data
+    return QRMatrix.from_modules(qr.array)
+
+
+def fits(payload: str, error_correction: int) -> bool:
+    """Whether ``payload`` fits a QR symbol, without building one."""
+    qr = FastQRCode(
+        error_correction=error_correction,
+        optimal_segments=settings.QR_OPTIMAL_SEGMENTS,
+    )
+    qr.add_data(payload)
+    try:
+        qr.best_fit()
+    except qrcode.exceptions.DataOverflowError:
+        return False
+    return True
+
+
+class MatrixCache(RenderCache):
+    """LRU cache of :class:`QRMatrix` keyed by ``(payload, error_correction)``."""
+
+    def weigh(self, matrix: QRMatrix) -> int:
+        return len(matrix.bits)
+
+
+def cached_matrix(payload: str, error_correction: int) -> QRMatrix:
+    key = payload, error_correction
+    matrix = matrix_cache.get(key)
+    if matrix is None:
+        matrix = build_matrix(payload, error_correction)
+        matrix_cache.put(key, matrix)
+    return matrix
+
+
+matrix_cache = MatrixCache(
+    max_bytes=settings.MATRIX_CACHE_MAX_BYTES,
+    max_entries=settings.MATRIX_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,62 @@
+import struct
+import zlib
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IDAT_CHUNK_SIZE = 64 * 1024
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)))
+    )
+
+
+def iter_png(
+    matrix: np.ndarray,
+    box_size: int,
+    chunk_size: int = IDAT_CHUNK_SIZE,
+    level: int = 6,
+) -> Iterator[bytes]:
+    """Encode ``matrix`` (quiet zone included) as a 1-bit PNG, piece by piece.
+
+    Scanlines are produced one module row at a time and fed through zlib,
+    and compressed data is emitted as ``IDAT`` chunks of about
+    ``chunk_size`` bytes. Only one row of pixels and one chunk are held in
+    memory, whatever the version and box size.
+    """
+    height, width = matrix.shape[0] * box_size, matrix.shape[1] * box_size
+    yield PNG_SIGNATURE
+    # 1-bit grayscale, no interlacing
+    yield png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 1, 0, 0, 0, 0))
+    compressor = zlib.compressobj(level)
+    pending = bytearray()
+    for row in matrix:
+        # Pixels MSB first with light modules as 1. The first scanline of a
+        # module row is stored as is (filter 0), the repeats as all-zero
+        # differences from the line above (filter 2, "Up"), which deflate
+        # compresses far better than repeated pixel data.
+        pixels = np.packbits(np.repeat(~row, box_size)).tobytes()
+        repeat = b"\x02" + bytes(len(pixels))
+        pending += compressor.compress(b"\x00" + pixels + repeat * (box_size - 1))
+        if len(pending) >= chunk_size:
+            yield png_chunk(b"IDAT", bytes(pending))
+            pending.clear()
+    pending += compressor.flush()
+    yield png_chunk(b"IDAT", bytes(pending))
+    yield png_chunk(b"IEND", b"")
+
+
+def write_png(
+    matrix: np.ndarray,
+    box_size: int,
+    out: BinaryIO,
+    chunk_size: int = IDAT_CHUNK_SIZE,
+) -> None:
+    for piece in iter_png(matrix, box_size, chunk_size):
+        out.write(piece)
@@ -0,0 +1,17 @@
+import numpy as np
+from PIL import Image
+
+
+def module_array(modules: list[list[bool | None]], border: int) -> np.ndarray:
+    # Boolean module matrix (True = dark) including the quiet zone
+    return np.pad(np.asarray(modules, dtype=bool), border)
+
+
+def rasterize(matrix: np.ndarray, box_size: int) -> Image.Image:
+    # PIL's 1-bit mode stores light pixels as 1, packed MSB first per row.
+    # Scale each module row horizontally and pack it once, then repeat the
+    # packed rows vertically instead of drawing one rectangle per module.
+    rows = np.packbits(np.repeat(~matrix, box_size, axis=1), axis=1)
+    pixels = np.repeat(rows, box_size, axis=0)
+    size = matrix.shape[1] * box_size, matrix.shape[0] * box_size
+    return Image.frombytes("1", size, pixels.tobytes())
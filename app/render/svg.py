@@ -0,0 +1,51 @@
+import gzip
+from typing import BinaryIO
+
+import numpy as np
+
+
+def dark_runs(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Rows, start columns and lengths of every horizontal run of dark modules.
+    # A light column on both sides keeps runs from spanning two rows.
+    padded = np.pad(matrix, ((0, 0), (1, 1))).astype(np.int8)
+    edges = np.diff(padded.ravel())
+    width = padded.shape[1]
+    starts = np.flatnonzero(edges == 1) + 1
+    ends = np.flatnonzero(edges == -1) + 1
+    return starts // width, starts % width - 1, ends - starts
+
+
+def write_svg(
+    matrix: np.ndarray, box_size: int, out: BinaryIO, compress: bool = False
+) -> None:
+    """Stream ``matrix`` (quiet zone included) into ``out`` as one SVG path.
+
+    Every horizontal run of dark modules becomes a single ``h``/``v`` subpath
+    in module units, scaled by the ``viewBox``. With ``compress`` the output
+    is gzipped (``.svgz``).
+    """
+    if compress:
+        # mtime=0 keeps the output deterministic for the render cache
+        with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+            write_svg(matrix, box_size, gz)
+        return
+
+    size = matrix.shape[0]
+    # Same physical size as qrcode's SvgImage: box_size / 10 mm per module
+    dimension = f"{size * box_size / 10:g}mm"
+    out.write(
+        (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{dimension}" '
+            f'height="{dimension}" viewBox="0 0 {size} {size}" '
+            'shape-rendering="crispEdges"><path fill="#000" d="'
+        ).encode()
+    )
+    rows, columns, lengths = dark_runs(matrix)
+    out.write(
+        "".join(
+            f"M{x} {y}h{n}v1h-{n}z"
+            for y, x, n in zip(rows.tolist(), columns.tolist(), lengths.tolist())
+        ).encode()
+    )
+    out.write(b'"/></svg>\n')
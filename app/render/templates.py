@@ -0,0 +1,164 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import qrcode
+from qrcode import util
+
+
+def _masks(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    # The eight mask patterns of util.mask_func, vectorized: True flips a module
+    i, j = rows, cols
+    return np.stack(
+        [
+            (i + j) % 2 == 0,
+            i % 2 == 0,
+            j % 3 == 0,
+            (i + j) % 3 == 0,
+            (i // 2 + j // 3) % 2 == 0,
+            (i * j) % 2 + (i * j) % 3 == 0,
+            ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+            ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+        ]
+    )
+
+
+def _data_order(reserved: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Coordinates of the data modules in placement order: two-column strips
+    # from the right, alternately upwards and downwards, skipping the
+    # vertical timing pattern (the same walk as QRCode.map_data)
+    size = reserved.shape[0]
+    rows, cols = [], []
+    upwards = True
+    for col in range(size - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        for row in range(size - 1, -1, -1) if upwards else range(size):
+            for c in (col, col - 1):
+                if not reserved[row, c]:
+                    rows.append(row)
+                    cols.append(c)
+        upwards = not upwards
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+def _bits(value: int, count: int, copies: int) -> np.ndarray:
+    # Bit ``i`` of ``value`` at index ``i``, repeated for each copy
+    bits = (value >> np.arange(count)) & 1
+    return np.tile(bits.astype(bool), copies)
+
+
+def _readonly(*arrays: np.ndarray) -> None:
+    for array in arrays:
+        array.setflags(write=False)
+
+
+class VersionTemplate(NamedTuple):
+    """Everything about a symbol that only depends on its version.
+
+    ``base`` holds the finder, timing and alignment patterns with the format
+    and version areas light, as a symbol is laid out while scoring masks.
+    ``reserved`` marks those function modules, ``rows``/``cols`` the data
+    modules in placement order and ``masks`` each mask pattern at them. All
+    arrays are read-only and shared by every render of the version.
+    """
+
+    base: np.ndarray
+    reserved: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    masks: np.ndarray
+    format_rows: np.ndarray
+    format_cols: np.ndarray
+    version_rows: np.ndarray
+    version_cols: np.ndarray
+
+    def place(
+        self,
+        data: list[int],
+        error_correction: int,
+        mask_pattern: int,
+        test: bool = False,
+    ) -> np.ndarray:
+        """Symbol with ``data`` codewords masked by ``mask_pattern``.
+
+        With ``test`` the format and version information stay light, as
+        ``QRCode.makeImpl`` does when scoring masks.
+        """
+        modules = self.base.copy()
+        bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8))
+        dark = np.zeros(len(self.rows), dtype=bool)
+        # Remainder bits past the codewords stay light before masking
+        count = min(len(bits), len(dark))
+        dark[:count] = bits[:count]
+        modules[self.rows, self.cols] = dark ^ self.masks[mask_pattern]
+        if not test:
+            info = util.BCH_type_info((error_correction << 3) | mask_pattern)
+            modules[self.format_rows, self.format_cols] = _bits(info, 15, 2)
+            modules[modules.shape[0] - 8, 8] = True  # always dark module
+            if len(self.version_rows):
+                number = util.BCH_type_number((modules.shape[0] - 17) // 4)
+                modules[self.version_rows, self.version_cols] = _bits(number, 18, 2)
+        return modules
+
+
+def _format_positions(size: int) -> tuple[np.ndarray, np.ndarray]:
+    # Both copies of the 15 format bits, bit i first (QRCode.setup_type_info)
+    rows, cols = [], []
+    for i in range(15):
+        rows.append(i if i < 6 else i + 1 if i < 8 else size - 15 + i)
+        cols.append(8)
+    for i in range(15):
+        rows.append(8)
+        cols.append(size - i - 1 if i < 8 else 15 - i if i < 9 else 14 - i)
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+def _version_positions(size: int) -> tuple[np.ndarray, np.ndarray]:
+    # Both copies of the 18 version bits (QRCode.setup_type_number)
+    first = [(i // 3, i % 3 + size - 11) for i in range(18)]
+    second = [(column, row) for row, column in first]
+    rows, cols = zip(*first, *second)
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+@lru_cache(maxsize=None)
+def version_template(version: int) -> VersionTemplate:
+    """Template of ``version``, built on first use and kept for the process."""
+    util.check_version(version)
+    size = version * 4 + 17
+    # Lay out the function patterns with qrcode itself, so templates match
+    # its symbols module for module
+    qr = qrcode.QRCode(version=version)
+    qr.modules_count = size
+    qr.modules = [[None] * size for _ in range(size)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(size - 7, 0)
+    qr.setup_position_probe_pattern(0, size - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(True, 0)
+    if version >= 7:
+        qr.setup_type_number(True)
+    reserved = np.array([[m is not None for m in row] for row in qr.modules])
+    base = np.array([[bool(m) for m in row] for row in qr.modules])
+    rows, cols = _data_order(reserved)
+    masks = _masks(rows, cols)
+    format_rows, format_cols = _format_positions(size)
+    if version >= 7:
+        version_rows, version_cols = _version_positions(size)
+    else:
+        version_rows = version_cols = np.empty(0, dtype=np.intp)
+    template = VersionTemplate(
+        base,
+        reserved,
+        rows,
+        cols,
+        masks,
+        format_rows,
+        format_cols,
+        version_rows,
+        version_cols,
+    )
+    _readonly(*template)
+    return template
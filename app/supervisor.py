@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+from telegram import Update
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    ContextTypes,
+    TypeHandler,
+)
+
+from app.core.concurrency import ChatOrderedUpdateProcessor
+from app.core.config import settings, logger
+from app.core.metrics import metrics, start_metrics_server, stop_metrics_server
+from app.core.state import WRITE_THROUGH_GROUP
+
+# Seconds between metric snapshots sent by each worker
+METRICS_INTERVAL = 5.0
+# Workers that crash again this soon after starting are restarted with a delay
+RESTART_BACKOFF = 1.0
+# Crashes blamed on the oldest unacknowledged update before it is dropped
+MAX_CRASHES = 3
+# Handler group acknowledging updates, after their state was written through
+ACK_GROUP = WRITE_THROUGH_GROUP + 1
+
+
+def shard_for(update: Update, workers: int) -> int:
+    """Worker that handles ``update``: always the same one for a chat.
+
+    Inline queries have no chat and go by user, so a user's file_id and
+    render caches stay warm on one worker.
+    """
+    key = ChatOrderedUpdateProcessor.ordering_key(update)
+    if key is None and update.effective_user is not None:
+        key = update.effective_user.id
+    return (key or 0) % workers
+
+
+def _worker_logging(index: int) -> None:
+    logging.basicConfig(
+        format=f"%(asctime)s - worker {index} - %(levelname)s - %(message)s",
+        level=logging.INFO,
+        force=True,
+    )
+
+
+async def _serve_worker(index: int, workers: int, conn: Connection) -> None:
+    from app.app import build_application
+
+    # Chats are sharded, so only the global flood limit is shared by workers.
+    # The supervisor serves the aggregated metrics.
+    settings.RATE_LIMIT_GLOBAL /= workers
+    settings.METRICS_PORT = None
+    application = build_application()
+
+    async def acknowledge(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        # Lets the supervisor forget the update, it won't be resent on a crash
+        conn.send(("ack", update.update_id))
+
+    application.add_handler(TypeHandler(Update, acknowledge), group=ACK_GROUP)
+
+    async def push_metrics() -> None:
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            conn.send(("metrics", metrics.snapshot()))
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        conn.send(("ready", None))
+        pusher = asyncio.create_task(push_metrics())
+        try:
+            while True:
+                try:
+                    message = await asyncio.to_thread(conn.recv)
+                except EOFError:  # the supervisor is gone
+                    break
+                if message[0] == "stop":
+                    break
+                update = Update.de_json(message[1], application.bot)
+                await application.update_queue.put(update)
+        finally:
+            pusher.cancel()
+            # Process every update already received before exiting
+            await application.stop()
+            conn.send(("metrics", metrics.snapshot()))
+            if application.post_stop:
+                await application.post_stop(application)
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def run_worker(index: int, workers: int, conn: Connection) -> None:
+    # Entry point of a worker process. Ctrl+C reaches the whole process
+    # group, but only the supervisor decides when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_logging(index)
+    asyncio.run(_serve_worker(index, workers, conn))
+
+
+class Worker:
+    """A worker process, the updates waiting to be sent to it and the ones
+    it has not acknowledged yet."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: multiprocessing.process.BaseProcess | None = None
+        self.conn: Connection | None = None
+        self.outbox: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+        # update_id -> (update, crashes blamed on it), in sending order
+        self.pending: dict[int, tuple[dict[str, Any], int]] = {}
+        self.snapshot: dict[str, Any] | None = None
+        self.ready = asyncio.Event()
+        self.started = 0.0
+        self.restart_at: float | None = None
+        self.restarts = 0
+
+
+class Supervisor:
+    """Runs ``workers`` bot processes and shards updates between them.
+
+    Updates of a chat always go to the same worker, so its ``UserState``
+    lives in one process. Crashed workers are restarted and receive the
+    updates queued for them meanwhile, after the ones the crashed process
+    had not acknowledged. Workers log to the supervisor's
+    stderr tagged with their index, and push metric snapshots that the
+    supervisor merges into its own ``/metrics``.
+    """
+
+    def __init__(self, workers: int, target: Callable[..., None] = run_worker):
+        self.workers = [Worker(index) for index in range(workers)]
+        self.target = target
+        self._context = multiprocessing.get_context("spawn")
+        # Pipe I/O blocks, a sender and a receiver thread per worker
+        self._io = ThreadPoolExecutor(2 * workers, thread_name_prefix="supervisor")
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+    def _spawn(self, worker: Worker) -> None:
+        parent, child = self._context.Pipe()
+        worker.conn = parent
+        worker.process = self._context.Process(
+            target=self.target,
+            args=(worker.index, len(self.workers), child),
+            name=f"qrcodegen-worker-{worker.index}",
+        )
+        worker.ready.clear()
+        worker.process.start()
+        child.close()
+        worker.started = time.monotonic()
+
+    async def start(self) -> None:
+        for worker in self.workers:
+            self._spawn(worker)
+            self._tasks += [
+                asyncio.create_task(self._send(worker)),
+                asyncio.create_task(self._receive(worker)),
+            ]
+        self._tasks.append(asyncio.create_task(self._monitor()))
+        metrics.add_source(self.snapshots)
+        # Updates are only accepted once every worker can process them
+        await asyncio.gather(*(worker.ready.wait() for worker in self.workers))
+        logger.info(f"🧑‍🏭 Supervisor started {len(self.workers)} workers")
+
+    def snapshots(self) -> list[dict[str, Any]]:
+        return [w.snapshot for w in self.workers if w.snapshot is not None]
+
+    def dispatch(self, update: Update) -> None:
+        worker = self.workers[shard_for(update, len(self.workers))]
+        worker.outbox.put_nowait(("update", update.to_dict()))
+
+    async def forward(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        self.dispatch(update)
+
+    async def _run_io(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+
+    async def _replay(self, conn: Connection, worker: Worker) -> None:
+        # A restarted worker first gets the updates the crashed one did not
+        # acknowledge, in their original order. The oldest one most likely
+        # caused the crash and is dropped once it has done so too often.
+        if not worker.pending:
+            return
+        oldest, (payload, crashes) = next(iter(worker.pending.items()))
+        if crashes + 1 >= MAX_CRASHES:
+            logger.error(
+                f"🗑️ Dropping update {oldest}, worker {worker.index} "
+                f"crashed {crashes + 1} times while handling it"
+            )
+            del worker.pending[oldest]
+        else:
+            worker.pending[oldest] = payload, crashes + 1
+        for update_id, (payload, _) in list(worker.pending.items()):
+            logger.info(f"🔁 Resending update {update_id} to worker {worker.index}")
+            await self._run_io(conn.send, ("update", payload))
+
+    async def _send(self, worker: Worker) -> None:
+        # A slow or restarting worker only delays its own chats. Updates stay
+        # pending until acknowledged, a failed send is resent on restart.
+        conn = worker.conn
+        while True:
+            kind, payload = await worker.outbox.get()
+            while True:
+                try:
+                    if worker.conn is not conn:
+                        conn = worker.conn
+                        await self._replay(conn, worker)
+                    if kind == "update":
+                        if payload["update_id"] not in worker.pending:
+                            worker.pending[payload["update_id"]] = payload, 0
+                            await self._run_io(conn.send, (kind, payload))
+                    elif kind != "resume":
+                        await self._run_io(conn.send, (kind, payload))
+                    break
+                except (OSError, ValueError):
+                    if kind == "update":
+                        break  # already pending
+                    await asyncio.sleep(0.1)  # wait for the monitor to restart it
+            if kind == "stop":
+                return
+
+    async def _receive(self, worker: Worker) -> None:
+        while True:
+            conn = worker.conn
+            try:
+                kind, payload = await self._run_io(conn.recv)
+            except (EOFError, OSError):
+                if self._stopping:
+                    return
+                # Wait for the monitor to replace the connection
+                while worker.conn is conn:
+                    await asyncio.sleep(0.1)
+                continue
+            if kind == "ready":
+                logger.info(f"👷 Worker {worker.index} ready")
+                worker.ready.set()
+            elif kind == "ack":
+                worker.pending.pop(payload, None)
+            elif kind == "metrics":
+                worker.snapshot = payload
+
+    async def _monitor(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(0.5)
+            for worker in self.workers:
+                if worker.process.is_alive() or self._stopping:
+                    continue
+                now = time.monotonic()
+                if worker.restart_at is None:
+                    logger.error(
+                        f"💥 Worker {worker.index} exited with code "
+                        f"{worker.process.exitcode}, restarting"
+                    )
+                    # Back off without holding up the other workers
+                    crashed_early = now - worker.started < RESTART_BACKOFF
+                    worker.restart_at = now + (RESTART_BACKOFF if crashed_early else 0)
+                if now < worker.restart_at:
+                    continue
+                worker.restart_at = None
+                worker.restarts += 1
+                worker.conn.close()
+                self._spawn(worker)
+                # Wakes the sender to resend unacknowledged updates
+                worker.outbox.put_nowait(("resume", None))
+
+    async def stop(self, timeout: float) -> None:
+        self._stopping = True
+        for worker in self.workers:
+            worker.outbox.put_nowait(("stop", None))
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            remaining = max(0.0, deadline - time.monotonic())
+            await asyncio.to_thread(worker.process.join, remaining)
+            if worker.process.is_alive():
+                logger.warning(f"⚠️ Worker {worker.index} did not stop, killing it")
+                worker.process.kill()
+                worker.process.join()
+        for task in self._tasks:
+            task.cancel()
+        for worker in self.workers:
+            worker.conn.close()
+        self._io.shutdown(wait=False)
+
+
+def build_supervisor_application(supervisor: Supervisor) -> Application:
+    """Application receiving updates and handing them to the workers."""
+
+    async def post_init(application: Application) -> None:
+        await supervisor.start()
+        if settings.METRICS_PORT is not None:
+            start_metrics_server(settings.METRICS_LISTEN, settings.METRICS_PORT)
+
+    async def post_shutdown(application: Application) -> None:
+        await supervisor.stop(settings.SHUTDOWN_GRACE_PERIOD)
+        stop_metrics_server()
+
+    application = (
+        ApplicationBuilder()
+        .token(settings.TELEGRAM_TOKEN)
+        .base_url(settings.TELEGRAM_BASE_URL)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, supervisor.forward))
+    return application
@@ -0,0 +1,111 @@
+import time
+from json import JSONDecodeError
+from types import FrameType
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+from telegram import Update
+from telegram.ext import Application
+
+from app.core.config import settings, logger
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_webhook_app(application: Application) -> Starlette:
+    async def telegram(request: Request) -> Response:
+        if (
+            settings.WEBHOOK_SECRET_TOKEN
+            and request.headers.get(SECRET_TOKEN_HEADER)
+            != settings.WEBHOOK_SECRET_TOKEN
+        ):
+            return Response(status_code=403)
+        if request.app.state.draining:
+            # Telegram retries the delivery, ideally on a replica still serving
+            return Response(status_code=503)
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            return Response(status_code=400)
+        await application.update_queue.put(Update.de_json(data, application.bot))
+        return Response()
+
+    async def healthz(request: Request) -> Response:
+        return PlainTextResponse("ok")
+
+    async def readyz(request: Request) -> Response:
+        if application.running and not request.app.state.draining:
+            return PlainTextResponse("ready")
+        return PlainTextResponse("not ready", status_code=503)
+
+    webhook_app = Starlette(
+        routes=[
+            Route(settings.WEBHOOK_PATH, telegram, methods=["POST"]),
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/readyz", readyz, methods=["GET"]),
+        ]
+    )
+    webhook_app.state.draining = False
+    return webhook_app
+
+
+class WebhookServer(uvicorn.Server):
+    """Uvicorn server that drains before exiting.
+
+    The first SIGTERM/SIGINT only fails the readiness probe, so the load
+    balancer stops routing to this replica, and the server exits once
+    ``drain_delay`` seconds have passed. A second signal exits right away.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_delay: float = 0.0):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self.drain_started: float | None = None
+
+    def handle_exit(self, sig: int, frame: FrameType | None) -> None:
+        if self.drain_started is None:
+            logger.info("🚰 Draining webhook replica before shutdown")
+            self.config.app.state.draining = True
+            self.drain_started = time.monotonic()
+            return
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self.drain_started is not None
+            and time.monotonic() - self.drain_started >= self.drain_delay
+        ):
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+async def run_webhook(application: Application) -> None:  # pragma: no cover
+    server = WebhookServer(
+        uvicorn.Config(
+            app=create_webhook_app(application),
+            host=settings.WEBHOOK_LISTEN,
+            port=settings.WEBHOOK_PORT,
+            timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_PERIOD,
+        ),
+        drain_delay=settings.WEBHOOK_DRAIN_DELAY,
+    )
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.bot.set_webhook(
+            url=settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH,
+            secret_token=settings.WEBHOOK_SECRET_TOKEN or None,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        await application.start()
+        logger.info(f"🤖 Webhook listening on port {settings.WEBHOOK_PORT}")
+        await server.serve()
+        # Process every update already accepted before shutting down
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+    if application.post_shutdown:
+        await application.post_shutdown(application)
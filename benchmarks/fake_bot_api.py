@@ -0,0 +1,231 @@
+"""In-memory stand-in for the Telegram Bot API, for local end-to-end runs.
+
+Serves ``getUpdates`` long polling or delivers updates to a webhook set with
+``setWebhook``, and accepts the methods the bot calls (``sendMessage``,
+``sendPhoto``, ``sendDocument``, ``answerCallbackQuery``, ...). Every
+request aimed at a chat is recorded with its arrival time, so a load
+generator can wait for the bot's replies. Point the bot at it with
+``TELEGRAM_BASE_URL=http://127.0.0.1:<port>/bot``.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, AsyncIterator, NamedTuple
+from urllib.parse import parse_qsl
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "QR Code Generator",
+    "username": "qrcodegen_bot",
+}
+# Webhook requests Telegram keeps in flight at once (setWebhook's default)
+WEBHOOK_CONNECTIONS = 40
+
+
+class Reply(NamedTuple):
+    method: str
+    params: dict[str, Any]
+    received: float  # time.perf_counter() when the request arrived
+
+
+async def parse_params(request: Request) -> dict[str, Any]:
+    # The Bot API takes query strings, url-encoded and multipart forms and
+    # JSON bodies. File uploads are kept as their size in bytes.
+    params: dict[str, Any] = dict(request.query_params)
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        params.update(json.loads(body or b"{}"))
+    elif content_type.startswith("application/x-www-form-urlencoded"):
+        params.update(parse_qsl(body.decode()))
+    elif content_type.startswith("multipart/form-data"):
+        header = f"Content-Type: {content_type}\r\n\r\n".encode()
+        for part in BytesParser(policy=HTTP).parsebytes(header + body).iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            data = part.get_payload(decode=True)
+            if part.get_filename() is not None:
+                params[name] = len(data)
+            else:
+                params[name] = data.decode()
+    return params
+
+
+class FakeBotApi:
+    """Bot API server keeping updates and replies in memory.
+
+    ``push_*`` queue updates as if users sent them, and ``replies(chat_id)``
+    is a queue of every request the bot made to that chat.
+    """
+
+    def __init__(self) -> None:
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._query_ids = itertools.count(1)
+        self._updates: list[dict] = []
+        self._new_updates = asyncio.Event()
+        self._closing = False
+        self._replies: defaultdict[int, asyncio.Queue[Reply]] = defaultdict(
+            asyncio.Queue
+        )
+        self._deliveries: set[asyncio.Task] = set()
+        self._webhook_slots = asyncio.Semaphore(WEBHOOK_CONNECTIONS)
+        self._client: httpx.AsyncClient | None = None
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self.calls: Counter[str] = Counter()
+        # Set once the bot polls or registers its webhook
+        self.ready = asyncio.Event()
+        self.app = Starlette(
+            routes=[
+                Route("/bot{token}/{method}", self.handle, methods=["GET", "POST"])
+            ],
+            lifespan=self._lifespan,
+        )
+
+    def replies(self, chat_id: int) -> asyncio.Queue[Reply]:
+        return self._replies[chat_id]
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette) -> AsyncIterator[None]:
+        yield
+        await self.close()
+
+    async def close(self) -> None:
+        # Wakes pending long polls, the server waits for them before exiting
+        self._closing = True
+        self._new_updates.set()
+        for task in list(self._deliveries):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # Updates sent by simulated users
+
+    @staticmethod
+    def _user(chat_id: int) -> dict:
+        return {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"}
+
+    def _message(self, chat_id: int, sender: dict, **fields: Any) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": sender,
+            **fields,
+        }
+
+    def push_text(self, chat_id: int, text: str) -> None:
+        self._push({"message": self._message(chat_id, self._user(chat_id), text=text)})
+
+    def push_callback(self, chat_id: int, data: str) -> None:
+        menu = self._message(chat_id, BOT_USER, text="Choose an option below:")
+        query = {
+            "id": str(next(self._query_ids)),
+            "from": self._user(chat_id),
+            "chat_instance": str(chat_id),
+            "message": menu,
+            "data": data,
+        }
+        self._push({"callback_query": query})
+
+    def _push(self, update: dict) -> None:
+        update["update_id"] = next(self._update_ids)
+        if self.webhook_url:
+            task = asyncio.create_task(self._deliver(update))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+            return
+        self._updates.append(update)
+        self._new_updates.set()
+
+    async def _deliver(self, update: dict) -> None:
+        headers = {}
+        if self.webhook_secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+        async with self._webhook_slots:
+            if self._client is None:
+                self._client = httpx.AsyncClient()
+            await self._client.post(self.webhook_url, json=update, headers=headers)
+
+    # Bot API methods
+
+    async def handle(self, request: Request) -> JSONResponse:
+        method = request.path_params["method"]
+        params = await parse_params(request)
+        self.calls[method] += 1
+        if "chat_id" in params:
+            chat_id = int(params["chat_id"])
+            self._replies[chat_id].put_nowait(
+                Reply(method, params, time.perf_counter())
+            )
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(params) if handler is not None else True
+        return JSONResponse({"ok": True, "result": result})
+
+    async def api_getMe(self, params: dict) -> dict:
+        return BOT_USER
+
+    async def api_getUpdates(self, params: dict) -> list[dict]:
+        self.ready.set()
+        offset = int(params.get("offset") or 0)
+        # Updates before the offset are confirmed and dropped
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and not self._closing:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(
+                    self._new_updates.wait(), float(params.get("timeout") or 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[: int(params.get("limit") or 100)]
+
+    async def api_setWebhook(self, params: dict) -> bool:
+        self.webhook_url = params["url"]
+        self.webhook_secret = params.get("secret_token", "")
+        self.ready.set()
+        return True
+
+    async def api_deleteWebhook(self, params: dict) -> bool:
+        self.webhook_url = ""
+        return True
+
+    def _sent(self, params: dict, **fields: Any) -> dict:
+        return self._message(int(params["chat_id"]), BOT_USER, **fields)
+
+    def _file(self, kind: str) -> dict:
+        number = next(self._file_ids)
+        return {"file_id": f"{kind}-{number}", "file_unique_id": f"u{number}"}
+
+    async def api_sendMessage(self, params: dict) -> dict:
+        return self._sent(params, text=params.get("text", ""))
+
+    async def api_sendPhoto(self, params: dict) -> dict:
+        photo = self._file("photo") | {"width": 330, "height": 330}
+        return self._sent(params, photo=[photo])
+
+    async def api_sendDocument(self, params: dict) -> dict:
+        return self._sent(params, document=self._file("document"))
+
+    async def api_sendMediaGroup(self, params: dict) -> list[dict]:
+        media = params["media"]
+        count = len(json.loads(media) if isinstance(media, str) else media)
+        return [
+            self._sent(params, photo=[self._file("photo") | {"width": 1, "height": 1}])
+            for _ in range(count)
+        ]
@@ -0,0 +1,245 @@
+"""End-to-end load test of the bot against a local fake Bot API.
+
+Starts :mod:`benchmarks.fake_bot_api`, runs the bot as a subprocess pointed
+at it (``python -m app.app`` with ``TELEGRAM_BASE_URL``), and simulates
+``--chats`` users walking the URL, Wi-Fi and vCard flows concurrently. Each
+update's latency runs from the moment it is queued until the bot's first
+reply to that chat arrives. Run from the repository root:
+
+    python -m benchmarks.load [--chats 1000] [--mode polling|webhook]
+        [--workers 1] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+import uvicorn
+
+from benchmarks.fake_bot_api import FakeBotApi
+
+FAKE_TOKEN = "123456:fake-token"
+# Seconds a simulated user waits for each reply before giving up
+REPLY_TIMEOUT = 60.0
+
+
+class Step(NamedTuple):
+    kind: str  # "callback" button press or "text" message
+    value: str  # callback data or text, formatted with the payload variant
+    replies: tuple[str, ...]  # Bot API methods the bot answers with
+
+
+QR_REPLIES = ("sendPhoto", "sendMessage")  # the QR code, then the menu
+FLOWS = {
+    "url": [
+        Step("callback", "url_qr", ("sendMessage",)),
+        Step("text", "https://example.com/{variant}", QR_REPLIES),
+    ],
+    "wifi": [
+        Step("callback", "wifi_qr", ("sendMessage",)),
+        Step("text", "Office {variant}", ("sendMessage",)),
+        Step("text", "correct-horse-battery", QR_REPLIES),
+    ],
+    "vcard": [
+        Step("callback", "contact_info", ("sendMessage",)),
+        Step("text", "Joel", ("sendMessage",)),
+        Step("text", "Perez {variant}", ("sendMessage",)),
+        Step("text", "+34600312511", ("sendMessage",)),
+        Step("text", "joel@example.com", ("sendMessage",)),
+        Step("text", "Example Inc.", ("sendMessage",)),
+        Step("text", "Developer", ("sendMessage",)),
+        Step("text", "https://example.com", QR_REPLIES),
+    ],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[round(fraction * (len(samples) - 1))]
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    if not latencies:
+        return {"updates": 0}
+    return {
+        "updates": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def walk(
+    api: FakeBotApi, chat_id: int, flow: str, variant: int
+) -> tuple[list[float], int]:
+    # Sends one flow's updates in order; returns latencies and timeouts
+    replies = api.replies(chat_id)
+    latencies = []
+    for step in FLOWS[flow]:
+        value = step.value.format(variant=variant)
+        sent = time.perf_counter()
+        if step.kind == "callback":
+            api.push_callback(chat_id, value)
+        else:
+            api.push_text(chat_id, value)
+        try:
+            for number, method in enumerate(step.replies):
+                reply = await asyncio.wait_for(replies.get(), REPLY_TIMEOUT)
+                if reply.method != method:
+                    raise RuntimeError(
+                        f"chat {chat_id} expected {method}, got {reply.method}"
+                    )
+                if number == 0:
+                    latencies.append(reply.received - sent)
+        except asyncio.TimeoutError:
+            return latencies, 1
+    return latencies, 0
+
+
+def bot_environment(
+    api_port: int, mode: str, rate_limit: bool, workers: int = 1
+) -> dict[str, str]:
+    env = os.environ | {
+        "TELEGRAM_TOKEN": FAKE_TOKEN,
+        "TELEGRAM_BASE_URL": f"http://127.0.0.1:{api_port}/bot",
+        "BOT_MODE": mode,
+        "WORKERS": str(workers),
+        "STATE_BACKEND": "memory",
+        "RATE_LIMIT_ENABLED": str(rate_limit).lower(),
+        "MENU_WITH_RESULT": "false",
+        "LOGFIRE_ENABLED": "false",
+        "PYTHONPATH": os.getcwd(),
+    }
+    if mode == "webhook":
+        port = free_port()
+        env |= {
+            "WEBHOOK_URL": f"http://127.0.0.1:{port}",
+            "WEBHOOK_LISTEN": "127.0.0.1",
+            "WEBHOOK_PORT": str(port),
+            "WEBHOOK_DRAIN_DELAY": "0",
+        }
+    return env
+
+
+async def run_load(
+    chats: int,
+    mode: str = "polling",
+    distinct: int = 100,
+    rate_limit: bool = False,
+    bot_output: int | None = subprocess.DEVNULL,
+    workers: int = 1,
+) -> dict:
+    """Run ``chats`` concurrent users against a fresh bot process.
+
+    ``distinct`` bounds the number of different payloads per flow, which
+    sets how often renders and uploads are served from the caches.
+    """
+    api = FakeBotApi()
+    server = uvicorn.Server(
+        uvicorn.Config(api.app, host="127.0.0.1", port=free_port(), log_level="error")
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    bot = subprocess.Popen(
+        [sys.executable, "-m", "app.app"],
+        env=bot_environment(server.config.port, mode, rate_limit, workers),
+        stdout=bot_output,
+        stderr=bot_output,
+    )
+    try:
+        await asyncio.wait_for(api.ready.wait(), 60)
+        flows = list(FLOWS)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                walk(api, chat_id, flows[chat_id % len(flows)], chat_id % distinct)
+                for chat_id in range(1, chats + 1)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        bot.send_signal(signal.SIGINT)
+        try:
+            await asyncio.to_thread(bot.wait, 30)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+        await api.close()
+        server.should_exit = True
+        await serving
+
+    report = {"mode": mode, "workers": workers, "chats": chats, "seconds": elapsed}
+    latencies = [latency for walked, _ in results for latency in walked]
+    report |= summarize(latencies)
+    report["updates_per_sec"] = len(latencies) / elapsed
+    report["timeouts"] = sum(timeouts for _, timeouts in results)
+    report["flows"] = {
+        flow: summarize(
+            [
+                latency
+                for chat_id, (walked, _) in enumerate(results, start=1)
+                if flows[chat_id % len(flows)] == flow
+                for latency in walked
+            ]
+        )
+        for flow in flows
+    }
+    report["api_calls"] = dict(api.calls)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--distinct", type=int, default=100)
+    parser.add_argument("--rate-limit", action="store_true")
+    parser.add_argument("--workers", type=int, default=1, help="bot processes")
+    parser.add_argument("--verbose", action="store_true", help="show bot logs")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_load(
+            args.chats,
+            args.mode,
+            args.distinct,
+            args.rate_limit,
+            None if args.verbose else subprocess.DEVNULL,
+            args.workers,
+        )
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['chats']} chats ({report['mode']}, {report['workers']} workers): "
+        f"{report['updates']} updates "
+        f"in {report['seconds']:.1f}s, {report['updates_per_sec']:.0f} updates/s, "
+        f"{report['timeouts']} timeouts"
+    )
+    print(f"{'flow':<6} {'updates':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for flow, row in [("all", report), *report["flows"].items()]:
+        if row["updates"]:
+            print(
+                f"{flow:<6} {row['updates']:>8} {row['p50_ms']:>9.1f} "
+                f"{row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
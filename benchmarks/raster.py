@@ -0,0 +1,82 @@
+"""Compare the PIL and NumPy PNG rasterizers at QR versions 1, 10 and 40.
+
+Run from the repository root:
+
+    python -m benchmarks.raster [--repeat 20] [--json]
+"""
+
+import argparse
+import json
+import timeit
+from io import BytesIO
+
+import qrcode
+from qrcode.image.pil import PilImage
+
+from app.render.raster import module_array, rasterize
+
+VERSIONS = (1, 10, 40)
+
+
+def build_qr(version: int) -> qrcode.QRCode:
+    qr = qrcode.QRCode(version=version, box_size=10, border=4)
+    qr.add_data("QRCODEGEN")  # fits version 1, larger versions pad it
+    qr.make(fit=False)
+    return qr
+
+
+def encode_pil(qr: qrcode.QRCode) -> bytes:
+    buffer = BytesIO()
+    qr.make_image(image_factory=PilImage).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def encode_numpy(qr: qrcode.QRCode) -> bytes:
+    buffer = BytesIO()
+    image = rasterize(module_array(qr.modules, qr.border), qr.box_size)
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+ENCODERS = {"pil": encode_pil, "numpy": encode_numpy}
+
+
+def run(repeat: int) -> list[dict]:
+    results = []
+    for version in VERSIONS:
+        qr = build_qr(version)
+        timings = {
+            name: min(timeit.repeat(lambda: encode(qr), number=1, repeat=repeat))
+            for name, encode in ENCODERS.items()
+        }
+        results.append(
+            {
+                "version": version,
+                "pil_ms": timings["pil"] * 1000,
+                "numpy_ms": timings["numpy"] * 1000,
+                "speedup": timings["pil"] / timings["numpy"],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'version':>7} {'pil ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for row in results:
+        print(
+            f"{row['version']:>7} {row['pil_ms']:>9.2f} "
+            f"{row['numpy_ms']:>9.2f} {row['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Benchmark suite for the QR generation hot path.
+
+Measures render latency per payload size, output format and error correction
+level, matrix build time of the ``qrcode`` and fast engines, executor throughput under concurrency and full ``handle_message``
+round trips against a mocked bot. Results are printed as JSON so they can be
+stored and compared between revisions:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.2
+
+``--compare`` exits with status 1 when any case got slower than the baseline
+by more than ``--threshold`` (relative to the baseline median).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+from unittest.mock import AsyncMock, patch
+
+import qrcode
+
+from app.app import handle_message
+from app.core.file_ids import FileIdIndex
+from app.core.models import ContactQR, UserState, WifiQR
+from app.qrcodegen import RenderKey, render_qr, vcard_payload, wifi_payload
+from app.render.cache import RenderCache
+from app.render.engine import FastQRCode
+from app.render.matrix import MatrixCache
+from app.render.executor import RenderExecutor
+
+ECC_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+CONTACT = ContactQR(
+    name="Joel",
+    surname="Perez Izquierdo",
+    phone_number="+34600312511",
+    email="joelperez91@gmail.com",
+    company="Example Inc.",
+    title="Software Engineer",
+    url="https://github.com/jpizquierdo",
+)
+PAYLOADS = {
+    "short": "https://example.com",
+    "wifi": wifi_payload(WifiQR(ssid="Office", password="correct-horse-battery")),
+    "vcard": vcard_payload(CONTACT),
+    "long": "https://example.com/" + "a" * 1000,
+}
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[int(0.95 * (len(samples) - 1))] * 1000,
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {**summarize(samples), "peak_kib": peak / 1024}
+
+
+def bench_render(repeat: int) -> list[dict]:
+    results = []
+    # Every render builds its matrix, as a cold request would
+    with patch("app.render.matrix.matrix_cache", MatrixCache(max_bytes=0)):
+        for payload_name, payload in PAYLOADS.items():
+            for fmt in ("png", "svg", "svgz"):
+                for ecc_name, ecc in ECC_LEVELS.items():
+                    key = RenderKey(payload, ecc, fmt=fmt)
+                    output = render_qr(key)
+                    results.append(
+                        {
+                            "case": f"render/{payload_name}/{fmt}/{ecc_name}",
+                            "bytes": len(output),
+                            **measure(lambda: render_qr(key), repeat),
+                        }
+                    )
+    return results
+
+
+def build(engine: type[qrcode.QRCode], payload: str, **kwargs) -> None:
+    qr = engine(error_correction=qrcode.constants.ERROR_CORRECT_M, **kwargs)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+
+def bench_matrix(repeat: int) -> list[dict]:
+    engines = {
+        "qrcode": (qrcode.QRCode, {}),
+        "fast": (FastQRCode, {}),
+        "fast-mask": (FastQRCode, {"mask_pattern": 0}),
+    }
+    results = []
+    for payload_name, payload in PAYLOADS.items():
+        for engine_name, (engine, kwargs) in engines.items():
+            results.append(
+                {
+                    "case": f"matrix/{payload_name}/{engine_name}",
+                    **measure(lambda: build(engine, payload, **kwargs), repeat),
+                }
+            )
+    return results
+
+
+async def bench_executor(jobs: int, concurrency: int) -> list[dict]:
+    results = []
+    keys = [RenderKey(f"{PAYLOADS['vcard']}#{i}", 0) for i in range(jobs)]
+    for kind in ("inline", "thread", "process"):
+        executor = RenderExecutor(kind=kind, max_workers=concurrency)
+        try:
+            # Warm up every worker so pool start-up is not measured
+            await asyncio.gather(
+                *(executor.submit(render_qr, key) for key in keys[:concurrency])
+            )
+            start = time.perf_counter()
+            await asyncio.gather(*(executor.submit(render_qr, key) for key in keys))
+            elapsed = time.perf_counter() - start
+        finally:
+            executor.shutdown()
+        results.append(
+            {
+                "case": f"executor/{kind}/x{concurrency}",
+                "renders_per_s": jobs / elapsed,
+                "median_ms": elapsed / jobs * 1000,
+            }
+        )
+    return results
+
+
+def message_update(state: UserState, text: str, user_data: dict | None = None):
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": state, **(user_data or {})}
+    update.message.text = text
+    return update, context
+
+
+async def bench_handle_message(repeat: int) -> list[dict]:
+    flows = {
+        "url": (UserState.URL_AWAITING_URL, "https://example.com/bench", {}),
+        "wifi": (
+            UserState.WIFI_AWAITING_PASSWORD,
+            "correct-horse-battery",
+            {"ssid": "Office"},
+        ),
+    }
+    results = []
+    for name, (state, text, user_data) in flows.items():
+        for warm in (False, True):
+            samples = []
+            with patch("app.qrcodegen.render_cache", RenderCache()), patch(
+                "app.functions.shared.file_id_index", FileIdIndex()
+            ):
+                for i in range(repeat):
+                    # A distinct payload each cold run defeats the cache
+                    payload = text if warm else f"{text}-{i}"
+                    update, context = message_update(state, payload, user_data)
+                    start = time.perf_counter()
+                    await handle_message(update, context)
+                    samples.append(time.perf_counter() - start)
+            results.append(
+                {
+                    "case": f"handle_message/{name}/{'warm' if warm else 'cold'}",
+                    **summarize(samples),
+                }
+            )
+    return results
+
+
+async def run(repeat: int, jobs: int, concurrency: int) -> dict:
+    results = bench_render(repeat)
+    results += bench_matrix(repeat)
+    results += await bench_executor(jobs, concurrency)
+    results += await bench_handle_message(repeat)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    before = {row["case"]: row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get(row["case"])
+        if old is None or "median_ms" not in old:
+            continue
+        change = (row["median_ms"] - old["median_ms"]) / old["median_ms"]
+        if change > threshold:
+            regressions.append(
+                f"{row['case']}: {old['median_ms']:.2f} ms -> "
+                f"{row['median_ms']:.2f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.repeat, args.jobs, args.concurrency))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(report, json.load(baseline), args.threshold)
+        for line in regressions:
+            print(f"🐢 {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
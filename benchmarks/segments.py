@@ -0,0 +1,127 @@
+"""Compare QR versions with qrcode's chunking and optimal segmentation.
+
+Encodes real-world payloads (the bot's Wi-Fi and vCard strings, URLs,
+asset and ticket codes) once with qrcode's run-length heuristic and once
+split into the numeric, alphanumeric and byte segments taking the fewest
+bits, and reports the encoded bits, version, module count and build time
+of each. Run
+from the repository root:
+
+    python -m benchmarks.segments [--repeat 20] [--json]
+"""
+
+import argparse
+import json
+import timeit
+
+import qrcode
+from qrcode import util
+
+from app.core.models import ContactQR, WifiQR
+from app.qrcodegen import vcard_payload, wifi_payload
+from app.render.engine import FastQRCode, data_bits
+
+L, M = qrcode.constants.ERROR_CORRECT_L, qrcode.constants.ERROR_CORRECT_M
+# Payloads with the error correction level of the flow that produces them
+PAYLOADS = {
+    "url": ("https://example.com/products/2024/000451", L),
+    "url-upper": ("HTTPS://EXAMPLE.COM/T/8F3K2Q9Z", L),
+    "asset-tag": ("ASSET-2024-000451", L),
+    "ticket": ("ORDER-2024-000123456789", L),
+    "gs1": ("(01)09506000134352(17)201225(10)ABC123", L),
+    "iban": ("ES9121000418450200051332", L),
+    "wifi": (
+        wifi_payload(WifiQR(ssid="CAFE-GUEST-5G", password="80412937551203")),
+        M,
+    ),
+    "wifi-words": (
+        wifi_payload(WifiQR(ssid="Office", password="correct-horse-battery")),
+        M,
+    ),
+    "vcard": (
+        vcard_payload(
+            ContactQR(
+                name="Joel",
+                surname="Perez",
+                phone_number="+34600312511",
+                email="joel@example.com",
+                company="Example Inc.",
+                title="Developer",
+                url="https://example.com",
+            )
+        ),
+        M,
+    ),
+}
+
+
+def build(payload: str, error_correction: int, optimal: bool) -> FastQRCode:
+    qr = FastQRCode(error_correction=error_correction, optimal_segments=optimal)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def encoded_bits(qr: FastQRCode) -> int:
+    # Mode indicators, character counts and data, without padding
+    sizes = util.mode_sizes_for_version(qr.version)
+    return sum(
+        4 + sizes[segment.mode] + data_bits(segment.mode, len(segment))
+        for segment in qr.data_list
+    )
+
+
+def compare(payload: str, error_correction: int, repeat: int = 1) -> dict:
+    row: dict = {"length": len(payload.encode())}
+    for name, optimal in (("qrcode", False), ("optimal", True)):
+        qr = build(payload, error_correction, optimal)
+        seconds = min(
+            timeit.repeat(
+                lambda: build(payload, error_correction, optimal),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        row[name] = {
+            "version": qr.version,
+            "modules": qr.modules_count**2,
+            "segments": len(qr.data_list),
+            "bits": encoded_bits(qr),
+            "ms": seconds * 1000,
+        }
+    row["versions_saved"] = row["qrcode"]["version"] - row["optimal"]["version"]
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args()
+
+    results = {
+        name: compare(payload, error_correction, args.repeat)
+        for name, (payload, error_correction) in PAYLOADS.items()
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{'payload':<11} {'bytes':>5} {'bits':>11} {'version':>9} {'modules':>11} "
+        f"{'qrcode ms':>10} {'optimal ms':>10}"
+    )
+    for name, row in results.items():
+        before, after = row["qrcode"], row["optimal"]
+        print(
+            f"{name:<11} {row['length']:>5} "
+            f"{before['bits']:>4} → {after['bits']:<4} "
+            f"{before['version']:>4} → {after['version']:<2} "
+            f"{before['modules']:>5} → {after['modules']:<4} "
+            f"{before['ms']:>10.2f} {after['ms']:>10.2f}"
+        )
+    saved = sum(row["versions_saved"] > 0 for row in results.values())
+    print(f"{saved} of {len(results)} payloads fit a smaller version")
+
+
+if __name__ == "__main__":
+    main()
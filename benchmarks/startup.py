@@ -0,0 +1,72 @@
+"""Profile the import time of the bot process with ``python -X importtime``.
+
+Run from the repository root:
+
+    python -m benchmarks.startup [--module app.app] [--top 15] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+def parse_importtime(output: str) -> list[dict]:
+    # Lines look like "import time:  self [us] | cumulative | <indent>module"
+    results = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        results.append(
+            {
+                "module": module.strip(),
+                "depth": (len(module) - len(module.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return results
+
+
+def profile(module: str) -> list[dict]:
+    env = os.environ | {"PYTHONPATH": os.getcwd()}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args()
+
+    results = profile(args.module)
+    total = next(row for row in results if row["module"] == args.module)
+    # Top-level imports of the profiled module and its direct dependencies
+    slowest = sorted(
+        (row for row in results if row["depth"] <= 1),
+        key=lambda row: row["cumulative_ms"],
+        reverse=True,
+    )[: args.top]
+    if args.json:
+        print(json.dumps({"total_ms": total["cumulative_ms"], "slowest": slowest}))
+        return
+    print(f"import {args.module}: {total['cumulative_ms']:.1f} ms")
+    print(f"{'module':<40} {'self ms':>9} {'total ms':>9}")
+    for row in slowest:
+        print(
+            f"{row['module']:<40} {row['self_ms']:>9.1f} {row['cumulative_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 import pytest
 
 from unittest.mock import AsyncMock, patch
-from app.app import start
+from app.core.ratelimit import TokenBucketRateLimiter
+from app.core.state import WRITE_THROUGH_GROUP, write_through
+from app.app import (
+    start,
+    post_init,
+    post_shutdown,
+    build_application,
+    handle_message,
+    handle_document,
+    button_callback,
+    command_options,
+)
 
 
 @pytest.mark.asyncio
@@ -22,3 +33,48 @@ async def test_start():
         chat_id=12345,
         text="👋 Choose and option and I'll generate a QR code for you!",
     )
+
+
+@pytest.mark.asyncio
+async def test_post_shutdown_stops_render_executor():
+    with patch("app.app.render_executor") as executor:
+        await post_shutdown(AsyncMock())
+    executor.shutdown.assert_called_once_with()
+
+
+def test_build_application_registers_handlers():
+    with patch("app.app.settings.TELEGRAM_TOKEN", "123:abc"):
+        application = build_application()
+    callbacks = {handler.callback for handler in application.handlers[0]}
+    assert callbacks == {
+        start,
+        handle_message,
+        handle_document,
+        command_options,
+        button_callback,
+    }
+    assert application.post_shutdown is post_shutdown
+    assert isinstance(application.bot.rate_limiter, TokenBucketRateLimiter)
+    assert WRITE_THROUGH_GROUP not in application.handlers
+
+
+def test_shared_state_is_written_through_after_the_handlers():
+    with patch("app.app.settings.TELEGRAM_TOKEN", "123:abc"), patch(
+        "app.app.settings.STATE_SHARED", True
+    ):
+        application = build_application()
+    [handler] = application.handlers[WRITE_THROUGH_GROUP]
+    assert handler.callback is write_through
+
+
+@pytest.mark.asyncio
+async def test_post_init_serves_metrics_on_their_own_port_in_webhook_mode():
+    with patch("app.app.start_metrics_server") as start_server, patch(
+        "app.app.settings.BOT_MODE", "webhook"
+    ), patch("app.app.settings.METRICS_PORT", 9100), patch(
+        "app.app.settings.METRICS_LISTEN", "127.0.0.1"
+    ), patch(
+        "app.app.settings.PREWARM", False
+    ):
+        await post_init(None)
+    start_server.assert_called_once_with("127.0.0.1", 9100)
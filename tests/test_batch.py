@@ -0,0 +1,196 @@
+import zipfile
+import pytest
+
+from unittest.mock import AsyncMock, patch
+from app.app import handle_document, handle_message
+from app.batch import parse_batch, zip_batch
+from app.core.models import UserState
+from app.functions.batch_qr import BATCH_HELP
+from app.functions.shared import BUSY_TEXT
+from app.qrcodegen import key_digest
+from app.render.executor import RenderTimeout
+
+
+def test_parse_batch_rows():
+    items, errors = parse_batch(
+        [
+            "https://example.com",
+            "ASSET-0001",
+            "Hello, world",
+            "",
+            "text,with, commas",
+            "url,https://example.org",
+            "wifi,Office,correct-horse",
+            "contact,Joel,Perez,+34600312511,joel@example.com",
+            "contact,Joel,Perez,+34600312511,joel@example.com,ACME,Dev,https://acme.io",
+        ]
+    )
+    assert errors == []
+    assert [item.name.split("_")[0] for item in items] == [
+        "url",
+        "text",
+        "text",
+        "text",
+        "url",
+        "wifi",
+        "contact",
+        "contact",
+    ]
+    assert items[0].name == f"url_{key_digest(['url', items[0].key.payload])[:8]}"
+    assert [item.line for item in items] == [1, 2, 3, 5, 6, 7, 8, 9]
+    assert items[2].key.payload == "Hello, world"
+    assert items[3].key.payload == "with, commas"
+    assert items[5].key.payload == "WIFI:T:WPA;S:Office;P:correct-horse;;"
+    assert "ORG:ACME" in items[7].key.payload
+
+
+def test_batch_names_do_not_depend_on_other_rows():
+    items, _ = parse_batch(["ASSET-1", "ASSET-2", "ASSET-1"])
+    shifted, _ = parse_batch(["https://example.com", "ASSET-2", "ASSET-1"])
+    assert shifted[1:] == [items[1], items[0]._replace(line=3)]
+    assert items[2].name == f"{items[0].name}_2"
+
+
+def test_parse_batch_reports_invalid_rows():
+    items, errors = parse_batch(
+        ["wifi,Office,short", "url,not-a-url", "contact,Joel", "https://ok.example.com"]
+    )
+    assert len(items) == 1
+    assert [error.line for error in errors] == [1, 2, 3]
+    assert errors[0].message.startswith("password:")
+    assert errors[2].message == "wrong number of fields for contact"
+
+
+@pytest.mark.asyncio
+async def test_zip_batch_contains_every_render():
+    items, _ = parse_batch([f"ASSET-{i:04d}" for i in range(12)])
+    progress = AsyncMock()
+    archive = await zip_batch(items, progress)
+
+    with zipfile.ZipFile(archive) as zipped:
+        names = sorted(zipped.namelist())
+        assert names == sorted(f"{item.name}.png" for item in items)
+        assert len(set(names)) == 12
+        assert zipped.read(names[0]).startswith(b"\x89PNG")
+    assert archive.name == "qr_codes.zip"
+    assert progress.call_count == 12
+
+
+def batch_update(text: str | None = None) -> tuple[AsyncMock, AsyncMock]:
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.BATCH_AWAITING_INPUT}
+    update.message.text = text
+    if text is not None:
+        update.message.document = None
+    return update, context
+
+
+@pytest.mark.asyncio
+async def test_batch_small_message_sends_media_group():
+    update, context = batch_update("https://example.com\nASSET-0001\nwifi,Office,short")
+
+    await handle_message(update, context)
+
+    update.message.reply_text.assert_called_once_with(
+        "⚠️ Skipped invalid rows:\nLine 3: password: String should have at least 8 characters"
+    )
+    media = update.message.reply_media_group.call_args[1]["media"]
+    assert len(media) == 2
+    assert context.user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_skips_rows_too_long_for_a_qr_code():
+    update, context = batch_update(f"ASSET-0001\ntext,{'x' * 3000}\nASSET-0002")
+
+    await handle_message(update, context)
+
+    update.message.reply_text.assert_called_once_with(
+        "⚠️ Skipped invalid rows:\nLine 2: too long for a QR code"
+    )
+    media = update.message.reply_media_group.call_args[1]["media"]
+    assert len(media) == 2
+    assert context.user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_single_row_sends_photo():
+    update, context = batch_update("ASSET-0001")
+    await handle_message(update, context)
+    update.message.reply_photo.assert_called_once()
+    update.message.reply_media_group.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_large_file_sends_zip_with_progress():
+    update, context = batch_update()
+    file = AsyncMock()
+    file.download_as_bytearray.return_value = bytearray(
+        "﻿" + "\n".join(f"ASSET-{i:04d}" for i in range(25)), "utf-8"
+    )
+    update.message.document.file_size = 1024
+    update.message.document.get_file.return_value = file
+    status = AsyncMock()
+    update.message.reply_text.return_value = status
+
+    await handle_document(update, context)
+
+    update.message.reply_text.assert_called_once_with("⏳ Rendering 25 QR codes...")
+    assert status.edit_text.call_count == 12  # every 2 renders, not the last one
+    archive = update.message.reply_document.call_args[1]["document"]
+    with zipfile.ZipFile(archive) as zipped:
+        assert len(zipped.namelist()) == 25
+    assert context.user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_large_file():
+    update, context = batch_update()
+    update.message.document.file_size = 10 * 1024 * 1024
+    await handle_document(update, context)
+    update.message.reply_text.assert_called_once_with(
+        "❌ File too large. Please send at most 256 KiB."
+    )
+    assert context.user_data["state"] == UserState.BATCH_AWAITING_INPUT
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_too_many_rows():
+    update, context = batch_update("\n".join(f"ASSET-{i}" for i in range(3)))
+    with patch("app.functions.batch_qr.settings.BATCH_MAX_ITEMS", 2):
+        await handle_message(update, context)
+    update.message.reply_text.assert_called_once_with(
+        "❌ Too many rows. Please send at most 2 QR codes at once."
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_without_valid_rows_repeats_help():
+    update, context = batch_update("url,nope")
+    await handle_message(update, context)
+    update.message.reply_text.assert_called_with(BATCH_HELP)
+    assert context.user_data["state"] == UserState.BATCH_AWAITING_INPUT
+
+
+@pytest.mark.asyncio
+async def test_batch_asks_to_retry_when_renders_time_out():
+    update, context = batch_update("ASSET-0001\nASSET-0002")
+    with patch(
+        "app.batch.render_cached",
+        new=AsyncMock(side_effect=RenderTimeout("Render job exceeded 10s")),
+    ):
+        await handle_message(update, context)
+    update.message.reply_text.assert_called_once_with(BUSY_TEXT)
+    update.message.reply_media_group.assert_not_called()
+    assert context.user_data["state"] == UserState.BATCH_AWAITING_INPUT
+
+
+@pytest.mark.asyncio
+async def test_document_outside_batch_flow_shows_menu():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.URL_AWAITING_URL}
+    await handle_document(update, context)
+    context.bot.send_message.assert_called_once()
+    assert context.user_data == {}
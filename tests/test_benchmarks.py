@@ -0,0 +1,115 @@
+import asyncio
+import httpx
+import pytest
+
+from benchmarks.fake_bot_api import FakeBotApi
+from benchmarks.load import FLOWS, run_load
+from benchmarks.run import bench_handle_message, bench_matrix, compare, summarize
+from benchmarks.segments import PAYLOADS
+from benchmarks.segments import compare as compare_segments
+from benchmarks.startup import parse_importtime
+
+
+def test_summarize():
+    summary = summarize([0.003, 0.001, 0.002])
+    assert summary["min_ms"] == pytest.approx(1)
+    assert summary["median_ms"] == pytest.approx(2)
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"results": [{"case": "a", "median_ms": 10}, {"case": "b"}]}
+    current = {
+        "results": [
+            {"case": "a", "median_ms": 13},
+            {"case": "b", "median_ms": 1},
+            {"case": "new", "median_ms": 1},
+        ]
+    }
+    assert compare(current, baseline, threshold=0.2) == [
+        "a: 10.00 ms -> 13.00 ms (+30%)"
+    ]
+    assert compare(current, baseline, threshold=0.5) == []
+
+
+@pytest.mark.asyncio
+async def test_handle_message_benchmark_smoke():
+    results = await bench_handle_message(repeat=1)
+    assert [row["case"] for row in results] == [
+        "handle_message/url/cold",
+        "handle_message/url/warm",
+        "handle_message/wifi/cold",
+        "handle_message/wifi/warm",
+    ]
+
+
+def test_matrix_benchmark_covers_every_engine():
+    cases = [row["case"] for row in bench_matrix(repeat=1)]
+    assert "matrix/short/qrcode" in cases
+    assert "matrix/long/fast-mask" in cases
+
+
+def test_segments_benchmark_reports_version_reduction():
+    row = compare_segments(*PAYLOADS["wifi"])
+    assert (row["qrcode"]["version"], row["optimal"]["version"]) == (4, 3)
+    assert row["versions_saved"] == 1
+    assert row["optimal"]["bits"] < row["qrcode"]["bits"]
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     app.core\n"
+        "import time:      2400 |       9000 |   app.core.config\n"
+        "2024-01-01 - INFO - not an import line\n"
+    )
+    assert parse_importtime(output) == [
+        {"module": "app.core", "depth": 2, "self_ms": 0.12, "cumulative_ms": 0.12},
+        {"module": "app.core.config", "depth": 1, "self_ms": 2.4, "cumulative_ms": 9.0},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fake_bot_api_serves_updates_and_records_replies():
+    api = FakeBotApi()
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        api.push_text(7, "hello")
+        api.push_callback(7, "url_qr")
+        response = await client.post("/bot1:x/getUpdates", data={"timeout": "0"})
+        updates = response.json()["result"]
+        assert [u["update_id"] for u in updates] == [1, 2]
+        assert updates[0]["message"]["text"] == "hello"
+        assert updates[1]["callback_query"]["data"] == "url_qr"
+        # Confirmed updates are not delivered again
+        response = await client.post("/bot1:x/getUpdates", data={"offset": "3"})
+        assert response.json()["result"] == []
+
+        response = await client.post(
+            "/bot1:x/sendPhoto",
+            data={"chat_id": "7", "caption": "QR"},
+            files={"photo": ("qr.png", b"\x89PNG", "image/png")},
+        )
+    message = response.json()["result"]
+    assert message["chat"]["id"] == 7
+    assert message["photo"][0]["file_id"] == "photo-1"
+    reply = api.replies(7).get_nowait()
+    assert reply.method == "sendPhoto"
+    assert reply.params == {"chat_id": "7", "caption": "QR", "photo": 4}
+    assert api.ready.is_set()
+
+
+@pytest.mark.asyncio
+async def test_fake_bot_api_close_wakes_long_polls():
+    api = FakeBotApi()
+    poll = asyncio.create_task(api.api_getUpdates({"timeout": "30"}))
+    await asyncio.sleep(0.01)
+    await api.close()
+    assert await asyncio.wait_for(poll, 1) == []
+
+
+@pytest.mark.asyncio
+async def test_load_smoke():
+    report = await run_load(chats=3, distinct=1)
+    assert report["timeouts"] == 0
+    assert report["updates"] == sum(len(steps) for steps in FLOWS.values())
+    assert report["api_calls"]["sendPhoto"] == 3
@@ -3,6 +3,8 @@ import pytest
 from unittest.mock import AsyncMock, ANY
 from app.app import button_callback
 from app.core.models import UserState
+from app.functions.batch_qr import BATCH_HELP
+from app.functions.shared import PRESET_MARKUP
 
 
 @pytest.mark.asyncio
@@ -151,3 +153,71 @@ async def test_button_callback_back():
         text="Choose an option below:",
         reply_markup=ANY,  # Use ANY to match the InlineKeyboardMarkup object
     )
+
+
+@pytest.mark.asyncio
+async def test_button_callback_batch_qr():
+    # Mock Update and Context
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {}  # Use a real dictionary for user_data
+    query = AsyncMock()
+    query.data = "batch_qr"
+    update.callback_query = query
+    query.message.reply_text = AsyncMock()  # Mock the async method
+
+    # Call the button_callback function
+    await button_callback(update, context)
+
+    # Assert that the bot sends the batch instructions
+    query.message.reply_text.assert_called_once_with(BATCH_HELP)
+    assert context.user_data["state"] == UserState.BATCH_AWAITING_INPUT
+
+
+@pytest.mark.asyncio
+async def test_button_callback_presets():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {}
+    query = AsyncMock()
+    query.data = "presets"
+    update.callback_query = query
+
+    await button_callback(update, context)
+
+    query.message.reply_text.assert_called_once_with(
+        "Choose the size of your QR codes:", reply_markup=PRESET_MARKUP
+    )
+
+
+@pytest.mark.asyncio
+async def test_button_callback_preset_is_kept_after_menu():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.URL_AWAITING_URL}
+    query = AsyncMock()
+    query.data = "preset:print"
+    update.callback_query = query
+
+    await button_callback(update, context)
+
+    query.message.reply_text.assert_called_once_with(
+        "✅ QR codes will now be rendered as 🖨️ Print"
+    )
+    # The menu ends the conversation but keeps the chosen preset
+    assert context.user_data == {"preset": "print"}
+
+
+@pytest.mark.asyncio
+async def test_button_callback_unknown_preset_is_ignored():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {}
+    query = AsyncMock()
+    query.data = "preset:huge"
+    update.callback_query = query
+
+    await button_callback(update, context)
+
+    query.message.reply_text.assert_not_called()
+    assert context.user_data == {}
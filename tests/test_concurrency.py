@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+
+from unittest.mock import MagicMock
+from telegram import Update
+from app.core.concurrency import ChatOrderedUpdateProcessor
+
+
+def chat_update(chat_id: int) -> MagicMock:
+    update = MagicMock(spec=Update)
+    update.effective_chat.id = chat_id
+    return update
+
+
+async def record(events: list, name: str, delay: float = 0.0) -> None:
+    events.append(f"start {name}")
+    await asyncio.sleep(delay)
+    events.append(f"end {name}")
+
+
+@pytest.mark.asyncio
+async def test_same_chat_updates_keep_their_order():
+    processor = ChatOrderedUpdateProcessor(max_concurrency=4)
+    await processor.initialize()
+    events = []
+    await asyncio.gather(
+        processor.process_update(chat_update(1), record(events, "first", 0.02)),
+        processor.process_update(chat_update(1), record(events, "second")),
+        processor.process_update(chat_update(1), record(events, "third")),
+    )
+    assert events == [
+        "start first",
+        "end first",
+        "start second",
+        "end second",
+        "start third",
+        "end third",
+    ]
+    assert processor._chat_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_different_chats_run_concurrently():
+    processor = ChatOrderedUpdateProcessor(max_concurrency=4)
+    await processor.initialize()
+    events = []
+    await asyncio.gather(
+        processor.process_update(chat_update(1), record(events, "slow", 0.02)),
+        processor.process_update(chat_update(2), record(events, "fast")),
+    )
+    assert events == ["start slow", "start fast", "end fast", "end slow"]
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_is_respected():
+    processor = ChatOrderedUpdateProcessor(max_concurrency=2)
+    await processor.initialize()
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(
+        *(processor.process_update(chat_update(i), job()) for i in range(6))
+    )
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_updates_without_chat_are_not_serialized():
+    processor = ChatOrderedUpdateProcessor(max_concurrency=4)
+    await processor.initialize()
+    events = []
+    user_only = MagicMock(spec=Update)
+    user_only.effective_chat = None
+    user_only.effective_user.id = 7
+    anonymous = MagicMock(spec=Update)
+    anonymous.effective_chat = None
+    anonymous.effective_user = None
+
+    assert ChatOrderedUpdateProcessor.ordering_key(user_only) == 7
+    assert ChatOrderedUpdateProcessor.ordering_key(anonymous) is None
+    assert ChatOrderedUpdateProcessor.ordering_key("not an update") is None
+
+    await asyncio.gather(
+        processor.process_update("a", record(events, "a", 0.02)),
+        processor.process_update("b", record(events, "b")),
+    )
+    assert events == ["start a", "start b", "end b", "end a"]
+    await processor.shutdown()
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        ChatOrderedUpdateProcessor(max_concurrency=0)
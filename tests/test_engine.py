@@ -0,0 +1,163 @@
+import itertools
+
+import numpy as np
+import pytest
+import qrcode
+
+from pydantic import ValidationError
+from qrcode import exceptions, util
+from unittest.mock import patch
+from app.core.config import AppSettings
+from app.render.engine import (
+    MODES,
+    FastQRCode,
+    data_bits,
+    lost_point,
+    minimal_version,
+    optimal_segments,
+)
+from app.render.matrix import build_matrix
+from app.render.templates import version_template
+
+PAYLOADS = [
+    "https://example.com",
+    "12345678901234567890",
+    "HELLO WORLD 123",
+    "BEGIN:VCARD\nVERSION:3.0\nN:Perez;Joel;;;\nEND:VCARD",
+    "https://example.com/" + "a" * 1000,
+    "0123456789" * 300,
+]
+
+
+@pytest.mark.parametrize("size", [21, 57, 177])
+def test_lost_point_matches_qrcode(size):
+    rng = np.random.default_rng(size)
+    for density in (0.1, 0.5, 0.9):
+        modules = rng.random((size, size)) < density
+        assert lost_point(modules) == util.lost_point(modules.tolist())
+
+
+@pytest.mark.parametrize("payload", PAYLOADS, ids=range(len(PAYLOADS)))
+@pytest.mark.parametrize("error_correction", range(4))
+def test_fast_qrcode_matches_qrcode(payload, error_correction):
+    reference = qrcode.QRCode(error_correction=error_correction)
+    reference.add_data(payload)
+    reference.make(fit=True)
+    fast = FastQRCode(error_correction=error_correction)
+    fast.add_data(payload)
+    fast.make(fit=True)
+    assert fast.version == reference.version
+    assert fast.modules == reference.modules
+
+
+def test_minimal_version_honours_start_and_overflow():
+    data = [util.QRData("https://example.com")]
+    assert minimal_version(data, qrcode.constants.ERROR_CORRECT_L) == 2
+    assert minimal_version(data, qrcode.constants.ERROR_CORRECT_L, start=12) == 12
+    with pytest.raises(exceptions.DataOverflowError):
+        minimal_version([util.QRData("x" * 3000)], qrcode.constants.ERROR_CORRECT_H)
+
+
+def test_fast_mask_setting_skips_mask_scoring():
+    with patch("app.render.matrix.settings.QR_FAST_MASK", 3), patch.object(
+        FastQRCode, "best_mask_pattern"
+    ) as best_mask:
+        matrix = build_matrix("https://example.com", 0)
+    best_mask.assert_not_called()
+    reference = qrcode.QRCode(error_correction=0, mask_pattern=3)
+    reference.add_data("https://example.com")
+    reference.make()
+    assert matrix.to_modules() == reference.modules
+
+
+def test_fast_mask_setting_is_range_checked(monkeypatch):
+    monkeypatch.setenv("QR_FAST_MASK", "9")
+    with pytest.raises(ValidationError):
+        AppSettings()
+
+
+@pytest.mark.parametrize("version", range(1, 41))
+def test_templates_match_qrcode_for_every_version(version):
+    reference = qrcode.QRCode(version=version)
+    reference.add_data("HELLO")
+    fast = FastQRCode(version=version)
+    fast.add_data("HELLO")
+    for mask_pattern in range(8):
+        for test in (True, False):
+            reference.makeImpl(test, mask_pattern)
+            fast.makeImpl(test, mask_pattern)
+            assert fast.modules == reference.modules
+
+
+def test_version_template_is_shared_and_read_only():
+    template = version_template(7)
+    assert version_template(7) is template
+    with pytest.raises(ValueError):
+        template.base[0, 0] = False
+    # Data modules exactly fill the codewords and remainder bits
+    assert len(template.rows) == (~template.reserved).sum()
+    with pytest.raises(ValueError):
+        version_template(41)
+
+
+def segment_bits(segments: list[tuple[int, bytes]], version: int) -> int:
+    sizes = util.mode_sizes_for_version(version)
+    return sum(4 + sizes[mode] + data_bits(mode, len(data)) for mode, data in segments)
+
+
+def fewest_bits(data: bytes, version: int) -> int:
+    # Every split into runs and every mode able to hold each run
+    best = None
+    for cuts in itertools.product((False, True), repeat=len(data) - 1):
+        bounds = [0, *(i + 1 for i, cut in enumerate(cuts) if cut), len(data)]
+        runs = [data[start:end] for start, end in zip(bounds, bounds[1:])]
+        choices = [[m for m in MODES if util.optimal_mode(run) <= m] for run in runs]
+        for modes in itertools.product(*choices):
+            bits = segment_bits(list(zip(modes, runs)), version)
+            best = bits if best is None else min(best, bits)
+    return best
+
+
+@pytest.mark.parametrize("version", [1, 10, 27])
+def test_optimal_segments_take_the_fewest_bits(version):
+    rng = np.random.default_rng(version)
+    for _ in range(40):
+        data = bytes(rng.choice(list(b"0123AB:ab"), rng.integers(1, 8)).tolist())
+        segments = optimal_segments(data, version)
+        assert b"".join(segment.data for segment in segments) == data
+        assert all(util.optimal_mode(s.data) <= s.mode for s in segments)
+        pairs = [(segment.mode, segment.data) for segment in segments]
+        assert segment_bits(pairs, version) == fewest_bits(data, version)
+
+
+def test_optimal_segments_fit_smaller_versions():
+    payload = "ORDER-2024-000123456789"
+    reference = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+    reference.add_data(payload)
+    reference.make(fit=True)
+    fast = FastQRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M, optimal_segments=True
+    )
+    fast.add_data(payload)
+    fast.make(fit=True)
+    assert (reference.version, fast.version) == (2, 1)
+    assert [segment.mode for segment in fast.data_list] == [
+        util.MODE_ALPHA_NUM,
+        util.MODE_NUMBER,
+    ]
+    # Same symbol as qrcode encoding the same segments
+    segmented = qrcode.QRCode(version=1, error_correction=fast.error_correction)
+    for segment in fast.data_list:
+        segmented.add_data(segment)
+    segmented.make(fit=False)
+    assert fast.modules == segmented.modules
+
+
+@pytest.mark.parametrize("payload", PAYLOADS, ids=range(len(PAYLOADS)))
+def test_optimal_segments_never_need_a_larger_version(payload):
+    for error_correction in range(4):
+        reference = FastQRCode(error_correction=error_correction)
+        reference.add_data(payload)
+        optimal = FastQRCode(error_correction=error_correction, optimal_segments=True)
+        optimal.add_data(payload)
+        assert optimal.best_fit() <= reference.best_fit()
@@ -0,0 +1,159 @@
+import json
+import sys
+import zipfile
+
+import pytest
+
+from app.core.presets import PRESETS
+from app.export import (
+    MANIFEST_NAME,
+    ManifestError,
+    _load_yaml,
+    export,
+    file_name,
+    main,
+    parse_manifest,
+    zip_manifest_path,
+)
+from app.render.executor import render_executor
+
+YAML_MANIFEST = """\
+- type: url
+  file: homepage
+  url: https://example.com
+- type: wifi
+  ssid: Office
+  password: 12345678
+  preset: print
+- type: contact
+  name: Joel
+  surname: Perez
+  phone_number: +34600312511
+  email: joel@example.com
+  format: svg
+- type: text
+  text: ASSET-0001
+"""
+
+
+def test_parse_yaml_manifest(tmp_path):
+    path = tmp_path / "codes.yaml"
+    path.write_text(YAML_MANIFEST)
+    items, errors = parse_manifest(path)
+    assert errors == []
+    assert [item.name.split("_")[0] for item in items] == [
+        "homepage",
+        "wifi",
+        "contact",
+        "text",
+    ]
+    assert items[1].key.payload == "WIFI:T:WPA;S:Office;P:12345678;;"
+    assert items[1].key.box_size == PRESETS["print"].box_size
+    assert "TEL;CELL:+34600312511" in items[2].key.payload
+    assert [item.key.fmt for item in items] == ["png", "png", "svg", "png"]
+
+
+def test_parse_manifest_errors(tmp_path):
+    path = tmp_path / "codes.yaml"
+    path.write_text(
+        "- type: url\n  url: not a url\n"
+        "- type: text\n  text: hi\n  colour: red\n"
+        "- type: text\n  text: a\n  file: same\n"
+        "- type: text\n  text: b\n  file: same\n"
+        "- type: text\n  text: c\n  file: ../escape\n"
+        "- type: barcode\n"
+        "- type: text\n  text: d\n  preset: huge\n"
+        f"- type: text\n  text: {'x' * 3000}\n"
+    )
+    items, errors = parse_manifest(path)
+    assert [item.name for item in items] == ["same"]
+    assert [error.line for error in errors] == [1, 2, 4, 5, 6, 7, 8]
+    assert "unknown fields for text: colour" in errors[1].message
+    assert "duplicate name" in errors[2].message
+    assert "invalid name" in errors[3].message
+    assert errors[6].message == "too long for a QR code"
+
+
+def test_parse_csv_manifest_applies_format_and_preset(tmp_path):
+    path = tmp_path / "codes.csv"
+    path.write_text("https://example.com\nwifi,Office,correct-horse\n")
+    items, errors = parse_manifest(path, PRESETS["tiny"], fmt="svg")
+    assert errors == []
+    assert [item.name.split("_")[0] for item in items] == ["url", "wifi"]
+    assert {(item.key.fmt, item.key.box_size) for item in items} == {("svg", 2)}
+
+
+def test_yaml_must_be_a_list():
+    with pytest.raises(ManifestError):
+        _load_yaml("type: url\n")
+
+
+def test_missing_pyyaml_is_reported(monkeypatch):
+    monkeypatch.setitem(sys.modules, "yaml", None)
+    with pytest.raises(ManifestError, match="pip install pyyaml"):
+        _load_yaml("- type: url\n")
+
+
+def _items(tmp_path, text):
+    path = tmp_path / "codes.csv"
+    path.write_text(text)
+    items, errors = parse_manifest(path)
+    assert errors == []
+    return items
+
+
+@pytest.mark.asyncio
+async def test_export_directory_is_incremental(tmp_path):
+    output = tmp_path / "out"
+    items = _items(tmp_path, "https://example.com\nASSET-1\nASSET-2\n")
+    url, asset_1, asset_2 = (file_name(item) for item in items)
+    report = await export(items, output)
+    assert report == (3, 0, 0)
+    assert sorted(p.name for p in output.iterdir()) == sorted(
+        [MANIFEST_NAME, url, asset_1, asset_2]
+    )
+    assert (output / url).read_bytes().startswith(b"\x89PNG")
+
+    assert await export(items, output) == (0, 3, 0)
+
+    # A deleted output, a new entry in front and a removed entry
+    (output / url).unlink()
+    items = _items(tmp_path, "ASSET-0\nhttps://example.com\nASSET-2\n")
+    assert await export(items, output) == (2, 1, 1)
+    assert not (output / asset_1).exists()
+    manifest = json.loads((output / MANIFEST_NAME).read_text())
+    assert sorted(manifest) == sorted(file_name(item) for item in items)
+    assert url in manifest and asset_2 in manifest
+
+
+@pytest.mark.asyncio
+async def test_export_zip_reuses_unchanged_members(tmp_path):
+    output = tmp_path / "codes.zip"
+    items = _items(tmp_path, "https://example.com\nASSET-1\n")
+    url = file_name(items[0])
+    assert await export(items, output) == (2, 0, 0)
+    with zipfile.ZipFile(output) as archive:
+        first = archive.read(url)
+
+    items = _items(tmp_path, "https://example.com\nASSET-2\nASSET-3\n")
+    assert await export(items, output) == (2, 1, 1)
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == [file_name(item) for item in items]
+        assert archive.read(url) == first
+    assert zip_manifest_path(output).exists()
+
+
+def test_main_exports_and_reports_errors(tmp_path, capsys, monkeypatch):
+    # main() configures the shared render executor
+    monkeypatch.setattr(render_executor, "kind", render_executor.kind)
+    monkeypatch.setattr(render_executor, "timeout", render_executor.timeout)
+    manifest = tmp_path / "codes.csv"
+    manifest.write_text(f"https://example.com\nwifi,Office,short\n{'x' * 3000}\n")
+    output = tmp_path / "out"
+    code = main([str(manifest), "--output", str(output), "--executor", "inline"])
+    captured = capsys.readouterr()
+    assert code == 1
+    assert f"{manifest}:2: password" in captured.err
+    assert f"{manifest}:3: too long for a QR code" in captured.err
+    assert "1 rendered, 0 unchanged, 0 removed, 2 errors" in captured.out
+    assert [path.suffix for path in output.glob("url_*")] == [".png"]
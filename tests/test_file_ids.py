@@ -0,0 +1,83 @@
+import pytest
+
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from telegram.error import BadRequest
+from app.core.file_ids import FileIdIndex
+from app.functions.shared import reply_qr
+from app.qrcodegen import RenderKey, file_id_digest
+
+
+def test_file_id_index_memory():
+    index = FileIdIndex(max_entries=2)
+    index.put("a", "file-a")
+    index.put("b", "file-b")
+    index.get("a")  # "b" becomes the least recently used
+    index.put("c", "file-c")
+    assert index.get("a") == "file-a"
+    assert index.get("b") is None
+    index.forget("a")
+    assert index.get("a") is None
+
+
+def test_file_id_index_sqlite_survives_restart(tmp_path):
+    path = str(tmp_path / "file_ids.sqlite3")
+    index = FileIdIndex(path=path)
+    index.put("a", "file-a")
+    index.put("b", "file-b")
+    index.forget("b")
+    index.close()
+
+    reopened = FileIdIndex(path=path)
+    assert reopened.get("a") == "file-a"
+    assert reopened.get("a") == "file-a"  # now served from memory
+    assert reopened.get("b") is None
+    reopened.close()
+
+
+def sent_photo(file_id: str) -> MagicMock:
+    message = MagicMock()
+    message.photo = [MagicMock(file_id="thumb"), MagicMock(file_id=file_id)]
+    return message
+
+
+@pytest.mark.asyncio
+async def test_reply_qr_reuses_file_id():
+    update = AsyncMock()
+    update.message.reply_photo = AsyncMock(return_value=sent_photo("file-1"))
+    key = RenderKey("https://reuse.example.com", 1)
+
+    with patch("app.functions.shared.file_id_index", FileIdIndex()):
+        with patch(
+            "app.functions.shared.generate_qr",
+            new=AsyncMock(return_value=BytesIO(b"png")),
+        ) as generate:
+            await reply_qr(update, key, caption="Here is your QR code!")
+            await reply_qr(update, key, caption="Here is your QR code!")
+
+    generate.assert_called_once_with(key)
+    update.message.reply_photo.assert_called_with(
+        photo="file-1", caption="Here is your QR code!"
+    )
+
+
+@pytest.mark.asyncio
+async def test_reply_qr_uploads_again_when_file_id_is_stale():
+    update = AsyncMock()
+    update.message.reply_document = AsyncMock(
+        side_effect=[BadRequest("Wrong file identifier"), MagicMock()]
+    )
+    key = RenderKey("https://stale.example.com", 1, fmt="svg")
+    index = FileIdIndex()
+    index.put(file_id_digest(key), "stale-file")
+
+    with patch("app.functions.shared.file_id_index", index):
+        with patch(
+            "app.functions.shared.generate_qr",
+            new=AsyncMock(return_value=BytesIO(b"<svg/>")),
+        ) as generate:
+            await reply_qr(update, key, caption="Here is your QR code!")
+
+    generate.assert_called_once_with(key)
+    assert update.message.reply_document.call_count == 2
+    assert index.get(file_id_digest(key)) is None
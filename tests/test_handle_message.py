@@ -3,6 +3,9 @@ import pytest
 from unittest.mock import AsyncMock, patch, ANY
 from app.app import handle_message
 from app.core.models import UserState, URLQR, WifiQR, ContactQR
+from app.core.file_ids import FileIdIndex
+from app.functions.shared import BUSY_TEXT, MENU_MARKUP
+from app.render.executor import RenderQueueFull
 from app.qrcodegen import (
     generate_wifi_qr,
     generate_contact_qr,
@@ -480,3 +483,56 @@ async def test_handle_message_awaiting_website_invalid():
     update.message.reply_text.assert_called_once_with(
         "❌ Invalid URL. Please send a valid URL starting with 'http://' or 'https://'."
     )
+
+
+@pytest.mark.asyncio
+async def test_handle_message_shows_menu_after_qr():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.TEXT_AWAITING_TEXT}
+    update.message.text = "menu as a separate message"
+
+    await handle_message(update, context)
+
+    assert "reply_markup" not in update.message.reply_photo.call_args[1]
+    context.bot.send_message.assert_called_once_with(
+        chat_id=ANY, text="Choose an option below:", reply_markup=MENU_MARKUP
+    )
+    assert context.user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_handle_message_attaches_menu_to_qr():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.TEXT_AWAITING_TEXT}
+    update.message.text = "menu on the QR message"
+
+    with patch("app.functions.shared.settings.MENU_WITH_RESULT", True):
+        await handle_message(update, context)
+
+    update.message.reply_photo.assert_called_once_with(
+        photo=ANY, caption="Here is your QR code!", reply_markup=MENU_MARKUP
+    )
+    context.bot.send_message.assert_not_called()
+    assert context.user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_handle_message_asks_to_retry_when_renderer_is_busy():
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {"state": UserState.URL_AWAITING_URL}
+    update.message.text = "https://busy.example.com"
+
+    with patch(
+        "app.functions.shared.generate_qr",
+        new=AsyncMock(side_effect=RenderQueueFull("No render slot")),
+    ), patch("app.functions.shared.file_id_index", FileIdIndex()):
+        await handle_message(update, context)
+
+    update.message.reply_text.assert_called_once_with(BUSY_TEXT)
+    update.message.reply_photo.assert_not_called()
+    context.bot.send_message.assert_not_called()
+    # The same URL can simply be sent again
+    assert context.user_data == {"state": UserState.URL_AWAITING_URL}
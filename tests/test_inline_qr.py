@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from telegram import InlineQuery, InlineQueryResultCachedPhoto, Update, User
+from telegram.error import BadRequest
+from app.app import build_application
+from app.core.concurrency import ChatOrderedUpdateProcessor
+from app.core.file_ids import FileIdIndex
+from app.functions.inline_qr import inline_query_handler
+from app.qrcodegen import file_id_digest, url_qr_key
+from app.core.models import URLQR
+
+
+def inline_update(text: str, user_id: int = 7) -> MagicMock:
+    update = MagicMock()
+    update.inline_query.query = text
+    update.inline_query.from_user.id = user_id
+    update.inline_query.answer = AsyncMock()
+    return update
+
+
+def bot_context(file_id: str = "file-1") -> AsyncMock:
+    context = AsyncMock()
+    message = MagicMock()
+    message.photo = [MagicMock(file_id=file_id)]
+    context.bot.send_photo = AsyncMock(return_value=message)
+    # Answers run as application tasks, kept here so tests can await them
+    context.tasks = []
+
+    def create_task(coroutine, update=None):
+        task = asyncio.create_task(coroutine)
+        context.tasks.append(task)
+        return task
+
+    context.application.create_task = create_task
+    return context
+
+
+async def answered(context: AsyncMock) -> None:
+    await asyncio.gather(*context.tasks, return_exceptions=True)
+
+
+@pytest.fixture(autouse=True)
+def inline_settings():
+    with patch("app.functions.inline_qr.settings.INLINE_CACHE_CHAT_ID", -100), patch(
+        "app.functions.inline_qr.settings.INLINE_DEBOUNCE", 0.05
+    ), patch("app.functions.inline_qr.file_id_index", FileIdIndex()) as index:
+        yield index
+
+
+@pytest.mark.asyncio
+async def test_inline_query_answers_with_cached_photo(inline_settings):
+    update = inline_update("https://inline.example.com")
+    context = bot_context()
+
+    await inline_query_handler(update, context)
+    await answered(context)
+    await inline_query_handler(update, context)
+    await answered(context)
+
+    # Uploaded to the cache chat once, then served from the file_id index
+    context.bot.send_photo.assert_called_once()
+    assert context.bot.send_photo.call_args[1]["chat_id"] == -100
+    results = update.inline_query.answer.call_args[0][0]
+    assert len(results) == 1
+    assert isinstance(results[0], InlineQueryResultCachedPhoto)
+    assert results[0].photo_file_id == "file-1"
+    key = url_qr_key(URLQR(url="https://inline.example.com"))
+    assert inline_settings.get(file_id_digest(key)) == "file-1"
+
+
+@pytest.mark.asyncio
+async def test_stale_file_id_is_forgotten_and_uploaded_again(inline_settings):
+    key = url_qr_key(URLQR(url="https://inline.example.com"))
+    digest = file_id_digest(key)
+    inline_settings.put(digest, "stale")
+    update = inline_update("https://inline.example.com")
+    update.inline_query.answer.side_effect = [
+        BadRequest("Wrong file identifier"),
+        None,
+    ]
+    context = bot_context(file_id="fresh")
+
+    await inline_query_handler(update, context)
+    await answered(context)
+
+    context.bot.send_photo.assert_called_once()
+    results = update.inline_query.answer.call_args[0][0]
+    assert results[0].photo_file_id == "fresh"
+    assert inline_settings.get(digest) == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_inline_query_ignores_invalid_urls():
+    update = inline_update("not a url")
+    context = bot_context()
+
+    await inline_query_handler(update, context)
+    await answered(context)
+
+    context.bot.send_photo.assert_not_called()
+    update.inline_query.answer.assert_called_once()
+    assert update.inline_query.answer.call_args[0][0] == []
+
+
+@pytest.mark.asyncio
+async def test_newer_query_cancels_the_stale_one():
+    stale = inline_update("https://inline.example.com/a")
+    latest = inline_update("https://inline.example.com/ab")
+    context = bot_context()
+
+    await inline_query_handler(stale, context)
+    await asyncio.sleep(0.01)  # still debouncing
+    await inline_query_handler(latest, context)
+    await answered(context)
+
+    stale.inline_query.answer.assert_not_called()
+    latest.inline_query.answer.assert_called_once()
+    context.bot.send_photo.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_queries_of_different_users_are_independent():
+    first = inline_update("https://inline.example.com/one", user_id=1)
+    second = inline_update("https://inline.example.com/two", user_id=2)
+    context = bot_context()
+
+    await asyncio.gather(
+        inline_query_handler(first, context), inline_query_handler(second, context)
+    )
+    await answered(context)
+
+    first.inline_query.answer.assert_called_once()
+    second.inline_query.answer.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_debounce_works_when_every_slot_is_busy():
+    # Inline handlers return at once, so they never keep a concurrency slot
+    # while debouncing and each keystroke gets to cancel the previous query
+    processor = ChatOrderedUpdateProcessor(max_concurrency=2)
+    await processor.initialize()
+    context = bot_context()
+    users = {
+        user_id: [
+            inline_update(f"https://inline.example.com/{user_id}/{'a' * n}", user_id)
+            for n in range(1, 5)
+        ]
+        for user_id in (1, 2)
+    }
+    for keystrokes in zip(*users.values()):
+        await asyncio.gather(
+            *(
+                processor.process_update(update, inline_query_handler(update, context))
+                for update in keystrokes
+            )
+        )
+    await answered(context)
+
+    for updates in users.values():
+        assert [u.inline_query.answer.call_count for u in updates] == [0, 0, 0, 1]
+    assert context.bot.send_photo.call_count == 2
+
+
+def test_inline_queries_are_not_serialized_per_user():
+    user = User(id=7, first_name="Joel", is_bot=False)
+    update = Update(
+        update_id=1, inline_query=InlineQuery("1", user, "https://x.com", "")
+    )
+    assert ChatOrderedUpdateProcessor.ordering_key(update) is None
+
+
+def test_inline_handler_is_registered_with_a_cache_chat():
+    with patch("app.app.settings.TELEGRAM_TOKEN", "123:abc"), patch(
+        "app.app.settings.INLINE_CACHE_CHAT_ID", -100
+    ):
+        application = build_application()
+    callbacks = {handler.callback for handler in application.handlers[0]}
+    assert inline_query_handler in callbacks
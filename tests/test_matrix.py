@@ -0,0 +1,122 @@
+import gzip
+import sys
+import pytest
+import qrcode
+
+from io import BytesIO
+from unittest.mock import patch
+from qrcode.image.pil import PilImage
+from app.qrcodegen import RenderKey, render_qr
+from app.render.encoders import (
+    encode_bits,
+    encode_png,
+    encode_svg,
+    encode_terminal,
+)
+from app.render.matrix import (
+    MatrixCache,
+    QRMatrix,
+    _segno,
+    build_matrix,
+    build_micro_matrix,
+    cached_matrix,
+)
+from app.render.raster import module_array
+from app.render.svg import write_svg
+
+PAYLOAD = "https://example.com/layered"
+
+
+def reference(factory, **kwargs) -> bytes:
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(PAYLOAD)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(image_factory=factory, **kwargs).save(buffer)
+    return buffer.getvalue()
+
+
+def test_matrix_round_trips_modules():
+    qr = qrcode.QRCode()
+    qr.add_data(PAYLOAD)
+    qr.make(fit=True)
+    matrix = QRMatrix.from_modules(qr.modules)
+    assert matrix.size == len(qr.modules)
+    assert matrix.version == qr.version
+    assert len(matrix.bits) == (matrix.size**2 + 7) // 8
+    assert matrix.to_modules() == qr.modules
+    assert matrix.to_array(border=4).shape == (matrix.size + 8,) * 2
+
+
+@pytest.mark.parametrize("backend", ["pil", "numpy"])
+def test_encode_png_matches_qrcode(backend):
+    matrix = build_matrix(PAYLOAD, qrcode.constants.ERROR_CORRECT_L)
+    assert encode_png(matrix, backend=backend) == reference(PilImage)
+
+
+def test_encode_svg_matches_qrcode_modules():
+    matrix = build_matrix(PAYLOAD, qrcode.constants.ERROR_CORRECT_L)
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(PAYLOAD)
+    qr.make(fit=True)
+    expected = BytesIO()
+    write_svg(module_array(qr.modules, border=4), 10, expected)
+    assert encode_svg(matrix) == expected.getvalue()
+    assert gzip.decompress(encode_svg(matrix, compress=True)) == encode_svg(matrix)
+
+
+def test_encode_terminal_uses_half_blocks():
+    matrix = QRMatrix.from_modules([[True, False], [False, True]])
+    assert encode_terminal(matrix, border=0) == "▄▀"
+    assert encode_terminal(matrix, border=0, invert=True) == "▀▄"
+    assert encode_terminal(matrix, border=1).splitlines() == ["█▀██", "██▄█"]
+
+
+def test_encode_bits_is_the_packed_matrix():
+    matrix = QRMatrix.from_modules([[True, False, True], [False] * 3, [True] * 3])
+    assert encode_bits(matrix) == bytes([0b10100011, 0b10000000])
+
+
+def test_matrix_is_shared_across_formats_and_sizes():
+    cache = MatrixCache()
+    with patch("app.render.matrix.matrix_cache", cache):
+        render_qr(RenderKey("shared", 1))
+        render_qr(RenderKey("shared", 1, box_size=3, border=1))
+        render_qr(RenderKey("shared", 1, fmt="svg"))
+        assert cached_matrix("shared", 1) is cache.get(("shared", 1))
+    assert cache.misses == 1
+    assert cache.size == len(cache.get(("shared", 1)).bits)
+
+
+@pytest.fixture
+def micro(monkeypatch):
+    monkeypatch.setattr("app.render.matrix.settings.QR_MICRO", True)
+    _segno.cache_clear()
+    yield
+    _segno.cache_clear()
+
+
+def test_micro_falls_back_to_regular_without_segno(micro, monkeypatch):
+    monkeypatch.setitem(sys.modules, "segno", None)
+    matrix = build_matrix("ID-42", qrcode.constants.ERROR_CORRECT_L)
+    assert matrix.size == 21 and not matrix.micro
+
+
+def test_micro_skips_payloads_that_cannot_fit():
+    assert build_micro_matrix("1" * 36, qrcode.constants.ERROR_CORRECT_L) is None
+    assert build_micro_matrix("1", qrcode.constants.ERROR_CORRECT_H) is None
+
+
+def test_micro_symbols_use_a_smaller_quiet_zone():
+    matrix = QRMatrix.from_modules([[True] * 11] * 11)
+    with patch("app.qrcodegen.cached_matrix", return_value=matrix):
+        svg = render_qr(RenderKey("ID-42", 1, box_size=10, border=4, fmt="svg"))
+    assert b'viewBox="0 0 15 15"' in svg
+
+
+def test_micro_matrix_with_segno(micro):
+    pytest.importorskip("segno")
+    matrix = build_matrix("12345", qrcode.constants.ERROR_CORRECT_L)
+    assert matrix.micro and matrix.size in (11, 13, 15, 17)
+    long = "https://example.com/" + "x" * 40
+    assert not build_matrix(long, qrcode.constants.ERROR_CORRECT_L).micro
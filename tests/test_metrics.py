@@ -0,0 +1,110 @@
+import urllib.request
+
+import pytest
+
+from unittest.mock import AsyncMock, patch
+from app.core.metrics import (
+    Histogram,
+    Metrics,
+    metrics,
+    start_metrics_server,
+    stop_metrics_server,
+)
+from app.functions.shared import command_options
+from app.qrcodegen import RenderKey, render_cached, render_timed
+from app.render.cache import RenderCache
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+    lines = histogram.render("latency", 'stage="x"')
+    assert lines == [
+        'latency_bucket{stage="x",le="0.1"} 1',
+        'latency_bucket{stage="x",le="1.0"} 3',
+        'latency_bucket{stage="x",le="+Inf"} 4',
+        'latency_sum{stage="x"} 6.25',
+        'latency_count{stage="x"} 4',
+    ]
+
+
+def test_time_records_the_stage_even_on_errors():
+    registry = Metrics()
+    with registry.time("validate"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.time("validate"):
+            raise ValueError("invalid")
+    assert registry.histogram("validate").count == 2
+    assert registry.histogram("upload") is None
+
+
+def test_render_includes_stages_and_collectors():
+    registry = Metrics()
+    registry.observe("matrix", 0.002)
+    registry.add_collector(lambda: {"qrcodegen_things_total": 3})
+    text = registry.render()
+    assert "# TYPE qrcodegen_stage_seconds histogram" in text
+    assert 'qrcodegen_stage_seconds_count{stage="matrix"} 1' in text
+    assert "qrcodegen_things_total 3" in text
+
+
+def test_render_timed_reports_matrix_and_encode():
+    data, timings = render_timed(RenderKey("timed", 1))
+    assert data.startswith(b"\x89PNG")
+    assert set(timings) == {"matrix", "encode"}
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+@pytest.mark.asyncio
+async def test_render_cached_observes_render_stages():
+    registry = Metrics()
+    with patch("app.qrcodegen.render_cache", RenderCache()), patch(
+        "app.qrcodegen.metrics", registry
+    ):
+        await render_cached(RenderKey("observed", 1))
+        await render_cached(RenderKey("observed", 1))  # cache hit, not rendered
+    assert registry.histogram("matrix").count == 1
+    assert registry.histogram("encode").count == 1
+
+
+@pytest.mark.asyncio
+async def test_command_options_times_the_menu():
+    registry = Metrics()
+    update = AsyncMock()
+    context = AsyncMock()
+    context.user_data = {}
+    with patch("app.functions.shared.metrics", registry):
+        await command_options(update, context)
+    assert registry.histogram("menu").count == 1
+
+
+def test_standalone_metrics_server():
+    metrics.observe("upload", 0.01)
+    server = start_metrics_server("127.0.0.1", 0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        stop_metrics_server()
+    assert content_type.startswith("text/plain")
+    assert 'qrcodegen_stage_seconds_count{stage="upload"}' in body
+    assert "qrcodegen_render_cache_hits_total" in body
+
+
+def test_metrics_merge_snapshots_of_sources():
+    worker = Metrics()
+    worker.observe("encode", 0.002)
+    worker.add_collector(lambda: {"qrcodegen_render_cache_hits_total": 2})
+    supervisor = Metrics()
+    supervisor.observe("encode", 0.2)
+    supervisor.add_collector(lambda: {"qrcodegen_render_cache_hits_total": 1})
+    supervisor.add_source(lambda: [worker.snapshot()])
+
+    text = supervisor.render()
+    assert 'qrcodegen_stage_seconds_count{stage="encode"} 2' in text
+    assert 'qrcodegen_stage_seconds_bucket{stage="encode",le="0.0025"} 1' in text
+    assert "qrcodegen_render_cache_hits_total 3" in text
@@ -0,0 +1,54 @@
+import pytest
+import zlib
+
+from io import BytesIO
+from PIL import Image
+import numpy as np
+from app.render.encoders import encode_png
+from app.render.matrix import build_matrix
+from app.render.png import PNG_SIGNATURE, iter_png, write_png
+from app.render.raster import module_array, rasterize
+
+
+def chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    assert data.startswith(PNG_SIGNATURE)
+    position, found = len(PNG_SIGNATURE), []
+    while position < len(data):
+        length = int.from_bytes(data[position : position + 4], "big")
+        kind = data[position + 4 : position + 8]
+        body = data[position + 8 : position + 8 + length]
+        crc = int.from_bytes(data[position + 8 + length : position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        found.append((kind, body))
+        position += 12 + length
+    return found
+
+
+@pytest.mark.parametrize("box_size", [1, 3, 10])
+def test_streamed_png_decodes_to_the_rasterized_image(box_size):
+    matrix = module_array(
+        build_matrix("https://example.com/stream", 1).to_modules(), border=4
+    )
+    buffer = BytesIO()
+    write_png(matrix, box_size, buffer)
+    decoded = Image.open(BytesIO(buffer.getvalue()))
+    assert decoded.mode == "1"
+    expected = np.asarray(rasterize(matrix, box_size))
+    assert (np.asarray(decoded) == expected).all()
+
+
+def test_large_outputs_are_split_into_idat_chunks():
+    matrix = module_array(build_matrix("x" * 2000, 0).to_modules(), border=4)
+    # zlib emits compressed blocks as its internal buffer fills
+    data = b"".join(iter_png(matrix, box_size=40, chunk_size=1024))
+    kinds = [kind for kind, _ in chunks(data)]
+    assert kinds[0] == b"IHDR" and kinds[-1] == b"IEND"
+    assert kinds.count(b"IDAT") > 1
+
+
+def test_stream_backend_matches_other_backends():
+    matrix = build_matrix("https://example.com/backends", 1)
+    streamed = Image.open(BytesIO(encode_png(matrix, backend="stream")))
+    reference = Image.open(BytesIO(encode_png(matrix, backend="numpy")))
+    assert streamed.size == reference.size
+    assert (np.asarray(streamed) == np.asarray(reference.convert("1"))).all()
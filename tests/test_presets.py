@@ -0,0 +1,71 @@
+import qrcode
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.models import URLQR, UserState, WifiQR
+from app.core.presets import DEFAULT_PRESET, PRESETS, preset_for, reset_state
+from app.functions.url_qr import url_qr_handle_url_state
+from app.qrcodegen import RenderKey, render_qr, text_qr_key, url_qr_key, wifi_qr_key
+from app.render.matrix import matrix_cache
+
+
+def test_preset_for_defaults_to_standard():
+    assert preset_for({}) == PRESETS[DEFAULT_PRESET]
+    assert preset_for({"preset": "unknown"}) == PRESETS[DEFAULT_PRESET]
+    assert preset_for({"preset": "tiny"}) == PRESETS["tiny"]
+
+
+def test_default_preset_keeps_existing_keys():
+    assert text_qr_key("hello") == RenderKey("hello", qrcode.constants.ERROR_CORRECT_L)
+
+
+def test_preset_changes_size_and_keeps_flow_ecc():
+    key = text_qr_key("hello", preset=PRESETS["tiny"])
+    assert key == RenderKey(
+        "hello", qrcode.constants.ERROR_CORRECT_L, box_size=2, border=4
+    )
+    wifi = WifiQR(ssid="home", password="password")
+    assert wifi_qr_key(wifi, preset=PRESETS["chat-thumbnail"]).error_correction == (
+        qrcode.constants.ERROR_CORRECT_M
+    )
+
+
+def test_presets_keep_the_quiet_zone():
+    assert {preset.border for preset in PRESETS.values()} == {4}
+
+
+def test_print_preset_raises_ecc():
+    key = url_qr_key(URLQR(url="https://example.com"), preset=PRESETS["print"])
+    assert key.error_correction == qrcode.constants.ERROR_CORRECT_Q
+    assert key.box_size == 24
+
+
+def test_presets_share_the_matrix():
+    matrix_cache.clear()
+    hits = matrix_cache.stats()["hits"]
+    render_qr(text_qr_key("shared", preset=PRESETS["tiny"]))
+    render_qr(text_qr_key("shared", preset=PRESETS["standard"]))
+    assert matrix_cache.stats()["hits"] == hits + 1
+
+
+def test_reset_state_keeps_preset():
+    user_data = {"state": UserState.TEXT_AWAITING_TEXT, "preset": "tiny"}
+    reset_state(user_data)
+    assert user_data == {"preset": "tiny"}
+    user_data = {"state": UserState.TEXT_AWAITING_TEXT}
+    reset_state(user_data)
+    assert user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_handler_renders_with_chosen_preset():
+    update = AsyncMock()
+    update.message.text = "https://example.com"
+    context = AsyncMock()
+    context.user_data = {"state": UserState.URL_AWAITING_URL, "preset": "print"}
+
+    with patch("app.functions.url_qr.finish_with_qr") as finish:
+        await url_qr_handle_url_state(update, context)
+
+    key = finish.call_args.args[2]
+    assert key == url_qr_key(URLQR(url="https://example.com"), preset=PRESETS["print"])
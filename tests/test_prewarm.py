@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import patch
+
+from app.app import post_init
+from app.batch import parse_batch
+from app.prewarm import PREWARM_VERSIONS, prewarm
+from app.render.cache import render_cache
+from app.render.templates import version_template
+
+
+def test_startup_skips_lazy_modules():
+    code = (
+        "import sys, app.app; "
+        "print(sorted({'email_validator', 'logfire'} & set(sys.modules)))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize(
+    "enabled, disabled_plugins", [("false", "__all__"), ("True", None)]
+)
+def test_plugin_discovery_is_only_skipped_without_logfire(enabled, disabled_plugins):
+    code = (
+        "import os, app.core.config; print(os.environ.get('PYDANTIC_DISABLE_PLUGINS'))"
+    )
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name != "PYDANTIC_DISABLE_PLUGINS"
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env | {"LOGFIRE_ENABLED": enabled},
+    )
+    assert completed.stdout.strip() == str(disabled_plugins)
+
+
+@pytest.mark.asyncio
+async def test_prewarm_renders_payloads_into_cache():
+    payloads = ["https://example.com/prewarm", "wifi,Office,correct-horse"]
+    render_cache.clear()
+    version_template.cache_clear()
+
+    await prewarm(payloads + ["wifi,missing-password"])
+
+    items, _ = parse_batch(payloads)
+    assert all(render_cache.get(item.key) is not None for item in items)
+    assert version_template.cache_info().currsize == len(PREWARM_VERSIONS)
+
+
+@pytest.mark.asyncio
+async def test_post_init_prewarms_only_when_enabled():
+    with patch("app.app.prewarm") as prewarm_mock, patch(
+        "app.app.settings.PREWARM_PAYLOADS", ["https://example.com"]
+    ):
+        with patch("app.app.settings.PREWARM", False):
+            await post_init(None)
+        prewarm_mock.assert_not_called()
+        with patch("app.app.settings.PREWARM", True):
+            await post_init(None)
+        prewarm_mock.assert_awaited_once_with(["https://example.com"])
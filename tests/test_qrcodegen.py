@@ -1,9 +1,14 @@
 import pytest
+from unittest.mock import patch
 from app.qrcodegen import (
     generate_url_qr,
     generate_wifi_qr,
     generate_contact_qr,
     generate_text_qr,
+    file_id_digest,
+    key_digest,
+    RenderKey,
+    symbol_settings,
 )
 from app.core.models import ContactQR, WifiQR, URLQR
 from pydantic import ValidationError
@@ -113,3 +118,30 @@ async def test_generate_contact_qr_invalid_url():
                 url="invalid-url",
             )
         )
+
+
+def test_key_digest_is_stable_and_opaque():
+    key = RenderKey("WIFI:T:WPA;S:Office;P:secret-password;;", 0)
+    digest = key_digest(key)
+    assert digest == key_digest(RenderKey(*key))
+    assert digest != key_digest(key._replace(fmt="svg"))
+    assert "secret" not in digest
+
+
+def test_file_id_digest_follows_the_symbol_settings():
+    key = RenderKey("https://example.com", 1)
+    digest = file_id_digest(key)
+    with patch("app.qrcodegen.settings.QR_MICRO", True):
+        assert file_id_digest(key) != digest
+    with patch("app.qrcodegen.settings.QR_FAST_MASK", 3):
+        assert file_id_digest(key) != digest
+    assert file_id_digest(key) == digest
+
+
+def test_file_id_digest_is_keyed_on_the_bot_token():
+    key = RenderKey("WIFI:T:WPA;S:Office;P:secret-password;;", 0)
+    with patch("app.qrcodegen.settings.TELEGRAM_TOKEN", "123:abc"):
+        digest = file_id_digest(key)
+    with patch("app.qrcodegen.settings.TELEGRAM_TOKEN", "456:def"):
+        assert file_id_digest(key) != digest
+    assert digest != key_digest([*key, *symbol_settings()])
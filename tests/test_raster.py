@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+import qrcode
+
+from io import BytesIO
+from qrcode.image.pil import PilImage
+from app.render.raster import module_array, rasterize
+
+
+@pytest.mark.parametrize("version", [1, 10, 40])
+def test_numpy_rasterizer_matches_pil(version):
+    qr = qrcode.QRCode(version=version, box_size=3, border=2)
+    qr.add_data("QRCODEGEN")
+    qr.make(fit=False)
+    expected, actual = BytesIO(), BytesIO()
+    qr.make_image(image_factory=PilImage).save(expected)
+    rasterize(module_array(qr.modules, qr.border), qr.box_size).save(actual, "PNG")
+    assert actual.getvalue() == expected.getvalue()
+
+
+def test_rasterize_scales_modules():
+    matrix = module_array([[True, False], [False, True]], border=1)
+    assert matrix.shape == (4, 4)
+    pixels = np.asarray(rasterize(matrix, box_size=2))
+    assert pixels.shape == (8, 8)
+    assert not pixels[2:4, 2:4].any()  # dark module
+    assert pixels[2:4, 4:6].all()  # light module
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from unittest.mock import AsyncMock
+from telegram.error import RetryAfter
+from app.core.ratelimit import TokenBucket, TokenBucketRateLimiter
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = bucket.updated
+    assert bucket.delay(now) == 0
+    bucket.take(now)
+    assert bucket.delay(now) == pytest.approx(0.5)
+    assert bucket.delay(now + 0.5) == 0
+    assert bucket.idle(now + 10)
+
+
+async def send(limiter, calls, endpoint, chat_id=None, result=True):
+    async def callback():
+        calls.append(endpoint)
+        return result
+
+    data = {} if chat_id is None else {"chat_id": chat_id}
+    return await limiter.process_request(callback, (), {}, endpoint, data, None)
+
+
+@pytest.mark.asyncio
+async def test_photos_are_sent_before_queued_menus():
+    limiter = TokenBucketRateLimiter(global_rate=20)
+    limiter._global = TokenBucket(rate=20, capacity=1)
+    await limiter.initialize()
+    calls = []
+    try:
+        await send(limiter, calls, "getMe")  # uses the only token
+        await asyncio.gather(
+            send(limiter, calls, "sendMessage", chat_id=1),
+            send(limiter, calls, "sendPhoto", chat_id=2),
+        )
+    finally:
+        await limiter.shutdown()
+    assert calls == ["getMe", "sendPhoto", "sendMessage"]
+
+
+@pytest.mark.asyncio
+async def test_chat_bucket_throttles_one_chat_only():
+    limiter = TokenBucketRateLimiter(chat_rate=10, burst=1)
+    await limiter.initialize()
+    calls = []
+    try:
+        start = time.monotonic()
+        await asyncio.gather(
+            send(limiter, calls, "sendMessage", chat_id=1),
+            send(limiter, calls, "sendMessage", chat_id=2),
+        )
+        other_chats = time.monotonic() - start
+        await send(limiter, calls, "sendMessage", chat_id=1)
+        same_chat = time.monotonic() - start
+    finally:
+        await limiter.shutdown()
+    assert other_chats < 0.05
+    assert same_chat >= 0.09
+
+
+def test_groups_use_the_group_rate():
+    limiter = TokenBucketRateLimiter(chat_rate=1, group_rate=0.5)
+    now = time.monotonic()
+    assert limiter._chat_bucket(-100, now).rate == 0.5
+    assert limiter._chat_bucket("@channel", now).rate == 0.5
+    assert limiter._chat_bucket(42, now).rate == 1
+    assert TokenBucketRateLimiter.chat_key({"chat_id": "42"}) == 42
+    assert TokenBucketRateLimiter.chat_key({}) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_retries():
+    limiter = TokenBucketRateLimiter()
+    callback = AsyncMock(side_effect=[RetryAfter(0), {"ok": True}])
+    try:
+        result = await limiter.process_request(
+            callback, (), {}, "sendPhoto", {"chat_id": 1}, None
+        )
+    finally:
+        await limiter.shutdown()
+    assert result == {"ok": True}
+    assert callback.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_gives_up_after_max_retries():
+    limiter = TokenBucketRateLimiter(max_retries=1)
+    callback = AsyncMock(side_effect=RetryAfter(0))
+    try:
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(callback, (), {}, "sendMessage", {}, None)
+    finally:
+        await limiter.shutdown()
+    assert callback.await_count == 2
@@ -0,0 +1,122 @@
+import asyncio
+import time
+import pytest
+
+from unittest.mock import patch
+from app.qrcodegen import RenderKey, generate_url_qr, render_cached
+from app.core.models import URLQR
+from app.render.cache import RenderCache
+
+
+def test_render_cache_hit_and_miss():
+    cache = RenderCache()
+    assert cache.get("key") is None
+    cache.put("key", b"data")
+    assert cache.get("key") == b"data"
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "expirations": 0,
+        "entries": 1,
+        "bytes": 4,
+    }
+
+
+def test_render_cache_evicts_least_recently_used_by_entries():
+    cache = RenderCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")  # "b" becomes the least recently used
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.evictions == 1
+
+
+def test_render_cache_evicts_by_byte_budget():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"123")
+    assert len(cache) == 2
+    assert cache.size == 8
+    cache.put("too-big", b"x" * 11)  # larger than the whole budget
+    assert cache.get("too-big") is None
+
+
+def test_render_cache_replaces_existing_key():
+    cache = RenderCache()
+    cache.put("a", b"123")
+    cache.put("a", b"12")
+    assert cache.size == 2
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_render_cache_ttl_expiry():
+    cache = RenderCache(ttl=10)
+    with patch("app.render.cache.time.monotonic", return_value=100):
+        cache.put("a", b"1")
+    with patch("app.render.cache.time.monotonic", return_value=105):
+        assert cache.get("a") == b"1"
+    with patch("app.render.cache.time.monotonic", return_value=111):
+        assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_generators_reuse_cached_render():
+    with patch("app.qrcodegen.render_cache", RenderCache()) as cache:
+        first = await generate_url_qr(URLQR(url="https://cache.example.com"))
+        second = await generate_url_qr(URLQR(url="https://cache.example.com"))
+    assert first is not second
+    assert first.getvalue() == second.getvalue()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_render():
+    key = RenderKey("single flight", 1)
+    with patch("app.qrcodegen.render_cache", RenderCache()), patch(
+        "app.qrcodegen.render_timed", return_value=(b"png", {})
+    ) as render:
+        results = await asyncio.gather(*(render_cached(key) for _ in range(5)))
+    assert results == [b"png"] * 5
+    render.assert_called_once_with(key)
+
+
+@pytest.mark.asyncio
+async def test_failed_render_is_not_cached():
+    key = RenderKey("failing", 1)
+    with patch("app.qrcodegen.render_cache", RenderCache()) as cache, patch(
+        "app.qrcodegen.render_timed", side_effect=ValueError("boom")
+    ):
+        with pytest.raises(ValueError):
+            await render_cached(key)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_renders_itself_when_the_first_caller_is_cancelled():
+    key = RenderKey("cancelled leader", 1)
+    started = asyncio.Event()
+
+    def slow_render(key):
+        time.sleep(0.05)
+        return b"png", {}
+
+    async def submit(fn, *args):
+        started.set()
+        return await asyncio.to_thread(fn, *args)
+
+    with patch("app.qrcodegen.render_cache", RenderCache()), patch(
+        "app.qrcodegen.render_timed", slow_render
+    ), patch("app.qrcodegen.render_executor.submit", submit):
+        leader = asyncio.create_task(render_cached(key))
+        await started.wait()
+        follower = asyncio.create_task(render_cached(key))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == b"png"
+    assert leader.cancelled()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import pytest
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+
+from app.qrcodegen import RenderKey, render_qr
+from app.render.executor import RenderExecutor, RenderQueueFull, RenderTimeout
+
+
+def slow_job(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.mark.asyncio
+async def test_inline_executor_runs_job():
+    executor = RenderExecutor(kind="inline")
+    data = await executor.submit(render_qr, RenderKey("inline", 1))
+    assert data.startswith(b"\x89PNG")
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_jobs_concurrently():
+    executor = RenderExecutor(kind="thread", max_workers=4)
+    try:
+        results = await asyncio.gather(
+            *(
+                executor.submit(render_qr, RenderKey(f"payload {i}", 1))
+                for i in range(8)
+            )
+        )
+    finally:
+        executor.shutdown()
+    assert all(result.startswith(b"\x89PNG") for result in results)
+
+
+@pytest.mark.asyncio
+async def test_process_executor_runs_job():
+    executor = RenderExecutor(kind="process", max_workers=1)
+    try:
+        data = await executor.submit(render_qr, RenderKey("process", 1, fmt="svg"))
+    finally:
+        executor.shutdown()
+    assert b"<svg" in data
+
+
+@pytest.mark.asyncio
+async def test_executor_job_timeout():
+    executor = RenderExecutor(kind="thread", max_workers=1, timeout=0.05)
+    try:
+        with pytest.raises(RenderTimeout):
+            await executor.submit(slow_job, 0.5)
+    finally:
+        executor.shutdown(wait=False)
+
+
+@pytest.mark.asyncio
+async def test_executor_backpressure_when_queue_is_full():
+    executor = RenderExecutor(kind="thread", max_workers=1, max_queue=0, timeout=0.1)
+    try:
+        running = asyncio.create_task(executor.submit(slow_job, 0.3))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RenderQueueFull):
+            await executor.submit(slow_job, 0)
+        with pytest.raises(RenderTimeout):
+            await running
+    finally:
+        executor.shutdown(wait=False)
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_shut_down_and_replaced():
+    executor = RenderExecutor(kind="process", max_workers=1)
+    broken = MagicMock()
+    future = Future()
+    future.set_exception(BrokenProcessPool("A worker died"))
+    broken.submit.return_value = future
+    executor._pool = broken
+
+    with pytest.raises(BrokenProcessPool):
+        await executor.submit(slow_job, 0)
+
+    broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+    assert executor._pool is None
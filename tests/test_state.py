@@ -0,0 +1,222 @@
+import fnmatch
+import pytest
+import pytest_asyncio
+
+from unittest.mock import MagicMock, patch
+from app.core.models import UserState
+from app.core.state import (
+    MemoryStateStore,
+    RedisStateStore,
+    SQLiteStateStore,
+    StatePersistence,
+    create_state_store,
+    write_through,
+)
+
+
+class FakeRedis:
+    """Local stand-in implementing the Redis commands the store uses."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.expiry: dict[str, int | None] = {}
+        self.closed = False
+
+    async def get(self, name):
+        return self.data.get(name)
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = value.encode()
+        self.expiry[name] = ex
+
+    async def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    async def scan_iter(self, match=None):
+        for key in list(self.data):
+            if match is None or fnmatch.fnmatch(key, match):
+                yield key.encode()
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "redis"])
+async def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStateStore(ttl=60)
+    elif request.param == "sqlite":
+        store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), ttl=60)
+    else:
+        store = RedisStateStore(FakeRedis(), ttl=60)
+    await store.open()
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_store_round_trip(store):
+    user_data = {"state": UserState.WIFI_AWAITING_PASSWORD, "ssid": "Office"}
+    await store.set(1, user_data)
+    await store.set(2, {"state": UserState.URL_AWAITING_URL})
+
+    loaded, updated_at = await store.get(1)
+    assert loaded == user_data
+    assert isinstance(loaded["state"], UserState)
+    assert updated_at > 0
+    assert set(await store.load_all()) == {1, 2}
+
+    await store.delete(1)
+    assert await store.get(1) is None
+    assert await store.get(3) is None
+
+
+@pytest.mark.asyncio
+async def test_store_ttl_expiry(tmp_path):
+    for store in (
+        MemoryStateStore(ttl=60),
+        SQLiteStateStore(str(tmp_path / "ttl.sqlite3"), ttl=60),
+    ):
+        await store.open()
+        with patch("app.core.state.time.time", return_value=1000):
+            await store.set(1, {"name": "Joel"})
+        with patch("app.core.state.time.time", return_value=1030):
+            assert await store.get(1) is not None
+        with patch("app.core.state.time.time", return_value=1100):
+            assert await store.get(1) is None
+            assert await store.load_all() == {}
+            await store.purge_expired()
+        with patch("app.core.state.time.time", return_value=1000):
+            assert await store.load_all() == {}  # really deleted
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_uses_key_expiry():
+    client = FakeRedis()
+    store = RedisStateStore(client, ttl=90.5)
+    await store.set(7, {"name": "Joel"})
+    assert client.expiry == {"qrcodegen:user:7": 90}
+    await store.close()
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_persistence_loads_and_writes_user_data():
+    store = MemoryStateStore()
+    await store.set(1, {"state": UserState.VCARD_AWAITING_PHONE, "name": "Joel"})
+    persistence = StatePersistence(store)
+
+    assert await persistence.get_user_data() == {
+        1: {"state": UserState.VCARD_AWAITING_PHONE, "name": "Joel"}
+    }
+    await persistence.update_user_data(1, {"state": UserState.URL_AWAITING_URL})
+    assert (await store.get(1))[0] == {"state": UserState.URL_AWAITING_URL}
+
+    # command_options clears user_data, which removes the stored record
+    await persistence.update_user_data(1, {})
+    assert await store.get(1) is None
+
+    await persistence.update_user_data(2, {"name": "Ana"})
+    await persistence.drop_user_data(2)
+    assert await store.get(2) is None
+
+    assert await persistence.get_chat_data() == {}
+    assert await persistence.get_bot_data() == {}
+    assert await persistence.get_conversations("name") == {}
+    assert await persistence.get_callback_data() is None
+    await persistence.flush()
+
+
+@pytest.mark.asyncio
+async def test_shared_state_reaches_the_next_replica_before_the_batched_write():
+    store = MemoryStateStore()
+    replica_a = StatePersistence(store, shared=True)
+    replica_b = StatePersistence(store, shared=True)
+    await replica_a.get_user_data()
+    await replica_b.get_user_data()
+
+    # Replica B started the Wi-Fi flow earlier
+    data_b = {}
+    with patch("app.core.state.time.time", return_value=1000):
+        await replica_b.refresh_user_data(1, data_b)
+        await replica_b.update_user_data(1, {"state": UserState.WIFI_AWAITING_SSID})
+    data_b["state"] = UserState.WIFI_AWAITING_SSID
+
+    # Replica A handles the SSID; PTB's batched write has not run yet
+    data_a = {"state": UserState.WIFI_AWAITING_PASSWORD, "ssid": "Office"}
+    update = MagicMock()
+    update.effective_user.id = 1
+    context = MagicMock(user_data=data_a)
+    context.application.persistence = replica_a
+    with patch("app.core.state.time.time", return_value=1001):
+        await write_through(update, context)
+
+    # The password message reaches replica B, in the state A left
+    with patch("app.core.state.time.time", return_value=1002):
+        await replica_b.refresh_user_data(1, data_b)
+    assert data_b == {"state": UserState.WIFI_AWAITING_PASSWORD, "ssid": "Office"}
+
+    # Local changes not stored yet are not clobbered by older stored data
+    data_b["password"] = "correct-horse"
+    with patch("app.core.state.time.time", return_value=1003):
+        await replica_b.refresh_user_data(1, data_b)
+    assert data_b["password"] == "correct-horse"
+
+
+@pytest.mark.asyncio
+async def test_shared_state_is_read_before_the_local_copy_expires():
+    store = MemoryStateStore(ttl=86400)
+    replica_a = StatePersistence(store, shared=True)
+    replica_b = StatePersistence(store, shared=True)
+    day = 86400
+
+    # Replica A saw the user on day 1
+    data_a = {}
+    with patch("app.core.state.time.time", return_value=1000):
+        await replica_a.refresh_user_data(1, data_a)
+        data_a |= {"preset": "tiny", "state": UserState.TEXT_AWAITING_TEXT}
+        await replica_a.update_user_data(1, data_a)
+
+    # On day 2 replica B starts the URL flow
+    with patch("app.core.state.time.time", return_value=1000 + 1.5 * day):
+        data_b = {}
+        await replica_b.refresh_user_data(1, data_b)
+        assert data_b == {}  # A's record expired
+        data_b |= {"preset": "tiny", "state": UserState.URL_AWAITING_URL}
+        await replica_b.update_user_data(1, data_b)
+
+    # The URL reaches replica A, whose own copy is older than the TTL
+    with patch("app.core.state.time.time", return_value=1001 + 1.5 * day):
+        await replica_a.refresh_user_data(1, data_a)
+    assert data_a == {"preset": "tiny", "state": UserState.URL_AWAITING_URL}
+
+    # Without a newer record, an abandoned conversation is still reset
+    with patch("app.core.state.time.time", return_value=1000 + 3 * day):
+        await replica_a.refresh_user_data(1, data_a)
+    assert data_a == {"preset": "tiny"}
+
+
+@pytest.mark.asyncio
+async def test_persistence_resets_abandoned_conversations():
+    persistence = StatePersistence(MemoryStateStore(ttl=60))
+    user_data = {}
+    with patch("app.core.state.time.time", return_value=1000):
+        await persistence.refresh_user_data(1, user_data)
+    user_data["state"] = UserState.VCARD_AWAITING_EMAIL
+
+    with patch("app.core.state.time.time", return_value=1030):
+        await persistence.refresh_user_data(1, user_data)
+    assert user_data == {"state": UserState.VCARD_AWAITING_EMAIL}
+
+    with patch("app.core.state.time.time", return_value=1100):
+        await persistence.refresh_user_data(1, user_data)
+    assert user_data == {}
+
+
+def test_create_state_store_from_settings(tmp_path):
+    with patch("app.core.state.settings.STATE_BACKEND", "memory"):
+        assert isinstance(create_state_store(), MemoryStateStore)
+    with patch("app.core.state.settings.STATE_BACKEND", "sqlite"):
+        assert isinstance(create_state_store(), SQLiteStateStore)
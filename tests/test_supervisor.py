@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import os
+from datetime import datetime
+
+import pytest
+
+from unittest.mock import patch
+from telegram import Chat, InlineQuery, Message, Update, User
+
+from app.supervisor import Supervisor, shard_for
+from benchmarks.load import FLOWS, run_load
+
+USER = User(id=42, first_name="Joel", is_bot=False)
+
+
+def message_update(update_id: int, chat_id: int) -> Update:
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    message = Message(message_id=1, date=datetime.now(), chat=chat, from_user=USER)
+    return Update(update_id=update_id, message=message)
+
+
+def test_shard_for_keeps_chats_on_one_worker():
+    assert shard_for(message_update(1, 7), 4) == 3
+    assert shard_for(message_update(2, 7), 4) == 3
+    assert shard_for(message_update(3, -1001), 4) == 3  # groups are negative
+    inline = InlineQuery(id="1", from_user=USER, query="x", offset="")
+    assert shard_for(Update(update_id=4, inline_query=inline), 4) == 42 % 4
+
+
+def echo_worker(crash_marker: str, index: int, workers: int, conn) -> None:
+    # Stands in for a bot process: reports the last update id as a sample.
+    # Update 99 crashes it; only once if crash_marker names a file.
+    conn.send(("ready", None))
+    while True:
+        kind, payload = conn.recv()
+        if kind == "stop":
+            return
+        if payload["update_id"] == 99 and not os.path.exists(crash_marker):
+            if crash_marker:
+                open(crash_marker, "w").close()
+            os._exit(3)
+        snapshot = {"histograms": {}, "samples": {"last_update": payload["update_id"]}}
+        conn.send(("metrics", snapshot))
+        conn.send(("ack", payload["update_id"]))
+
+
+async def wait_for_sample(supervisor: Supervisor, value: int) -> None:
+    while [s["samples"]["last_update"] for s in supervisor.snapshots()] != [value]:
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_resends_unacknowledged_updates(tmp_path):
+    marker = str(tmp_path / "crashed")
+    supervisor = Supervisor(1, target=functools.partial(echo_worker, marker))
+    await asyncio.wait_for(supervisor.start(), 30)
+    try:
+        supervisor.dispatch(message_update(1, 7))
+        await asyncio.wait_for(wait_for_sample(supervisor, 1), 10)
+
+        # Update 3 may already sit in the crashing worker's pipe
+        supervisor.dispatch(message_update(99, 7))
+        supervisor.dispatch(message_update(3, 7))
+        await asyncio.wait_for(wait_for_sample(supervisor, 3), 30)
+        assert os.path.exists(marker)
+        assert supervisor.workers[0].restarts == 1
+        assert supervisor.workers[0].pending == {}
+    finally:
+        await supervisor.stop(timeout=10)
+    assert not supervisor.workers[0].process.is_alive()
+
+
+@pytest.mark.asyncio
+async def test_supervisor_drops_updates_that_keep_crashing_workers():
+    supervisor = Supervisor(1, target=functools.partial(echo_worker, ""))
+    await asyncio.wait_for(supervisor.start(), 30)
+    try:
+        with patch("app.supervisor.MAX_CRASHES", 2), patch(
+            "app.supervisor.RESTART_BACKOFF", 0
+        ):
+            supervisor.dispatch(message_update(99, 7))
+            supervisor.dispatch(message_update(3, 7))
+            await asyncio.wait_for(wait_for_sample(supervisor, 3), 30)
+        assert supervisor.workers[0].restarts == 2
+        assert supervisor.workers[0].pending == {}
+    finally:
+        await supervisor.stop(timeout=10)
+
+
+@pytest.mark.asyncio
+async def test_sharded_bot_serves_every_flow():
+    report = await run_load(chats=6, distinct=2, workers=2)
+    assert report["timeouts"] == 0
+    assert report["updates"] == 2 * sum(len(steps) for steps in FLOWS.values())
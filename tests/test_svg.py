@@ -0,0 +1,66 @@
+import gzip
+import re
+
+import numpy as np
+import pytest
+import qrcode
+
+from io import BytesIO
+from app.core.models import URLQR
+from app.qrcodegen import generate_url_qr
+from app.render.raster import module_array
+from app.render.svg import dark_runs, write_svg
+from unittest.mock import patch
+
+
+def parse_path(svg: bytes) -> np.ndarray:
+    size = int(re.search(rb'viewBox="0 0 (\d+) ', svg).group(1))
+    matrix = np.zeros((size, size), dtype=bool)
+    for x, y, n in re.findall(rb"M(\d+) (\d+)h(\d+)v1h-\d+z", svg):
+        matrix[int(y), int(x) : int(x) + int(n)] = True
+    return matrix
+
+
+def test_dark_runs_do_not_span_rows():
+    matrix = np.array([[False, True, True], [True, False, True]])
+    rows, columns, lengths = dark_runs(matrix)
+    assert list(zip(rows, columns, lengths)) == [(0, 1, 2), (1, 0, 1), (1, 2, 1)]
+
+
+@pytest.mark.parametrize("version", [1, 10, 40])
+def test_svg_path_round_trips_matrix(version):
+    qr = qrcode.QRCode(version=version, border=4)
+    qr.add_data("QRCODEGEN")
+    qr.make(fit=False)
+    buffer = BytesIO()
+    write_svg(module_array(qr.modules, qr.border), qr.box_size, buffer)
+
+    svg = buffer.getvalue()
+    assert svg.count(b"<path") == 1
+    assert (parse_path(svg) == module_array(qr.modules, qr.border)).all()
+
+
+def test_svgz_output_is_gzipped_and_deterministic():
+    qr = qrcode.QRCode()
+    qr.add_data("QRCODEGEN")
+    matrix = module_array(qr.get_matrix(), border=0)
+    first, second, plain = BytesIO(), BytesIO(), BytesIO()
+    write_svg(matrix, 10, first, compress=True)
+    write_svg(matrix, 10, second, compress=True)
+    write_svg(matrix, 10, plain)
+    assert first.getvalue() == second.getvalue()
+    assert gzip.decompress(first.getvalue()) == plain.getvalue()
+
+
+def test_write_svg_dimensions():
+    buffer = BytesIO()
+    write_svg(np.ones((29, 29), dtype=bool), box_size=10, out=buffer)
+    assert b'width="29mm" height="29mm" viewBox="0 0 29 29"' in buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_generate_url_qr_svgz():
+    with patch("app.qrcodegen.settings.SVG_GZIP", True):
+        qr_code = await generate_url_qr(URLQR(url="https://svgz.example.com"), svg=True)
+    assert qr_code.name == "url_qr.svgz"
+    assert gzip.decompress(qr_code.getvalue()).startswith(b"<?xml")
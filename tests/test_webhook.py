@@ -0,0 +1,92 @@
+import asyncio
+import signal
+
+import pytest
+import uvicorn
+
+from unittest.mock import MagicMock, patch
+from starlette.testclient import TestClient
+from telegram import Bot, Update
+from app.webhook import SECRET_TOKEN_HEADER, WebhookServer, create_webhook_app
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 42, "type": "private"},
+        "text": "hello",
+    },
+}
+
+
+def fake_application(running: bool = True) -> MagicMock:
+    application = MagicMock()
+    application.running = running
+    application.bot = Bot("123:abc")
+    application.update_queue = asyncio.Queue()
+    return application
+
+
+def test_webhook_enqueues_update():
+    application = fake_application()
+    with TestClient(create_webhook_app(application)) as client:
+        response = client.post("/telegram", json=UPDATE)
+
+    assert response.status_code == 200
+    update = application.update_queue.get_nowait()
+    assert isinstance(update, Update)
+    assert update.effective_chat.id == 42
+
+
+def test_webhook_rejects_invalid_json():
+    with TestClient(create_webhook_app(fake_application())) as client:
+        response = client.post("/telegram", content=b"not json")
+    assert response.status_code == 400
+
+
+def test_webhook_checks_secret_token():
+    application = fake_application()
+    with patch("app.webhook.settings.WEBHOOK_SECRET_TOKEN", "s3cret"):
+        with TestClient(create_webhook_app(application)) as client:
+            forbidden = client.post("/telegram", json=UPDATE)
+            allowed = client.post(
+                "/telegram", json=UPDATE, headers={SECRET_TOKEN_HEADER: "s3cret"}
+            )
+    assert forbidden.status_code == 403
+    assert allowed.status_code == 200
+    assert application.update_queue.qsize() == 1
+
+
+def test_health_and_readiness():
+    application = fake_application(running=False)
+    webhook_app = create_webhook_app(application)
+    with TestClient(webhook_app) as client:
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").status_code == 503
+        application.running = True
+        assert client.get("/readyz").status_code == 200
+        webhook_app.state.draining = True
+        assert client.get("/readyz").status_code == 503
+        assert client.post("/telegram", json=UPDATE).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_server_drains_before_exiting():
+    webhook_app = create_webhook_app(fake_application())
+    server = WebhookServer(uvicorn.Config(app=webhook_app), drain_delay=60)
+
+    server.handle_exit(signal.SIGTERM, None)
+    assert webhook_app.state.draining
+    assert not await server.on_tick(1)
+
+    server.drain_started -= 60
+    assert await server.on_tick(1)
+
+    server.handle_exit(signal.SIGTERM, None)  # a second signal exits right away
+    assert server.should_exit
+
+
+def test_metrics_are_not_served_on_the_webhook_port():
+    with TestClient(create_webhook_app(fake_application())) as client:
+        assert client.get("/metrics").status_code == 404